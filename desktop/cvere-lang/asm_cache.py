@@ -0,0 +1,196 @@
+"""
+CVERE Assembly Cache - Content-addressed on-disk store of assembled programs
+"""
+
+import hashlib
+import json
+import os
+import struct
+import sys
+import tempfile
+from array import array
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional, Sequence, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Not available on Windows; eviction is then unlocked
+    fcntl = None
+
+
+# Entry layout: header, little-endian code words, JSON symbol table
+ENTRY_MAGIC = b'CVAC'
+ENTRY_VERSION = 1
+ENTRY_HEADER = struct.Struct('<4sHII')  # magic, version, word count, symbol bytes
+ENTRY_SUFFIX = '.cvac'
+
+
+class AssemblyCache:
+    """Stores machine code and symbol tables keyed by source and ISA hashes
+
+    Entries are written to a temporary file and renamed into place, so
+    readers in other processes never see a partial entry. Hits refresh the
+    entry's mtime, and eviction removes the least recently used entries
+    until the directory fits in max_bytes. Eviction holds an exclusive
+    lock so concurrent writers do not evict past the bound.
+
+    An assembler built with CVEREAssembler(cache=...) consults it from
+    assemble_words, and so from assemble_bytes, assemble_into,
+    assemble_to_hex, assemble_to_binary_file and assemble_batch;
+    assemble() and assemble_object() always run both passes.
+    """
+
+    def __init__(self, directory: str, max_bytes: int = 64 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def key(source: str, fingerprint: str) -> str:
+        """Cache key for a source assembled against an ISA fingerprint"""
+        digest = hashlib.sha256(fingerprint.encode('ascii'))
+        digest.update(b'\0')
+        digest.update(source.encode('utf-8'))
+        return digest.hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + ENTRY_SUFFIX)
+
+    def get(self, key: str) -> Optional[Tuple[array, Dict[str, int]]]:
+        """Return (machine code as array('H'), labels) for a key, or None on a miss"""
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+
+        entry = self._decode(data)
+        if entry is None:
+            # Written by an incompatible version; drop it
+            self._unlink(path)
+            self.misses += 1
+            return None
+
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass  # Evicted by another process after we read it
+        self.hits += 1
+        return entry
+
+    def put(self, key: str, machine_code: Sequence[int], labels: Dict[str, int]) -> None:
+        """Store an assembled program and evict old entries if needed"""
+        code = array('H', machine_code)
+        if code.itemsize != 2:
+            raise ValueError("Platform has no 16-bit array type")
+        if sys.byteorder == 'big':
+            code.byteswap()
+        symbols = json.dumps(labels, separators=(',', ':')).encode('utf-8')
+        data = ENTRY_HEADER.pack(ENTRY_MAGIC, ENTRY_VERSION, len(code), len(symbols)) + code.tobytes() + symbols
+
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, self._path(key))
+        except BaseException:
+            self._unlink(tmp_path)
+            raise
+
+        self.evict()
+
+    def evict(self) -> int:
+        """Remove least recently used entries until the cache fits; returns bytes freed"""
+        with self._lock():
+            entries = []
+            total = 0
+            for entry in os.scandir(self.directory):
+                if not entry.name.endswith(ENTRY_SUFFIX):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+
+            freed = 0
+            if total > self.max_bytes:
+                entries.sort()
+                for _, size, path in entries:
+                    if total - freed <= self.max_bytes:
+                        break
+                    self._unlink(path)
+                    freed += size
+            return freed
+
+    def clear(self) -> None:
+        """Remove every entry"""
+        with self._lock():
+            for entry in os.scandir(self.directory):
+                if entry.name.endswith(ENTRY_SUFFIX):
+                    self._unlink(entry.path)
+
+    @contextmanager
+    def _lock(self) -> Iterator[None]:
+        if fcntl is None:
+            yield
+            return
+        with open(os.path.join(self.directory, '.lock'), 'a') as f:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+    @staticmethod
+    def _decode(data: bytes) -> Optional[Tuple[array, Dict[str, int]]]:
+        if len(data) < ENTRY_HEADER.size:
+            return None
+        magic, version, words, symbol_bytes = ENTRY_HEADER.unpack_from(data)
+        end = ENTRY_HEADER.size + words * 2
+        if magic != ENTRY_MAGIC or version != ENTRY_VERSION or len(data) != end + symbol_bytes:
+            return None
+
+        code = array('H')
+        code.frombytes(data[ENTRY_HEADER.size:end])
+        if sys.byteorder == 'big':
+            code.byteswap()
+        return code, json.loads(data[end:].decode('utf-8'))
+
+    @staticmethod
+    def _unlink(path: str) -> None:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def main():
+    """Example usage"""
+    import time
+
+    from assembler import CVEREAssembler
+
+    source = '\n'.join(f"l{i}: ADDI R1, 0x01\n    BNE R1, l{i}" for i in range(5000)) + "\n    HALT"
+
+    with tempfile.TemporaryDirectory() as directory:
+        assembler = CVEREAssembler(cache=AssemblyCache(directory))
+
+        print("=== CVERE Assembly Cache ===\n")
+        for run in ("cold", "warm"):
+            start = time.perf_counter()
+            hex_output = assembler.assemble_to_hex(source)
+            elapsed = time.perf_counter() - start
+            print(f"{run}: {elapsed * 1000:.1f} ms, {len(hex_output.splitlines())} words, "
+                  f"{len(assembler.labels)} labels")
+
+        print(f"\nHits: {assembler.cache.hits}, misses: {assembler.cache.misses}")
+
+
+if __name__ == "__main__":
+    main()
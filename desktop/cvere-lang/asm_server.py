@@ -0,0 +1,344 @@
+"""
+CVERE Assembler Server - Long-running toolchain service over a Unix socket or pipe
+
+Every message, in both directions, is a 4-byte big-endian length followed
+by that many bytes of UTF-8 JSON. A request is an object with an "op" and
+an optional "id", which the reply echoes; replies on one connection may
+arrive out of order when requests are pipelined.
+
+    {"id": 1, "op": "assemble", "source": "LOADI R1, 5\\nHALT"}
+    {"id": 1, "ok": true, "words": [49413, 65535], "labels": {}}
+
+    {"id": 2, "op": "assemble", "source": "FOO R1"}
+    {"id": 2, "ok": false, "error": "Unknown opcode: FOO"}
+
+Operations:
+    ping                                        -> {}
+    assemble     source, encoding="words"       -> words | data (base64, little-endian), labels
+    disassemble  words, start_address=0, labels={name: address},
+                 show_hex=true, show_comments=true -> text
+    encode       mnemonic, operands=[int, ...]  -> word (single-word instructions only)
+    decode       word, extension=null           -> mnemonic, operands
+    isa                                         -> instructions
+"""
+
+import argparse
+import base64
+import json
+import os
+import socket
+import struct
+import sys
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, BinaryIO, Callable, Dict, List, Optional
+
+from assembler import CVEREAssembler
+from disassembler import CVEREDisassembler
+from isa_designer import ISADesigner
+
+
+HEADER = struct.Struct('>I')
+MAX_MESSAGE = 64 * 1024 * 1024  # Larger frames are refused and end the connection
+
+
+def read_message(stream: BinaryIO) -> Optional[Dict[str, Any]]:
+    """Next length-prefixed JSON message, or None at the end of the stream"""
+    header = _read_exactly(stream, HEADER.size)
+    if header is None:
+        return None
+    (length,) = HEADER.unpack(header)
+    if length > MAX_MESSAGE:
+        raise ValueError(f"Message of {length} bytes exceeds the {MAX_MESSAGE} byte limit")
+    body = _read_exactly(stream, length) if length else b''
+    if body is None:
+        raise ValueError("Stream ended inside a message")
+    message = json.loads(body)
+    if not isinstance(message, dict):
+        raise ValueError("A message must be a JSON object")
+    return message
+
+
+def write_message(stream: BinaryIO, message: Dict[str, Any]) -> None:
+    """Write one length-prefixed JSON message and flush it"""
+    body = json.dumps(message, separators=(',', ':')).encode('utf-8')
+    stream.write(HEADER.pack(len(body)) + body)
+    stream.flush()
+
+
+def _read_exactly(stream: BinaryIO, size: int) -> Optional[bytes]:
+    """size bytes, or None if the stream ends before the first one"""
+    data = stream.read(size)
+    if not data:
+        return None
+    while len(data) < size:
+        more = stream.read(size - len(data))
+        if not more:
+            raise ValueError("Stream ended inside a message")
+        data += more
+    return data
+
+
+class Toolchain:
+    """Warm assembler, disassembler and ISA tables serving requests one at a time
+
+    Sources come from clients, so .INCBIN may only read files inside
+    include_dir, and is refused when none is given.
+    """
+
+    def __init__(self, include_dir: Optional[str] = None):
+        self.isa = ISADesigner()
+        self.assembler = CVEREAssembler(isa=self.isa)
+        self.assembler.include_dir = include_dir
+        self.assembler.confine_includes = True
+        self.disassembler = CVEREDisassembler()
+        self.disassembler.decode_table()  # Build the shared table now, not on the first request
+        self.operations: Dict[str, Callable[[Dict[str, Any]], Dict[str, Any]]] = {
+            'ping': lambda request: {},
+            'assemble': self.assemble,
+            'disassemble': self.disassemble,
+            'encode': self.encode,
+            'decode': self.decode,
+            'isa': self.describe_isa,
+        }
+
+    def handle(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """Reply to one request; failures become {"ok": false, "error": ...}"""
+        reply: Dict[str, Any] = {'id': request.get('id')}
+        try:
+            op = request.get('op')
+            operation = self.operations.get(op) if isinstance(op, str) else None
+            if operation is None:
+                raise ValueError(f"Unknown op: {op!r} (choose from {', '.join(self.operations)})")
+            reply.update(operation(request))
+            reply['ok'] = True
+        except (ValueError, KeyError, TypeError, IndexError, AttributeError, OSError) as e:
+            reply['ok'] = False
+            reply['error'] = str(e) if not isinstance(e, KeyError) else f"Missing or unknown {e}"
+        return reply
+
+    def assemble(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        encoding = request.get('encoding', 'words')
+        if encoding == 'words':
+            result: Dict[str, Any] = {'words': self.assembler.assemble_words(request['source']).tolist()}
+        elif encoding == 'base64':
+            data = self.assembler.assemble_bytes(request['source']).tobytes()
+            result = {'data': base64.b64encode(data).decode('ascii')}
+        else:
+            raise ValueError(f"Unknown encoding: {encoding!r} (choose from words, base64)")
+        result['labels'] = dict(self.assembler.labels)
+        return result
+
+    def disassemble(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        disassembler = self.disassembler
+        disassembler.address_labels.clear()
+        for label, address in request.get('labels', {}).items():
+            disassembler.add_label(address, label)
+        text = disassembler.disassemble_to_string(request['words'], request.get('start_address', 0),
+                                                  show_hex=request.get('show_hex', True),
+                                                  show_comments=request.get('show_comments', True))
+        return {'text': text}
+
+    def encode(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        return {'word': self.isa.encode_instruction(request['mnemonic'], request.get('operands', []))}
+
+    def decode(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        mnemonic, operands = self.isa.decode_instruction(request['word'], request.get('extension'))
+        return {'mnemonic': mnemonic, 'operands': operands}
+
+    def describe_isa(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        return {'instructions': [spec.to_dict() for spec in self.isa.instructions.values()]}
+
+
+# Each pool process builds its tables once and keeps them between requests
+_toolchain: Optional[Toolchain] = None
+
+
+def _start_worker(include_dir: Optional[str]) -> None:
+    global _toolchain
+    sys.stdout = sys.stderr  # Stray prints must not corrupt a stdio reply stream
+    _toolchain = Toolchain(include_dir)
+
+
+def _handle(request: Dict[str, Any]) -> Dict[str, Any]:
+    return _toolchain.handle(request)
+
+
+class AssemblerServer:
+    """Serves toolchain requests from a pool of warm worker processes
+
+    Assembly is CPU-bound, so requests run in separate processes rather
+    than threads; each connection is read by its own thread and may
+    pipeline requests, at most max_pending of them in flight. With
+    workers=0 requests are handled inline, one at a time across all
+    connections, since they share one Toolchain.
+    """
+
+    def __init__(self, workers: Optional[int] = None, max_pending: int = 64,
+                 include_dir: Optional[str] = None):
+        self.workers = workers if workers is not None else os.cpu_count() or 1
+        self.max_pending = max_pending
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._inline: Optional[Toolchain] = None
+        self._inline_lock = threading.Lock()
+        if self.workers:
+            self._pool = ProcessPoolExecutor(self.workers, initializer=_start_worker, initargs=(include_dir,))
+        else:
+            self._inline = Toolchain(include_dir)
+
+    def submit(self, request: Dict[str, Any]) -> 'Future[Dict[str, Any]]':
+        """Schedule one request; the future holds its reply"""
+        if self._pool is not None:
+            return self._pool.submit(_handle, request)
+        future: 'Future[Dict[str, Any]]' = Future()
+        with self._inline_lock:
+            reply = self._inline.handle(request)
+        future.set_result(reply)
+        return future
+
+    def serve_stream(self, reader: BinaryIO, writer: BinaryIO) -> None:
+        """Answer requests from reader until it ends, then wait for the replies"""
+        write_lock = threading.Lock()
+        slots = threading.BoundedSemaphore(self.max_pending)
+        idle = threading.Condition()
+        pending = [0]
+
+        def reply(message: Dict[str, Any]) -> None:
+            try:
+                with write_lock:
+                    write_message(writer, message)
+            except (OSError, ValueError):
+                pass  # Client went away; keep draining the other replies
+
+        def finished(future: 'Future[Dict[str, Any]]', request_id: Any) -> None:
+            try:
+                message = future.result()
+            except Exception as e:  # A crashed worker still gets the client an answer
+                message = {'id': request_id, 'ok': False, 'error': f"Internal error: {e!r}"}
+            reply(message)
+            slots.release()
+            with idle:
+                pending[0] -= 1
+                idle.notify_all()
+
+        while True:
+            try:
+                request = read_message(reader)
+            except ValueError as e:
+                reply({'id': None, 'ok': False, 'error': str(e)})
+                break  # Framing is lost, so the rest of the stream cannot be trusted
+            if request is None:
+                break
+            slots.acquire()
+            with idle:
+                pending[0] += 1
+            self.submit(request).add_done_callback(
+                lambda future, request_id=request.get('id'): finished(future, request_id))
+
+        with idle:
+            idle.wait_for(lambda: pending[0] == 0)
+
+    def serve_stdio(self) -> None:
+        """Serve one client over stdin/stdout, e.g. a parent process's pipes"""
+        writer = sys.stdout.buffer
+        sys.stdout = sys.stderr  # Keep prints out of the reply stream
+        self.serve_stream(sys.stdin.buffer, writer)
+
+    def serve_unix(self, path: str, ready: Optional[threading.Event] = None) -> None:
+        """Accept clients on a Unix domain socket until interrupted"""
+        if not hasattr(socket, 'AF_UNIX'):
+            raise ValueError("Unix domain sockets are not available on this platform; use --stdio")
+        if os.path.exists(path):
+            os.unlink(path)  # Stale socket from an earlier run
+
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as listener:
+            listener.bind(path)
+            listener.listen()
+            if ready is not None:
+                ready.set()
+            try:
+                while True:
+                    connection, _ = listener.accept()
+                    threading.Thread(target=self._serve_connection, args=(connection,), daemon=True).start()
+            finally:
+                os.unlink(path)
+
+    def _serve_connection(self, connection: socket.socket) -> None:
+        with connection, connection.makefile('rb') as reader, connection.makefile('wb') as writer:
+            self.serve_stream(reader, writer)
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown()
+
+    def __enter__(self) -> 'AssemblerServer':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class AssemblerClient:
+    """Blocking client for a server listening on a Unix domain socket"""
+
+    def __init__(self, path: str):
+        self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._socket.connect(path)
+        self._reader = self._socket.makefile('rb')
+        self._writer = self._socket.makefile('wb')
+        self._next_id = 0
+
+    def request(self, op: str, **fields: Any) -> Dict[str, Any]:
+        """Send one request and wait for its reply; errors raise ValueError"""
+        self._next_id += 1
+        write_message(self._writer, dict(fields, op=op, id=self._next_id))
+        reply = read_message(self._reader)
+        if reply is None:
+            raise ValueError("Server closed the connection")
+        if not reply.get('ok'):
+            raise ValueError(reply.get('error', "Request failed"))
+        return reply
+
+    def assemble(self, source: str) -> List[int]:
+        return self.request('assemble', source=source)['words']
+
+    def disassemble(self, words: List[int], **options: Any) -> str:
+        return self.request('disassemble', words=words, **options)['text']
+
+    def close(self) -> None:
+        self._reader.close()
+        self._writer.close()
+        self._socket.close()
+
+    def __enter__(self) -> 'AssemblerClient':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="CVERE toolchain server")
+    where = parser.add_mutually_exclusive_group()
+    where.add_argument('--socket', metavar='PATH', help="listen on a Unix domain socket")
+    where.add_argument('--stdio', action='store_true', help="serve one client over stdin/stdout (default)")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="worker processes (default: one per CPU, 0 = serve inline)")
+    parser.add_argument('--include-dir', metavar='DIR', default=None,
+                        help="directory .INCBIN may read from (default: .INCBIN is refused)")
+    args = parser.parse_args(argv)
+
+    with AssemblerServer(args.workers, include_dir=args.include_dir) as server:
+        try:
+            if args.socket:
+                print(f"CVERE server listening on {args.socket} with {server.workers} workers", file=sys.stderr)
+                server.serve_unix(args.socket)
+            else:
+                server.serve_stdio()
+        except KeyboardInterrupt:
+            pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
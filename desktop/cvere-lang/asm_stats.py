@@ -0,0 +1,302 @@
+"""
+CVERE Assembler Statistics - Per-phase timing and counters for assembler builds
+"""
+
+import functools
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+
+# Public entry points; each outermost call is one build. Time they spend
+# outside the instrumented phases is output formatting, writes and cache
+# lookups, except for the streaming assembler and the object encoder of
+# assemble_object, which do their work inline.
+ENTRY_POINTS = {
+    'assemble': 'output',
+    'assemble_words': 'output',
+    'assemble_bytes': 'output',
+    'assemble_into': 'output',
+    'assemble_to_hex': 'output',
+    'assemble_to_binary_file': 'output',
+    'assemble_object': 'output',
+    'assemble_batch': 'output',
+    'assemble_stream': 'stream',
+    'assemble_stream_to_binary_file': 'stream',
+}
+
+# Inner steps timed as phases of their own
+PHASES = {
+    'expand_load_immediates': 'li',
+    'load_label_addresses': 'relax',
+    'relax_branches': 'relax',
+    'second_pass': 'encode',
+    'second_pass_words': 'encode',
+}
+
+
+@dataclass
+class AssemblerStats:
+    """Measurements of one build (one outermost assemble call)
+
+    Phase times are exclusive: time spent in a nested phase is counted
+    there and not in the phase around it, so they add up to the total.
+    The streaming assembler keeps no instruction list, so its instruction,
+    word and format counts are taken from the encoder as it emits words.
+    """
+    entry_point: str = ""
+    phases: Dict[str, float] = field(default_factory=dict)  # Phase -> seconds
+    programs: int = 0
+    lines: int = 0
+    instructions: int = 0
+    words: int = 0
+    formats: Dict[str, int] = field(default_factory=dict)   # Format -> instructions
+    peak_bytes: int = 0  # Peak traced allocation, 0 unless memory is traced
+
+    @property
+    def seconds(self) -> float:
+        return sum(self.phases.values())
+
+    @property
+    def lines_per_second(self) -> float:
+        seconds = self.seconds
+        return self.lines / seconds if seconds else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Plain dictionary for metrics pipelines"""
+        data = asdict(self)
+        data['seconds'] = self.seconds
+        data['lines_per_second'] = self.lines_per_second
+        return data
+
+    def format(self) -> str:
+        """Human readable summary"""
+        seconds = self.seconds
+        lines = [f"{self.entry_point}: {self.programs} programs, {self.lines} lines, "
+                 f"{self.instructions} instructions, {self.words} words in {seconds * 1000:.2f} ms "
+                 f"({self.lines_per_second:,.0f} lines/s)"]
+        for phase, elapsed in self.phases.items():
+            share = elapsed / seconds * 100 if seconds else 0.0
+            lines.append(f"  {phase:<28} {elapsed * 1000:9.3f} ms {share:5.1f}%")
+        if self.formats:
+            lines.append("  Formats: " + ', '.join(f"{name} {count}" for name, count in self.formats.items()))
+        if self.peak_bytes:
+            lines.append(f"  Peak allocation: {self.peak_bytes / 1024:.1f} KiB")
+        return '\n'.join(lines)
+
+
+StatsHook = Callable[[AssemblerStats], None]
+
+
+class AssemblerProfiler:
+    """Instruments one CVEREAssembler by wrapping its methods on the instance
+
+    Nothing is wrapped until attach() is called, and detach() removes the
+    wrappers again, so an assembler without a profiler runs the plain
+    class methods with no overhead. After every build the stats are kept
+    in last and passed to the hook, if any.
+
+    The first pass streams lexed lines into label collection as the plain
+    one does, counting them on the way, and is timed as one phase; every
+    configured pass is timed under its fingerprint.
+    Memory tracing uses tracemalloc, which slows allocation-heavy code
+    noticeably, so it is off unless trace_memory is set.
+    """
+
+    def __init__(self, hook: Optional[StatsHook] = None, trace_memory: bool = False):
+        self.hook = hook
+        self.trace_memory = trace_memory
+        self.last: Optional[AssemblerStats] = None
+        self._stats: Optional[AssemblerStats] = None
+        self._stack: List[List[Any]] = []  # [phase, start, time in nested phases]
+        self._wrapped: List[str] = []
+        self._started_tracing = False
+        self._baseline = 0
+
+    def attach(self, assembler) -> None:
+        """Wrap the assembler's entry points and phases"""
+        self.detach(assembler)
+        for name, phase in ENTRY_POINTS.items():
+            self._wrap(assembler, name, self._entry(assembler, name, phase, getattr(assembler, name)))
+        for name, phase in PHASES.items():
+            self._wrap(assembler, name, self._timed(phase, getattr(assembler, name)))
+        self._wrap(assembler, 'first_pass', self._first_pass(assembler))
+        self._wrap(assembler, 'run_passes', self._run_passes(assembler, assembler.run_passes))
+
+    def detach(self, assembler) -> None:
+        """Restore the plain class methods"""
+        for name in self._wrapped:
+            assembler.__dict__.pop(name, None)
+        self._wrapped = []
+
+    def _wrap(self, assembler, name: str, wrapper: Callable) -> None:
+        setattr(assembler, name, wrapper)
+        self._wrapped.append(name)
+
+    def _enter(self, phase: str) -> None:
+        self._stack.append([phase, time.perf_counter(), 0.0])
+
+    def _exit(self) -> None:
+        phase, start, nested = self._stack.pop()
+        elapsed = time.perf_counter() - start
+        phases = self._stats.phases
+        phases[phase] = phases.get(phase, 0.0) + elapsed - nested
+        if self._stack:
+            self._stack[-1][2] += elapsed
+
+    def _timed(self, phase: str, method: Callable) -> Callable:
+        @functools.wraps(method)
+        def wrapper(*args, **kwargs):
+            if self._stats is None:
+                return method(*args, **kwargs)
+            self._enter(phase)
+            try:
+                return method(*args, **kwargs)
+            finally:
+                self._exit()
+        return wrapper
+
+    def _entry(self, assembler, name: str, phase: str, method: Callable) -> Callable:
+        timed = self._timed(phase, method)
+        streaming = name.startswith('assemble_stream')
+
+        @functools.wraps(method)
+        def wrapper(*args, **kwargs):
+            if self._stats is not None:
+                return timed(*args, **kwargs)  # Nested inside another entry point
+
+            if streaming and args:
+                args = (self._count_lines(args[0]),) + args[1:]
+            self._stats = AssemblerStats(entry_point=name)
+            encoders = assembler.encoders
+            if streaming:
+                assembler.encoders = self._counting_encoders(assembler, encoders)
+            self._start_tracing()
+            try:
+                return timed(*args, **kwargs)
+            finally:
+                assembler.encoders = encoders
+                stats, self._stats = self._stats, None
+                self._stack.clear()
+                stats.peak_bytes = self._stop_tracing()
+                self.last = stats
+                if self.hook is not None:
+                    self.hook(stats)
+        return wrapper
+
+    def _first_pass(self, assembler) -> Callable:
+        plain = assembler.first_pass
+        lex = assembler.lex_lines
+        collect = assembler.collect_lines
+
+        @functools.wraps(plain)
+        def first_pass(source: str) -> None:
+            if self._stats is None:
+                return plain(source)
+            self._enter('first_pass')
+            try:
+                collect(self._count_lines(lex(source)))
+            finally:
+                self._exit()
+            self._stats.programs += 1
+        return first_pass
+
+    def _run_passes(self, assembler, plain: Callable) -> Callable:
+        @functools.wraps(plain)
+        def run_passes() -> None:
+            if self._stats is None:
+                return plain()
+            passes = assembler.passes
+            assembler.passes = [self._timed(
+                f"pass:{getattr(p, 'fingerprint', None) or getattr(p, '__qualname__', type(p).__qualname__)}", p)
+                for p in passes]
+            try:
+                plain()
+            finally:
+                assembler.passes = passes
+            self._count_instructions(assembler)
+        return run_passes
+
+    def _count_instructions(self, assembler) -> None:
+        """Instruction and word counts of the program about to be encoded"""
+        stats = self._stats
+        formats = stats.formats
+        for instr in assembler.instructions:
+            fmt = assembler.formats.get(instr.opcode)
+            name = fmt.value if fmt is not None else instr.opcode
+            formats[name] = formats.get(name, 0) + 1
+        stats.instructions += len(assembler.instructions)
+        stats.words += assembler.current_address // 2
+
+    def _counting_encoders(self, assembler, encoders: Dict[str, Callable]) -> Dict[str, Callable]:
+        """Encoders that also count the instructions, words and formats they encode"""
+        stats = self._stats
+        formats = stats.formats
+
+        def counting(opcode: str, encode: Callable) -> Callable:
+            fmt = assembler.formats.get(opcode)
+            name = fmt.value if fmt is not None else opcode
+
+            def wrapper(instr):
+                words = encode(instr)
+                stats.instructions += 1
+                stats.words += len(words)
+                formats[name] = formats.get(name, 0) + 1
+                return words
+            return wrapper
+
+        return {opcode: counting(opcode, encode) for opcode, encode in encoders.items()}
+
+    def _count_lines(self, lines: Iterable[Any]) -> Iterator[Any]:
+        for line in lines:
+            if self._stats is not None:
+                self._stats.lines += 1
+            yield line
+
+    def _start_tracing(self) -> None:
+        if not self.trace_memory:
+            return
+        self._started_tracing = not tracemalloc.is_tracing()
+        if self._started_tracing:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        self._baseline = tracemalloc.get_traced_memory()[0]
+
+    def _stop_tracing(self) -> int:
+        if not self.trace_memory:
+            return 0
+        peak = tracemalloc.get_traced_memory()[1] - self._baseline
+        if self._started_tracing:
+            tracemalloc.stop()
+        return max(peak, 0)
+
+
+def main():
+    """Example usage"""
+    from assembler import CVEREAssembler
+
+    block = """loop{0}:
+    LOADI R1, 0x05
+    ADD   R3, R1, R2
+    SUB   R3, R3, R1
+    STORE R3, R0, 0x0
+    BNE   R3, loop{0}"""
+    source = '\n'.join(block.format(i) for i in range(6_000)) + '\n    HALT'  # About 60 KB of code
+    reports: List[Dict[str, Any]] = []
+
+    print("=== CVERE Assembler Statistics ===\n")
+    assembler = CVEREAssembler(stats_hook=lambda stats: reports.append(stats.to_dict()))
+    assembler.assemble_words(source)
+    assembler.assemble_to_hex(source)
+    for report in reports:
+        print(f"{report['entry_point']}: {report['lines']} lines at {report['lines_per_second']:,.0f} lines/s")
+
+    profiler = assembler.enable_stats(trace_memory=True)
+    assembler.assemble_to_hex(source)
+    print()
+    print(profiler.last.format())
+
+
+if __name__ == "__main__":
+    main()
@@ -2,14 +2,75 @@
 CVERE Assembler - Converts assembly language to hexadecimal machine code
 """
 
+import hashlib
+import io
+import json
+import mmap
+import os
 import re
-from typing import List, Tuple, Dict, Optional
-from dataclasses import dataclass
+import sys
+from array import array
+from bisect import bisect_left
+from enum import Enum
+from itertools import compress
+from typing import BinaryIO, Callable, Iterable, Iterator, List, Tuple, Dict, FrozenSet, Optional, Sequence, Set, Union
+from dataclasses import dataclass, field
 
+from asm_cache import AssemblyCache
+from asm_stats import AssemblerProfiler, AssemblerStats, StatsHook
+from immediates import ImmediateSynthesizer, Step
+from isa_designer import ISADesigner, InstructionFormat, InstructionSpec
 
-@dataclass
+
+def lex(lines: Iterable[str]) -> Iterator[Tuple[Optional[str], Optional[str], str]]:
+    """(label, mnemonic, operand field) for each source line, in order
+    
+    Comments are dropped and whitespace trimmed; mnemonics keep their case.
+    A label is the single token before the first colon. Plain string
+    methods do the work: about 1.4x the old per-line tokenizer, and the
+    first pass built on it about 1.6x (benchmark.py lexer).
+    """
+    for line in lines:
+        code = line.partition(';')[0]
+        label = None
+        if ':' in code:
+            head, _, rest = code.partition(':')
+            head = head.strip()
+            if len(head.split()) <= 1:
+                label, code = head, rest
+        parts = code.split(None, 1)
+        if not parts:
+            yield label, None, ''
+            continue
+        if ':' in parts[0]:
+            # A second colon ends the mnemonic: "a: b:c" is b with operand ":c"
+            code = code.strip()
+            colon = code.index(':')
+            parts = [code[:colon], code[colon:]]
+            if not parts[0]:
+                yield label, None, ''
+                continue
+        if len(parts) == 1:
+            yield label, parts[0], ''
+        else:
+            yield label, parts[0], parts[1].rstrip()
+
+
+def split_operands(field: str) -> List[str]:
+    """Comma separated operands with surrounding whitespace trimmed"""
+    return [operand.strip() for operand in field.split(',')] if field else []
+
+
+# Sources that include binary files; their output depends on more than the text
+INCBIN_PATTERN = re.compile(r'\.incbin\b', re.IGNORECASE)
+
+
+@dataclass(slots=True)
 class Instruction:
-    """Represents a parsed instruction"""
+    """Represents a parsed instruction
+
+    Slotted, since large sources keep millions of these alive at once.
+    """
     label: Optional[str]
     opcode: str
     operands: List[str]
@@ -17,6 +78,236 @@ class Instruction:
     address: int = 0
 
 
+class _StringIds(dict):
+    """String -> id in an interning table; unseen strings are added on lookup"""
+
+    def __init__(self):
+        super().__init__()
+        self.strings: List[str] = []
+        self['']  # Id 0 stands for "no label"
+
+    def __missing__(self, text: str) -> int:
+        number = self[text] = len(self.strings)
+        self.strings.append(text)
+        return number
+
+
+class InstructionTable:
+    """Instructions stored column-wise, for sources too large to keep as records
+
+    Mnemonics, labels and operands are interned into one string table and
+    each instruction is a row of integer ids in array columns, a few dozen
+    bytes instead of a few hundred for an Instruction with its operand
+    list. Indexing and iteration build a fresh Instruction per row, so
+    changes made to a returned record are not stored back and records are
+    not identical across reads; passes that need either get a list instead
+    (see CVEREAssembler.run_passes).
+    """
+
+    def __init__(self, instructions: Iterable[Instruction] = (), ids: Optional[_StringIds] = None):
+        self.ids = ids if ids is not None else _StringIds()
+        self.strings = self.ids.strings
+        self.labels = array('I')
+        self.opcodes = array('I')
+        self.line_nums = array('I')
+        self.addresses = array('I')
+        self.operand_ends = array('I')  # Row i owns operand_ids[operand_ends[i - 1]:operand_ends[i]]
+        self.operand_ids = array('I')
+        for instr in instructions:
+            self.append(instr)
+
+    def append(self, instr: Instruction) -> None:
+        ids = self.ids
+        self.labels.append(ids[instr.label] if instr.label else 0)
+        self.opcodes.append(ids[instr.opcode])
+        self.line_nums.append(instr.line_num)
+        self.addresses.append(instr.address)
+        self.operand_ids.extend(map(ids.__getitem__, instr.operands))
+        self.operand_ends.append(len(self.operand_ids))
+
+    def clear(self) -> None:
+        self.__init__()
+
+    def contains_opcode(self, opcode: str) -> bool:
+        """Whether any row uses opcode, without building records"""
+        number = self.ids.get(opcode)
+        return number is not None and number in self.opcodes
+
+    def select(self, opcodes: Iterable[str]) -> Iterator[Tuple[int, Instruction]]:
+        """(index, record) of the rows using one of opcodes, skipping the rest unbuilt"""
+        wanted = {self.ids[opcode] for opcode in opcodes if opcode in self.ids}
+        strings = self.strings
+        string = strings.__getitem__
+        labels, opcode_ids, line_nums, addresses = self.labels, self.opcodes, self.line_nums, self.addresses
+        operand_ends, operand_ids = self.operand_ends, self.operand_ids
+        for row in compress(range(len(self)), map(wanted.__contains__, opcode_ids)):
+            label = labels[row]
+            yield row, Instruction(label=strings[label] if label else None, opcode=strings[opcode_ids[row]],
+                                   operands=list(map(string, operand_ids[operand_ends[row - 1] if row else 0:
+                                                                         operand_ends[row]])),
+                                   line_num=line_nums[row], address=addresses[row])
+
+    def replace(self, replacements: Dict[int, Sequence[Instruction]], end: int,
+                size_of: Callable[[Instruction], int]) -> Tuple['InstructionTable', array]:
+        """Copy with rows replaced by index and laid out again from address 0
+
+        end is the address after the last row. Returns the new table and the
+        new start address of every old row, plus the new end. Runs of rows
+        without replacements are copied column by column, shifting only
+        their addresses, so records are built just for the replacements.
+        """
+        table = InstructionTable(ids=self.ids)
+        starts = array('I')
+        addresses = self.addresses
+        operand_ends = self.operand_ends
+        address = 0
+        row = 0
+
+        for index in sorted(replacements) + [len(self)]:
+            if index > row:
+                shift = address - addresses[row]
+                moved = array('I', map(shift.__add__, addresses[row:index]))
+                table.addresses += moved
+                starts += moved
+                table.labels += self.labels[row:index]
+                table.opcodes += self.opcodes[row:index]
+                table.line_nums += self.line_nums[row:index]
+                first = operand_ends[row - 1] if row else 0
+                offset = len(table.operand_ids) - first
+                table.operand_ids += self.operand_ids[first:operand_ends[index - 1]]
+                table.operand_ends.extend(map(offset.__add__, operand_ends[row:index]))
+                address = (addresses[index] if index < len(self) else end) + shift
+            if index < len(self):
+                starts.append(address)
+                for new in replacements[index]:
+                    new.address = address
+                    address += size_of(new)
+                    table.append(new)
+                row = index + 1
+        starts.append(address)
+        return table, starts
+
+    def __len__(self) -> int:
+        return len(self.opcodes)
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[Instruction, List[Instruction]]:
+        if isinstance(index, slice):
+            return [self._record(row) for row in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("instruction index out of range")
+        return self._record(index)
+
+    def _record(self, row: int) -> Instruction:
+        strings = self.strings
+        start = self.operand_ends[row - 1] if row else 0
+        label = self.labels[row]
+        return Instruction(label=strings[label] if label else None, opcode=strings[self.opcodes[row]],
+                           operands=list(map(strings.__getitem__, self.operand_ids[start:self.operand_ends[row]])),
+                           line_num=self.line_nums[row], address=self.addresses[row])
+
+    def __iter__(self) -> Iterator[Instruction]:
+        strings = self.strings
+        string = strings.__getitem__
+        operand_ids = self.operand_ids
+        start = 0
+        for label, opcode, line_num, address, end in zip(self.labels, self.opcodes, self.line_nums,
+                                                          self.addresses, self.operand_ends):
+            yield Instruction(label=strings[label] if label else None, opcode=strings[opcode],
+                              operands=list(map(string, operand_ids[start:end])),
+                              line_num=line_num, address=address)
+            start = end
+
+
+class RelocationType(Enum):
+    """How a linker patches a word once a symbol address is known"""
+    ABS12 = "abs12"  # J-Type: low 12 bits hold the absolute target
+    REL8 = "rel8"    # B-Type: low 8 bits hold the PC-relative word offset
+    ABS16 = "abs16"  # Extended: the whole second word holds the target
+
+
+@dataclass
+class Relocation:
+    """A word in an object module that depends on a symbol address"""
+    address: int  # Module-relative byte address of the patched word
+    type: RelocationType
+    symbol: str
+
+
+@dataclass
+class ObjectModule:
+    """Relocatable output of one source, laid out from address 0"""
+    name: str
+    code: List[int]
+    symbols: Dict[str, int] = field(default_factory=dict)
+    relocations: List[Relocation] = field(default_factory=list)
+    
+    def to_dict(self) -> dict:
+        return {
+            "version": "1.0",
+            "name": self.name,
+            "code": b''.join(word.to_bytes(2, byteorder='little') for word in self.code).hex(),
+            "symbols": self.symbols,
+            "relocations": [[r.address, r.type.value, r.symbol] for r in self.relocations],
+        }
+    
+    @classmethod
+    def from_dict(cls, data: dict) -> 'ObjectModule':
+        raw = bytes.fromhex(data['code'])
+        return cls(
+            name=data['name'],
+            code=[int.from_bytes(raw[i:i + 2], byteorder='little') for i in range(0, len(raw), 2)],
+            symbols=dict(data['symbols']),
+            relocations=[Relocation(address, RelocationType(kind), symbol)
+                         for address, kind, symbol in data['relocations']],
+        )
+    
+    def save(self, filename: str) -> None:
+        """Write the object module as JSON"""
+        with open(filename, 'w') as f:
+            json.dump(self.to_dict(), f)
+    
+    @classmethod
+    def load(cls, filename: str) -> 'ObjectModule':
+        """Read an object module written by save"""
+        with open(filename, 'r') as f:
+            return cls.from_dict(json.load(f))
+
+
+@dataclass
+class BatchResult:
+    """Programs assembled back to back into one packed code buffer"""
+    code: array = field(default_factory=lambda: array('H'))
+    index: Dict[str, Tuple[int, int]] = field(default_factory=dict)  # name -> (word offset, word count)
+    symbols: Dict[str, Dict[str, int]] = field(default_factory=dict)
+    
+    def program(self, name: str) -> array:
+        """Machine words of one program"""
+        offset, length = self.index[name]
+        return self.code[offset:offset + length]
+    
+    def to_bytes(self) -> bytes:
+        """Whole code buffer as little-endian bytes"""
+        if sys.byteorder == 'big':
+            code = array('H', self.code)
+            code.byteswap()
+            return code.tobytes()
+        return self.code.tobytes()
+
+
+# An encoder turns one parsed instruction into its machine words
+Encoder = Callable[[Instruction], Tuple[int, ...]]
+
+# Receives (byte address, word) pairs from the streaming assembler
+WordSink = Callable[[int, int], None]
+
+# An optimization pass rewrites assembler.instructions and assembler.labels
+# in place between the first and second pass; what it returns (e.g. a
+# report) is ignored
+AssemblerPass = Callable[['CVEREAssembler'], object]
+
+
 class CVEREAssembler:
     """Assembler for CVERE ISA"""
     
@@ -42,6 +333,7 @@ class CVEREAssembler:
         'RET': 0xFB,
         'PUSH': 0xFC,
         'POP': 0xFD,
+        'LJMP': 0xFE,
         'HALT': 0xFF,
     }
     
@@ -51,14 +343,95 @@ class CVEREAssembler:
     M_TYPE = ['LOAD', 'STORE']
     J_TYPE = ['JMP']
     B_TYPE = ['BEQ', 'BNE']
-    EXTENDED = ['CALL', 'RET', 'PUSH', 'POP']
+    EXTENDED = ['CALL', 'RET', 'PUSH', 'POP', 'LJMP']
     SPECIAL = ['NOP', 'HALT']
     
-    def __init__(self):
+    # Fixed encodings for operand-less special instructions
+    SPECIAL_WORDS = {'NOP': 0x0000, 'HALT': 0xFFFF}
+    
+    # Conditional branches and their opposites, used by branch relaxation
+    INVERTED_BRANCHES = {'BEQ': 'BNE', 'BNE': 'BEQ'}
+    
+    # Jumps and their two-word forms with a 16-bit target
+    FAR_JUMPS = {'JMP': 'LJMP'}
+    
+    # Branch that is always taken (R0 reads as zero), for skips no inverse can express
+    ALWAYS_TAKEN = ('BEQ', 'R0')
+    
+    # Register operand roles by ISA operand name, and the exceptions
+    DEFINES = ['Rd']
+    USES = ['Rs', 'Rt', 'Rc']
+    READS_DESTINATION = ['ADDI']   # Rd = Rd + Imm
+    STORES_DESTINATION = ['STORE']  # Rd is the value stored
+    
+    # Data directives: emitted verbatim, never treated as code
+    DIRECTIVES = ['.WORD', '.BYTE', '.FILL', '.INCBIN']
+    LABEL_DIRECTIVES = ['.WORD']  # Directives whose operands may name labels
+    
+    # Bytes in the 16-bit address space; no image may be larger
+    MEMORY_SIZE = 0x10000
+    
+    # Constant pool used by LI when a pool register is configured
+    CONST_POOL_LABEL = '__const_pool'
+    CONST_POOL_SIZE = 16  # M-Type offsets reach 16 words
+    
+    def __init__(self, isa: Optional[ISADesigner] = None, cache: Optional[AssemblyCache] = None,
+                 passes: Optional[List[AssemblerPass]] = None, pool_register: Optional[str] = None,
+                 stats_hook: Optional[StatsHook] = None, compact: bool = False):
         self.labels: Dict[str, int] = {}
-        self.instructions: List[Instruction] = []
+        self.instructions: Union[List[Instruction], InstructionTable] = []
+        # Keep parsed programs in an InstructionTable: much less memory, slower passes
+        self.compact = compact
         self.current_address = 0
+        self.isa = isa if isa is not None else ISADesigner()
+        self.cache = cache
+        self.passes: List[AssemblerPass] = list(passes) if passes else []
+        self.relax = True  # Rewrite out-of-range branches and jumps after the passes
+        self._relaxed: Set[int] = set()  # Addresses of the skip branches written by relax_branches
+        # Register holding the address of __const_pool; None disables the pool
+        self.pool_register = pool_register
+        self._synthesizer: Optional[ImmediateSynthesizer] = None
+        self.fingerprint = ""
+        self.encoders: Dict[str, Encoder] = {}
+        self.sizes: Dict[str, int] = {}
+        # Size in bytes of variable-length directives, from their operands
+        self.sizers: Dict[str, Callable[[Instruction], int]] = {}
+        self.include_dir: Optional[str] = None  # Base for relative .INCBIN paths (default: cwd)
+        # Only read .INCBIN files inside include_dir (none at all without one), for untrusted sources
+        self.confine_includes = False
+        self._incbin_sizes: Dict[str, int] = {}
+        self.formats: Dict[str, InstructionFormat] = {}
+        # Operand index that may name a label, and whether it is PC-relative
+        self.label_operands: Dict[str, Tuple[int, bool]] = {}
+        # Condition registers a branch cannot encode: its word would decode as an extended instruction
+        self.branch_conflicts: Dict[str, FrozenSet[int]] = {}
+        self.profiler: Optional[AssemblerProfiler] = None
+        self.build_encoders()
+        if stats_hook is not None:
+            self.enable_stats(stats_hook)
         
+    def enable_stats(self, hook: Optional[StatsHook] = None, trace_memory: bool = False) -> AssemblerProfiler:
+        """Collect AssemblerStats for every build, passing each to hook
+        
+        Instrumentation wraps methods on this instance only; until this is
+        called (and after disable_stats) assembly runs uninstrumented.
+        """
+        self.disable_stats()
+        self.profiler = AssemblerProfiler(hook, trace_memory)
+        self.profiler.attach(self)
+        return self.profiler
+    
+    def disable_stats(self) -> None:
+        """Remove the instrumentation added by enable_stats"""
+        if self.profiler is not None:
+            self.profiler.detach(self)
+            self.profiler = None
+    
+    @property
+    def stats(self) -> Optional[AssemblerStats]:
+        """Stats of the latest build, None when stats are disabled"""
+        return self.profiler.last if self.profiler is not None else None
+    
     def parse_register(self, reg_str: str) -> int:
         """Parse register string to register number"""
         reg_str = reg_str.strip().upper()
@@ -94,178 +467,1101 @@ class CVEREAssembler:
     
     def tokenize_line(self, line: str) -> Tuple[Optional[str], Optional[str], List[str]]:
         """Tokenize a single line into label, opcode, and operands"""
-        # Remove comments
-        line = re.sub(r';.*$', '', line).strip()
+        label, opcode, operands = next(lex((line,)))
         
-        if not line:
-            return None, None, []
-        
-        # Check for label
-        label = None
-        if ':' in line:
-            label, line = line.split(':', 1)
-            label = label.strip()
-            line = line.strip()
-        
-        if not line:
+        if not opcode:
             return label, None, []
         
-        # Split opcode and operands
-        parts = line.split(None, 1)
-        opcode = parts[0].upper()
-        
-        operands = []
-        if len(parts) > 1:
-            # Split operands by comma
-            operands = [op.strip() for op in parts[1].split(',')]
-        
-        return label, opcode, operands
+        return label, opcode.upper(), split_operands(operands)
+    
+    def lex_lines(self, source: str) -> Iterator[Tuple[Optional[str], Optional[str], str]]:
+        """Lex the whole buffer line by line without copying it into a list"""
+        return lex(io.StringIO(source))
     
     def first_pass(self, source: str) -> None:
         """First pass: collect labels and instructions"""
+        self.collect_lines(self.lex_lines(source))
+    
+    def collect_lines(self, lexed: Iterable[Tuple[Optional[str], Optional[str], str]]) -> None:
+        """Collect labels and instructions from lexed lines"""
         self.labels.clear()
-        self.instructions.clear()
+        self.instructions = InstructionTable() if self.compact else []
         self.current_address = 0
+        self._incbin_sizes.clear()
         
-        for line_num, line in enumerate(source.split('\n'), 1):
-            label, opcode, operands = self.tokenize_line(line)
+        labels = self.labels
+        sizes = self.sizes
+        append = self.instructions.append
+        
+        # Mnemonics, labels and operands repeat throughout a program: keep
+        # one string object per distinct spelling instead of one per use
+        mnemonics: Dict[str, str] = {}
+        strings: Dict[str, str] = {}
+        intern = strings.setdefault
+        
+        for line_num, (label, opcode, operands) in enumerate(lexed, 1):
             
             # Store label
             if label:
-                self.labels[label] = self.current_address
+                label = intern(label, label)
+                labels[label] = self.current_address
             
             # Store instruction
             if opcode:
+                mnemonic = mnemonics.get(opcode)
+                if mnemonic is None:
+                    mnemonic = mnemonics[opcode] = opcode.upper()
+                opcode = mnemonic
                 instr = Instruction(
                     label=label,
                     opcode=opcode,
-                    operands=operands,
+                    operands=[intern(operand, operand) for operand in map(str.strip, operands.split(','))]
+                    if operands else [],
                     line_num=line_num,
                     address=self.current_address
                 )
-                self.instructions.append(instr)
+                append(instr)
                 
-                # Calculate address increment
-                if opcode in self.EXTENDED:
-                    self.current_address += 4  # Two-word instruction
-                elif opcode == 'HALT':
-                    self.current_address += 2
-                else:
-                    self.current_address += 2  # Standard 16-bit instruction
+                # Extended instructions take two words, the rest one;
+                # directives are sized from their operands
+                size = sizes.get(opcode)
+                self.current_address += size if size is not None else self.size_of(instr)
     
-    def encode_r_type(self, instr: Instruction) -> int:
-        """Encode R-Type instruction"""
-        opcode = self.OPCODES[instr.opcode]
+    def build_encoders(self) -> None:
+        """Bind one encoder per mnemonic from the ISA (call again after ISA changes)"""
+        self.encoders.clear()
+        self.sizes.clear()
+        self.sizers.clear()
+        self.formats.clear()
+        self.label_operands.clear()
+        self.branch_conflicts.clear()
+        self._reg = self._register_parser()
+        self._synthesizer = None
+        self.fingerprint = self.isa_fingerprint()
+        
+        builders = {
+            InstructionFormat.R_TYPE: self._r_type_encoder,
+            InstructionFormat.I_TYPE: self._i_type_encoder,
+            InstructionFormat.M_TYPE: self._m_type_encoder,
+            InstructionFormat.J_TYPE: self._j_type_encoder,
+            InstructionFormat.B_TYPE: self._b_type_encoder,
+            InstructionFormat.EXTENDED: self._extended_encoder,
+            InstructionFormat.SPECIAL: self._special_encoder,
+        }
         
-        if instr.opcode == 'NOT':
-            # NOT Rd, Rs (Rt unused, set to 0)
-            rd = self.parse_register(instr.operands[0])
-            rs = self.parse_register(instr.operands[1])
-            rt = 0
+        extended = self.isa.extended_opcodes()
+        for spec in self.isa.instructions.values():
+            if spec.format == InstructionFormat.B_TYPE:
+                self.branch_conflicts[spec.mnemonic.upper()] = frozenset(
+                    rc for rc in range(16) if (spec.opcode << 4 | rc) in extended)
+        
+        for spec in self.isa.instructions.values():
+            mnemonic = spec.mnemonic.upper()
+            self.encoders[mnemonic] = builders[spec.format](spec)
+            self.sizes[mnemonic] = 4 if spec.format == InstructionFormat.EXTENDED else 2
+            self.formats[mnemonic] = spec.format
+            if spec.format == InstructionFormat.J_TYPE:
+                self.label_operands[mnemonic] = (0, False)
+            elif spec.format == InstructionFormat.B_TYPE:
+                self.label_operands[mnemonic] = (1, True)
+            elif spec.format == InstructionFormat.EXTENDED and spec.operands == ['Addr16']:
+                self.label_operands[mnemonic] = (0, False)
+        
+        self.encoders['.WORD'] = self._word_encoder()
+        self.encoders['.BYTE'] = self._byte_encoder()
+        self.encoders['.FILL'] = self._fill_encoder()
+        self.encoders['.INCBIN'] = self._incbin_encoder()
+        self.sizers['.WORD'] = self._word_size
+        self.sizers['.BYTE'] = self._byte_size
+        self.sizers['.FILL'] = self._fill_size
+        self.sizers['.INCBIN'] = self._incbin_size
+    
+    @property
+    def synthesizer(self) -> ImmediateSynthesizer:
+        """Immediate synthesizer for the current ISA, built on first use"""
+        if self._synthesizer is None:
+            self._synthesizer = ImmediateSynthesizer(self.isa)
+        return self._synthesizer
+    
+    def _register_parser(self) -> Callable[[str], int]:
+        """parse_register memoized on the operand text shared by all encoders"""
+        cache: Dict[str, int] = {}
+        parse = self.parse_register
+        
+        def reg(text: str) -> int:
+            try:
+                return cache[text]
+            except KeyError:
+                number = cache[text] = parse(text)
+                return number
+        
+        return reg
+    
+    def _r_type_encoder(self, spec: InstructionSpec) -> Encoder:
+        """R-Type: [Op:4][Rd:4][Rs:4][Rt:4]"""
+        base = spec.opcode << 12
+        reg = self._reg
+        
+        if len(spec.operands) < 3:
+            # Two-operand form (NOT Rd, Rs): Rt unused, set to 0
+            def encode(instr: Instruction) -> Tuple[int, ...]:
+                ops = instr.operands
+                return (base | (reg(ops[0]) << 8) | (reg(ops[1]) << 4),)
         else:
-            # Standard: OP Rd, Rs, Rt
-            rd = self.parse_register(instr.operands[0])
-            rs = self.parse_register(instr.operands[1])
-            rt = self.parse_register(instr.operands[2])
-        
-        return (opcode << 12) | (rd << 8) | (rs << 4) | rt
-    
-    def encode_i_type(self, instr: Instruction) -> int:
-        """Encode I-Type instruction"""
-        opcode = self.OPCODES[instr.opcode]
-        rd = self.parse_register(instr.operands[0])
-        imm = self.parse_immediate(instr.operands[1]) & 0xFF  # 8-bit immediate
-        
-        return (opcode << 12) | (rd << 8) | imm
-    
-    def encode_m_type(self, instr: Instruction) -> int:
-        """Encode M-Type instruction"""
-        opcode = self.OPCODES[instr.opcode]
-        rd = self.parse_register(instr.operands[0])
-        rs = self.parse_register(instr.operands[1])
-        offset = self.parse_immediate(instr.operands[2]) & 0xF  # 4-bit offset
-        
-        return (opcode << 12) | (rd << 8) | (rs << 4) | offset
-    
-    def encode_j_type(self, instr: Instruction) -> int:
-        """Encode J-Type instruction"""
-        opcode = self.OPCODES[instr.opcode]
-        
-        # Handle label or immediate address
-        target = instr.operands[0]
-        if target in self.labels:
-            addr = self.labels[target]
+            def encode(instr: Instruction) -> Tuple[int, ...]:
+                ops = instr.operands
+                return (base | (reg(ops[0]) << 8) | (reg(ops[1]) << 4) | reg(ops[2]),)
+        
+        return encode
+    
+    def _i_type_encoder(self, spec: InstructionSpec) -> Encoder:
+        """I-Type: [Op:4][Rd:4][Imm:8]"""
+        base = spec.opcode << 12
+        reg = self._reg
+        imm = self.parse_immediate
+        
+        def encode(instr: Instruction) -> Tuple[int, ...]:
+            ops = instr.operands
+            return (base | (reg(ops[0]) << 8) | (imm(ops[1]) & 0xFF),)  # 8-bit immediate
+        
+        return encode
+    
+    def _m_type_encoder(self, spec: InstructionSpec) -> Encoder:
+        """M-Type: [Op:4][Rd:4][Rs:4][Off:4]"""
+        base = spec.opcode << 12
+        reg = self._reg
+        imm = self.parse_immediate
+        
+        def encode(instr: Instruction) -> Tuple[int, ...]:
+            ops = instr.operands
+            return (base | (reg(ops[0]) << 8) | (reg(ops[1]) << 4) | (imm(ops[2]) & 0xF),)  # 4-bit offset
+        
+        return encode
+    
+    def _j_type_encoder(self, spec: InstructionSpec) -> Encoder:
+        """J-Type: [Op:4][Addr:12], target is a label or immediate address"""
+        base = spec.opcode << 12
+        labels = self.labels
+        imm = self.parse_immediate
+        
+        def encode(instr: Instruction) -> Tuple[int, ...]:
+            target = instr.operands[0]
+            addr = labels[target] if target in labels else imm(target)
+            if addr < 0 or addr > 0xFFF:
+                raise ValueError(f"Jump to {target} out of range: 0x{addr & 0xFFFF:04X} needs a far jump")
+            return (base | addr,)  # 12-bit address
+        
+        return encode
+    
+    def _b_type_encoder(self, spec: InstructionSpec) -> Encoder:
+        """B-Type: [Op:4][Rc:4][Offset:8], label offsets are PC-relative words
+        
+        Condition registers whose word would decode as an extended
+        instruction (BNE on R10-R14) are rejected.
+        """
+        base = spec.opcode << 12
+        labels = self.labels
+        reg = self._reg
+        imm = self.parse_immediate
+        conflicts = self.branch_conflicts.get(spec.mnemonic.upper(), frozenset())
+        
+        def encode(instr: Instruction) -> Tuple[int, ...]:
+            ops = instr.operands
+            target = ops[1]
+            if target in labels:
+                offset = (labels[target] - (instr.address + 2)) // 2
+                if offset < -128 or offset > 127:
+                    raise ValueError(f"Branch to {target} out of range: {offset} words")
+            else:
+                offset = imm(target)
+            rc = reg(ops[0])
+            if rc in conflicts:
+                raise ValueError(f"{instr.opcode} cannot test {ops[0]}: the word would decode as "
+                                 f"extended opcode 0x{spec.opcode << 4 | rc:02X}")
+            return (base | (rc << 8) | (offset & 0xFF),)  # 8-bit signed offset
+        
+        return encode
+    
+    def _extended_encoder(self, spec: InstructionSpec) -> Encoder:
+        """Extended: [0xF:4][Ext:4][0:8] followed by a second word"""
+        first = spec.opcode << 8
+        
+        if spec.operands != ['Addr16']:
+            words = (first, 0x0000)  # Second word is a placeholder for now
+            
+            def encode(instr: Instruction) -> Tuple[int, ...]:
+                return words
+            
+            return encode
+        
+        # Second word holds the full 16-bit target (label or immediate)
+        labels = self.labels
+        imm = self.parse_immediate
+        
+        def encode(instr: Instruction) -> Tuple[int, ...]:
+            if not instr.operands:
+                return (first, 0x0000)
+            target = instr.operands[0]
+            addr = labels[target] if target in labels else imm(target)
+            if addr < 0 or addr > 0xFFFF:
+                raise ValueError(f"{instr.opcode} target {target} outside the 16-bit address space: {addr}")
+            return (first, addr)
+        
+        return encode
+    
+    def _special_encoder(self, spec: InstructionSpec) -> Encoder:
+        """Special: a single fixed word"""
+        if spec.mnemonic in self.SPECIAL_WORDS:
+            words = (self.SPECIAL_WORDS[spec.mnemonic],)
         else:
-            addr = self.parse_immediate(target)
+            words = ((spec.opcode << 12) & 0xFFFF,)
+        
+        def encode(instr: Instruction) -> Tuple[int, ...]:
+            return words
+        
+        return encode
+    
+    def _word_encoder(self) -> Encoder:
+        """.WORD v, ...: 16-bit data words, each a label or immediate"""
+        labels = self.labels
+        imm = self.parse_immediate
+        
+        def value(operand: str) -> int:
+            if operand in labels:
+                return labels[operand] & 0xFFFF
+            number = imm(operand)
+            if number < -0x8000 or number > 0xFFFF:
+                raise ValueError(f".WORD value out of 16-bit range: {operand}")
+            return number & 0xFFFF
+        
+        def encode(instr: Instruction) -> Tuple[int, ...]:
+            return tuple(value(operand) for operand in instr.operands)
+        
+        return encode
+    
+    def _byte_encoder(self) -> Encoder:
+        """.BYTE b, ...: bytes packed little-endian, padded with 0 to a word"""
+        imm = self.parse_immediate
+        
+        def encode(instr: Instruction) -> array:
+            data = bytearray()
+            for operand in instr.operands:
+                number = imm(operand)
+                if number < -0x80 or number > 0xFF:
+                    raise ValueError(f".BYTE value out of 8-bit range: {operand}")
+                data.append(number & 0xFF)
+            if len(data) % 2:
+                data.append(0)
+            words = array('H')
+            words.frombytes(data)
+            if sys.byteorder == 'big':
+                words.byteswap()
+            return words
+        
+        return encode
+    
+    def _fill_encoder(self) -> Encoder:
+        """.FILL count[, value]: count copies of a 16-bit word (default 0)"""
+        imm = self.parse_immediate
         
-        addr &= 0xFFF  # 12-bit address
-        return (opcode << 12) | addr
+        def encode(instr: Instruction) -> array:
+            value = imm(instr.operands[1]) if len(instr.operands) > 1 else 0
+            if value < -0x8000 or value > 0xFFFF:
+                raise ValueError(f".FILL value out of 16-bit range: {instr.operands[1]}")
+            return array('H', [value & 0xFFFF]) * (self._fill_size(instr) // 2)
+        
+        return encode
+    
+    def _incbin_encoder(self) -> Encoder:
+        """.INCBIN path: a file's bytes, memory-mapped and copied in bulk"""
+        def encode(instr: Instruction) -> array:
+            path = self._incbin_path(instr)
+            expected = self._incbin_size(instr)
+            words = array('H')
+            with open(path, 'rb') as f:
+                size = os.fstat(f.fileno()).st_size
+                if (size + 1) // 2 * 2 != expected:
+                    raise ValueError(f".INCBIN file changed size during assembly: {path}")
+                if size:
+                    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped, \
+                            memoryview(mapped) as view:
+                        words.frombytes(view[:size - size % 2])
+                        if size % 2:
+                            words.append(view[size - 1])  # Odd length: pad the high byte with 0
+            if sys.byteorder == 'big':
+                words.byteswap()
+            return words
+        
+        return encode
+    
+    def size_of(self, instr: Instruction) -> int:
+        """Size in bytes of a parsed instruction or directive"""
+        size = self.sizes.get(instr.opcode)
+        if size is not None:
+            return size
+        sizer = self.sizers.get(instr.opcode)
+        if sizer is None:
+            return 2  # Unknown opcode, reported when it is encoded
+        try:
+            return sizer(instr)
+        except (ValueError, OSError) as e:
+            raise ValueError(f"Line {instr.line_num}: {e}") from e
+    
+    def _word_size(self, instr: Instruction) -> int:
+        if not instr.operands:
+            raise ValueError(".WORD needs at least one value")
+        return 2 * len(instr.operands)
+    
+    def _byte_size(self, instr: Instruction) -> int:
+        if not instr.operands:
+            raise ValueError(".BYTE needs at least one value")
+        return (len(instr.operands) + 1) // 2 * 2
+    
+    def _fill_size(self, instr: Instruction) -> int:
+        if not 1 <= len(instr.operands) <= 2:
+            raise ValueError(".FILL takes a count and an optional value")
+        count = self.parse_immediate(instr.operands[0])
+        if count < 0 or count > 0x8000:
+            raise ValueError(f".FILL count out of range: {instr.operands[0]}")
+        return 2 * count
+    
+    def _incbin_path(self, instr: Instruction) -> str:
+        if len(instr.operands) != 1:
+            raise ValueError(".INCBIN takes one file path")
+        path = instr.operands[0].strip('"\'')
+        if self.include_dir is not None:
+            path = os.path.join(self.include_dir, path)
+        if self.confine_includes:
+            if self.include_dir is None:
+                raise ValueError(".INCBIN is disabled: no include directory is configured")
+            root = os.path.realpath(self.include_dir)
+            path = os.path.realpath(path)  # Resolves symlinks and .. before the check
+            if os.path.commonpath([root, path]) != root:
+                raise ValueError(f".INCBIN path outside the include directory: {instr.operands[0]}")
+        return path
     
-    def encode_b_type(self, instr: Instruction) -> int:
-        """Encode B-Type instruction"""
-        opcode = self.OPCODES[instr.opcode]
-        rc = self.parse_register(instr.operands[0])
+    def _incbin_size(self, instr: Instruction) -> int:
+        """File size rounded up to whole words, fixed for the rest of the assembly"""
+        path = self._incbin_path(instr)
+        size = self._incbin_sizes.get(path)
+        if size is None:
+            size = self._incbin_sizes[path] = (os.path.getsize(path) + 1) // 2 * 2
+        return size
+    
+    def encode_instruction(self, instr: Instruction) -> Tuple[int, ...]:
+        """Encode one parsed instruction to its machine words"""
+        encode = self.encoders.get(instr.opcode)
+        if encode is None:
+            raise ValueError(f"Unknown opcode: {instr.opcode}")
+        return encode(instr)
+    
+    def run_passes(self) -> None:
+        """Expand LI, run the configured passes, then settle the final layout"""
+        self._relaxed.clear()
+        
+        # LI expansion and passes track instructions by identity and edit
+        # them in place, which a compact table cannot support; relaxation
+        # only replaces instructions and keeps the table
+        instructions = self.instructions
+        if isinstance(instructions, InstructionTable) and (self.passes or instructions.contains_opcode('LI')):
+            self.instructions = list(instructions)
+        
+        self.expand_load_immediates()
+        for assembler_pass in self.passes:
+            assembler_pass(self)
+        
+        # Label addresses and branch ranges depend on each other; both only
+        # grow code, so alternate until neither changes anything
+        sites = [[instr, [instr], None] for _, instr in self._rows(['LI']) if instr.opcode == 'LI']
+        while True:
+            changed = self.load_label_addresses(sites)
+            if self.relax:
+                changed += self.relax_branches()
+            if not changed:
+                break
+        self.check_fits(self.current_address)
+    
+    def check_fits(self, end: int) -> None:
+        """Raise ValueError when an image ending at byte address end exceeds memory"""
+        if end > self.MEMORY_SIZE:
+            raise ValueError(f"Program does not fit in memory: {end} bytes, "
+                             f"the address space holds {self.MEMORY_SIZE}")
+    
+    def rewrite_instructions(self, replacements: Dict[int, Sequence[Instruction]]) -> None:
+        """Replace instructions by index and lay the program out again
+        
+        Each entry maps an index in self.instructions to the instructions
+        that take its place (empty to delete it). Labels stay bound to the
+        instruction they named: a label on a replaced instruction moves to
+        the first replacement, or to the next surviving instruction.
+        """
+        sizes = self.sizes
+        size_of = self.size_of
+        relaxed = self._relaxed
+        moved: Set[int] = set()
         
-        # Calculate offset
-        target = instr.operands[1]
-        if target in self.labels:
-            offset = (self.labels[target] - (instr.address + 2)) // 2
+        if isinstance(self.instructions, InstructionTable):
+            old_addresses = self.instructions.addresses
+            instructions, starts = self.instructions.replace(replacements, self.current_address, size_of)
+            for skip in relaxed:
+                index = bisect_left(old_addresses, skip)
+                if index < len(old_addresses) and old_addresses[index] == skip and index not in replacements:
+                    moved.add(starts[index])
         else:
-            offset = self.parse_immediate(target)
+            old_addresses = [instr.address for instr in self.instructions]
+            starts = array('I')  # New address where each old instruction's slot begins
+            instructions = []
+            address = 0
+            
+            for index, instr in enumerate(self.instructions):
+                starts.append(address)
+                replaced = replacements.get(index)
+                if replaced is None:
+                    if instr.address in relaxed:
+                        moved.add(address)  # A relaxed skip that stays keeps its mark
+                    replaced = (instr,)
+                for new in replaced:
+                    new.address = address
+                    size = sizes.get(new.opcode)
+                    address += size if size is not None else size_of(new)
+                    instructions.append(new)
+            starts.append(address)
+        
+        labels = self.labels
+        for label, label_address in labels.items():
+            labels[label] = starts[bisect_left(old_addresses, label_address)]
+        
+        relaxed.clear()
+        relaxed.update(moved)
+        if isinstance(instructions, InstructionTable):
+            self.instructions = instructions
+        else:
+            self.instructions[:] = instructions
+        self.current_address = starts[-1]
+    
+    def register_roles(self, instr: Instruction) -> Tuple[List[int], List[int]]:
+        """Operand indexes an instruction reads and writes as registers"""
+        if instr.opcode == 'LI':
+            return [], [0]
+        spec = self.isa.get_instruction(instr.opcode)
+        if spec is None:
+            return [], []
+        
+        uses: List[int] = []
+        defs: List[int] = []
+        for index, name in enumerate(spec.operands[:len(instr.operands)]):
+            if name in self.DEFINES:
+                if instr.opcode in self.STORES_DESTINATION:
+                    uses.append(index)
+                    continue
+                if instr.opcode in self.READS_DESTINATION:
+                    uses.append(index)
+                defs.append(index)
+            elif name in self.USES:
+                uses.append(index)
+        return uses, defs
+    
+    def literal_target(self) -> Optional[Instruction]:
+        """First control-flow instruction whose target is a number, not a label
+        
+        Passes that move code cannot fix up such targets and must leave the
+        program alone. The skips written by relax_branches move with the
+        jump they skip and do not count, and neither do names that are not
+        defined here: those are external symbols in an object module (or an
+        error the encoder reports).
+        """
+        label_operands = self.label_operands
+        labels = self.labels
+        relaxed = self._relaxed
+        for _, instr in self._rows(self.label_operands):
+            entry = label_operands.get(instr.opcode)
+            if entry is not None and entry[0] < len(instr.operands):
+                target = instr.operands[entry[0]]
+                if target not in labels and instr.address not in relaxed and self._is_immediate(target):
+                    return instr
+        return None
+    
+    def _rows(self, opcodes: Iterable[str]) -> Iterable[Tuple[int, Instruction]]:
+        """(index, instruction) pairs, including at least all using one of opcodes
+        
+        A compact table only builds the matching records; callers still
+        check the opcode, since a list yields every instruction.
+        """
+        if isinstance(self.instructions, InstructionTable):
+            return self.instructions.select(opcodes)
+        return enumerate(self.instructions)
+    
+    def expand_load_immediates(self) -> int:
+        """Expand every LI Rd, imm16 pseudo-instruction; returns how many
+        
+        Each constant becomes the cheapest sequence by ISA cycles. With a
+        pool register configured, the constants that save the most cycles
+        are instead placed in a pool after the code (label __const_pool)
+        and read with LOAD Rd, pool_register, slot. LI of a label is left
+        for load_label_addresses, once the passes have fixed the layout.
+        """
+        instructions = self.instructions
+        sites = [index for index, instr in self._rows(['LI']) if instr.opcode == 'LI']
+        if not sites:
+            return 0
+        
+        synthesizer = self.synthesizer
+        constants: Dict[int, int] = {}
+        symbolic: List[int] = []
+        for index in sites:
+            instr = instructions[index]
+            if len(instr.operands) != 2:
+                raise ValueError(f"Line {instr.line_num}: LI takes a register and a constant")
+            value = instr.operands[1]
+            if self._is_immediate(value):
+                number = self.parse_immediate(value)
+                if number < -0x8000 or number > 0xFFFF:
+                    raise ValueError(f"Line {instr.line_num}: LI constant out of 16-bit range: {value}")
+                constants[index] = number & 0xFFFF
+            elif value in self.labels or (value == self.CONST_POOL_LABEL and self.pool_register):
+                symbolic.append(index)
+            else:
+                raise ValueError(f"Line {instr.line_num}: Undefined label: {value}")
+        
+        # Pool the constants with the largest total saving
+        pool: Dict[int, int] = {}
+        load = self.isa.get_instruction('LOAD')
+        if self.pool_register is not None:
+            self.labels[self.CONST_POOL_LABEL] = self.current_address
+        if self.pool_register is not None and load is not None:
+            savings: Dict[int, int] = {}
+            for number in constants.values():
+                saving = synthesizer.cost(number) - load.cycles
+                if saving > 0:
+                    savings[number] = savings.get(number, 0) + saving
+            best = sorted(savings, key=lambda number: -savings[number])[:self.CONST_POOL_SIZE]
+            pool = {number: slot for slot, number in enumerate(best)}
+            
+            # The pool goes after the code
+            for number in pool:
+                instructions.append(Instruction(label=None, opcode='.WORD', operands=[f'0x{number:04X}'],
+                                                line_num=0, address=self.current_address))
+                self.current_address += 2
+        
+        replacements: Dict[int, Sequence[Instruction]] = {}
+        for index, number in constants.items():
+            instr = instructions[index]
+            if number in pool:
+                replacements[index] = (Instruction(label=instr.label, opcode='LOAD',
+                                                   operands=[instr.operands[0], self.pool_register,
+                                                             str(pool[number])],
+                                                   line_num=instr.line_num),)
+            else:
+                replacements[index] = self._load_sequence(instr, synthesizer.sequence(number), 1)
+        
+        if pool or any(len(words) != 1 for words in replacements.values()) or symbolic:
+            literal = self.literal_target()
+            if literal is not None:
+                raise ValueError(f"Line {literal.line_num}: {literal.opcode} with a numeric target "
+                                 f"cannot be combined with LI, which moves code")
+        
+        if replacements:
+            self.rewrite_instructions(replacements)
+        
+        return len(sites)
+    
+    def load_label_addresses(self, sites: List[list]) -> int:
+        """Expand LI Rd, label once; returns how many sequences changed
+        
+        sites holds [LI instruction, current sequence, loaded address] per
+        LI of a label. Sequences never shrink (they are padded with NOP),
+        so repeating this with branch relaxation until nothing changes
+        reaches a stable layout.
+        """
+        replacements: Dict[int, Sequence[Instruction]] = {}
+        position = None
+        for site in sites:
+            origin, group, loaded = site
+            value = self.labels[origin.operands[1]]
+            if value == loaded:
+                continue
+            if position is None:
+                position = {id(instr): index for index, instr in enumerate(self.instructions)}
+            index = position[id(group[0])]
+            new = self._load_sequence(origin, self.synthesizer.sequence(value), len(group))
+            replacements[index] = new
+            for offset in range(1, len(group)):
+                replacements[index + offset] = ()
+            site[1], site[2] = new, value
         
-        offset &= 0xFF  # 8-bit signed offset
-        return (opcode << 12) | (rc << 8) | offset
+        if replacements:
+            self.rewrite_instructions(replacements)
+        return len(replacements)
+    
+    def _load_sequence(self, instr: Instruction, steps: List[Step], reserve: int) -> Tuple[Instruction, ...]:
+        """Instructions for synthesized steps, padded with NOP to reserve words"""
+        rd = instr.operands[0]
+        sequence = [Instruction(label=None, opcode=mnemonic, operands=[op.format(rd=rd) for op in operands],
+                                line_num=instr.line_num)
+                    for mnemonic, operands in steps]
+        sequence += [Instruction(label=None, opcode='NOP', operands=[], line_num=instr.line_num)
+                     for _ in range(reserve - len(sequence))]
+        sequence[0].label = instr.label
+        return tuple(sequence)
+    
+    def relax_branches(self) -> int:
+        """Rewrite out-of-range branches and jumps in their long forms
+        
+        BEQ Rc, far becomes BNE Rc, 1 followed by JMP far, and a JMP to a
+        label beyond its 12-bit reach becomes the two-word far jump (the
+        skip in front of a relaxed branch's jump then grows to 2). Where
+        the inverse cannot encode Rc (BNE on R10-R14 would read as an
+        extended opcode) the branch keeps its sense and hops over an
+        always-taken skip instead: BEQ Rc, 1; BEQ R0, 1; JMP far. Every
+        instruction starts short and only grows when it does not fit;
+        growing one can push others out of range, so this repeats until
+        the layout is stable. Returns the number of instructions rewritten.
+        """
+        jump = next((mnemonic for mnemonic, fmt in self.formats.items()
+                     if fmt == InstructionFormat.J_TYPE), None)
+        far_jump = self.FAR_JUMPS.get(jump)
+        if far_jump not in self.encoders:
+            far_jump = None
+        
+        # Moving code would break numeric targets; leave the errors to the encoders
+        if jump is None or self.literal_target() is not None:
+            return 0
+        
+        labels = self.labels
+        sizes = self.sizes
+        skips = self._relaxed
+        relaxed = 0
+        
+        while True:
+            replacements: Dict[int, Sequence[Instruction]] = {}
+            created: List[Instruction] = []  # Skips, marked once rewriting gives them addresses
+            for index, instr in self._rows(self.label_operands):
+                entry = self.label_operands.get(instr.opcode)
+                if entry is None or entry[0] >= len(instr.operands):
+                    continue
+                target_index, relative = entry
+                target = instr.operands[target_index]
+                if target not in labels:
+                    continue
+                
+                if relative:
+                    if -128 <= (labels[target] - (instr.address + 2)) // 2 <= 127:
+                        continue
+                    inverse = self.INVERTED_BRANCHES.get(instr.opcode)
+                    if inverse is None or inverse not in self.encoders:
+                        continue  # No inverse: the encoder reports the range error
+                    long_jump = far_jump if far_jump is not None and labels[target] > 0xFFF else jump
+                    far = Instruction(label=None, opcode=long_jump, operands=[target], line_num=instr.line_num)
+                    operands = list(instr.operands)
+                    if self._condition(operands[0]) in self.branch_conflicts.get(inverse, ()):
+                        # The inverse cannot name this register: branch over an always-taken skip
+                        operands[target_index] = '1'
+                        taken = Instruction(label=instr.label, opcode=instr.opcode, operands=operands,
+                                            line_num=instr.line_num)
+                        always, zero = self.ALWAYS_TAKEN
+                        operands = list(operands)
+                        operands[0] = zero
+                        operands[target_index] = str(sizes[long_jump] // 2)
+                        skip = Instruction(label=None, opcode=always, operands=operands, line_num=instr.line_num)
+                        created += (taken, skip)
+                        replacements[index] = (taken, skip, far)
+                        continue
+                    operands[target_index] = str(sizes[long_jump] // 2)  # Skip the jump that follows
+                    skip = Instruction(label=instr.label, opcode=inverse, operands=operands,
+                                       line_num=instr.line_num)
+                    created.append(skip)
+                    replacements[index] = (skip, far)
+                elif instr.opcode == jump and far_jump is not None and labels[target] > 0xFFF:
+                    replacements[index] = (Instruction(label=instr.label, opcode=far_jump, operands=[target],
+                                                       line_num=instr.line_num),)
+                    previous = self.instructions[index - 1] if index else None
+                    if previous is not None and previous.address in skips and previous.opcode in self.label_operands:
+                        operands = list(previous.operands)
+                        operands[self.label_operands[previous.opcode][0]] = str(sizes[far_jump] // 2)
+                        skip = Instruction(label=previous.label, opcode=previous.opcode, operands=operands,
+                                           line_num=previous.line_num)
+                        created.append(skip)
+                        replacements[index - 1] = (skip,)
+            
+            if not replacements:
+                return relaxed
+            self.rewrite_instructions(replacements)
+            skips.update(skip.address for skip in created)
+            relaxed += len(replacements)
+    
+    def _condition(self, text: str) -> Optional[int]:
+        """Register number of a branch condition, or None for the encoder to reject"""
+        try:
+            return self._reg(text)
+        except ValueError:
+            return None
     
     def second_pass(self) -> List[int]:
         """Second pass: encode instructions to machine code"""
         machine_code = []
+        encoders = self.encoders
         
         for instr in self.instructions:
-            if instr.opcode in self.R_TYPE:
-                code = self.encode_r_type(instr)
-            elif instr.opcode in self.I_TYPE:
-                code = self.encode_i_type(instr)
-            elif instr.opcode in self.M_TYPE:
-                code = self.encode_m_type(instr)
-            elif instr.opcode in self.J_TYPE:
-                code = self.encode_j_type(instr)
-            elif instr.opcode in self.B_TYPE:
-                code = self.encode_b_type(instr)
-            elif instr.opcode == 'NOP':
-                code = 0x0000
-            elif instr.opcode == 'HALT':
-                code = 0xFFFF
-            elif instr.opcode in self.EXTENDED:
-                # Extended instructions (placeholder for now)
-                code = self.OPCODES[instr.opcode] << 8
-                machine_code.append(code)
-                machine_code.append(0x0000)  # Second word
-                continue
-            else:
+            encode = encoders.get(instr.opcode)
+            if encode is None:
                 raise ValueError(f"Unknown opcode: {instr.opcode}")
-            
-            machine_code.append(code)
+            machine_code += encode(instr)
+        
+        return machine_code
+    
+    def second_pass_words(self, into: Optional[array] = None) -> array:
+        """Second pass into a compact array('H') of machine words
+        
+        Appends to into when given, so several programs can share a buffer.
+        """
+        machine_code = array('H') if into is None else into
+        extend = machine_code.extend
+        encoders = self.encoders
+        
+        for instr in self.instructions:
+            encode = encoders.get(instr.opcode)
+            if encode is None:
+                raise ValueError(f"Unknown opcode: {instr.opcode}")
+            extend(encode(instr))
         
         return machine_code
     
     def assemble(self, source: str) -> List[int]:
         """Assemble source code to machine code"""
         self.first_pass(source)
+        self.run_passes()
         return self.second_pass()
     
+    def assemble_object(self, source: str, name: str = "") -> ObjectModule:
+        """Assemble source to a relocatable object module
+        
+        Every label target gets a relocation entry except PC-relative
+        branches to labels of the same module; so does every label in a
+        .WORD list. Symbols not defined in the module are left for the
+        linker to resolve and range-check: their fields are encoded as 0.
+        """
+        self.first_pass(source)
+        self.run_passes()
+        symbols = self.labels
+        encoders = self.encoders
+        relocations = []
+        code: List[int] = []
+        
+        for instr in self.instructions:
+            encode = encoders.get(instr.opcode)
+            if encode is None:
+                raise ValueError(f"Unknown opcode: {instr.opcode}")
+            
+            if instr.opcode in self.LABEL_DIRECTIVES:
+                operands = list(instr.operands)
+                for offset, target in enumerate(operands):
+                    if target not in symbols:
+                        if self._is_immediate(target):
+                            continue
+                        operands[offset] = '0'  # Patched by the linker
+                    relocations.append(Relocation(instr.address + offset * 2, RelocationType.ABS16, target))
+                if operands != instr.operands:
+                    instr = Instruction(label=instr.label, opcode=instr.opcode, operands=operands,
+                                        line_num=instr.line_num, address=instr.address)
+                code += encode(instr)
+                continue
+            
+            entry = self.label_operands.get(instr.opcode)
+            if entry is not None and entry[0] < len(instr.operands):
+                index, relative = entry
+                target = instr.operands[index]
+                if target in symbols:
+                    if not relative:
+                        relocations.append(self._relocation(instr, target))
+                elif not self._is_immediate(target):
+                    relocations.append(self._relocation(instr, target))
+                    operands = list(instr.operands)
+                    operands[index] = '0'  # Patched by the linker
+                    instr = Instruction(label=instr.label, opcode=instr.opcode, operands=operands,
+                                        line_num=instr.line_num, address=instr.address)
+            code += encode(instr)
+        
+        return ObjectModule(name=name, code=code, symbols=dict(symbols), relocations=relocations)
+    
+    def _relocation(self, instr: Instruction, target: str) -> Relocation:
+        """Relocation for the label operand of a jump, branch or extended instruction"""
+        fmt = self.formats[instr.opcode]
+        if fmt == InstructionFormat.J_TYPE:
+            return Relocation(instr.address, RelocationType.ABS12, target)
+        if fmt == InstructionFormat.B_TYPE:
+            return Relocation(instr.address, RelocationType.REL8, target)
+        return Relocation(instr.address + 2, RelocationType.ABS16, target)
+    
+    def isa_fingerprint(self) -> str:
+        """Hash of the opcode tables and ISA specs that determine the encoding"""
+        tables = {
+            "opcodes": self.OPCODES,
+            "formats": [self.R_TYPE, self.I_TYPE, self.M_TYPE, self.J_TYPE,
+                        self.B_TYPE, self.EXTENDED, self.SPECIAL],
+            "special_words": self.SPECIAL_WORDS,
+            "isa": [spec.to_dict() for spec in self.isa.instructions.values()],
+        }
+        return hashlib.sha256(json.dumps(tables, sort_keys=True).encode('utf-8')).hexdigest()
+    
+    def pass_fingerprint(self) -> str:
+        """ISA fingerprint extended with the configured passes
+        
+        Passes may define a fingerprint attribute covering their settings;
+        otherwise their qualified name is used.
+        """
+        names = [getattr(assembler_pass, 'fingerprint', None) or
+                 getattr(assembler_pass, '__qualname__', type(assembler_pass).__qualname__)
+                 for assembler_pass in self.passes]
+        if self.pool_register is not None:
+            names.append(f'pool:{self.pool_register}')
+        if self.relax:
+            names.append('relax')
+        return '|'.join([self.fingerprint] + names)
+    
+    def assemble_words(self, source: str) -> array:
+        """Assemble source code to a compact array('H') of machine words
+        
+        Goes through the cache when one is configured. A hit restores labels
+        without running either pass; instructions stay empty because the
+        cache does not store them. Sources using .INCBIN bypass the cache,
+        since the key only covers the source text.
+        """
+        if self.cache is None or INCBIN_PATTERN.search(source):
+            self.first_pass(source)
+            self.run_passes()
+            return self.second_pass_words()
+        
+        key = self.cache.key(source, self.pass_fingerprint())
+        entry = self.cache.get(key)
+        if entry is not None:
+            machine_code, labels = entry
+            # Update in place: bound encoders hold a reference to this dict
+            self.labels.clear()
+            self.labels.update(labels)
+            self.instructions.clear()
+            return machine_code
+        
+        self.first_pass(source)
+        self.run_passes()
+        machine_code = self.second_pass_words()
+        self.cache.put(key, machine_code, self.labels)
+        return machine_code
+    
+    def assemble_batch(self, sources: Union[Dict[str, str], Iterable[Tuple[str, str]]]) -> BatchResult:
+        """Assemble many named programs into one packed buffer
+        
+        Every program starts at address 0 and keeps its own symbol table.
+        The assembler's tables are built once and reused for the whole
+        batch; errors are reported with the program name.
+        """
+        result = BatchResult()
+        code = result.code
+        items = sources.items() if isinstance(sources, dict) else sources
+        
+        for name, source in items:
+            if name in result.index:
+                raise ValueError(f"Duplicate program name: {name}")
+            
+            offset = len(code)
+            try:
+                if self.cache is None:
+                    self.first_pass(source)
+                    self.run_passes()
+                    self.second_pass_words(into=code)
+                else:
+                    code.extend(self.assemble_words(source))
+            except ValueError as e:
+                del code[offset:]
+                raise ValueError(f"{name}: {e}") from e
+            
+            result.index[name] = (offset, len(code) - offset)
+            result.symbols[name] = dict(self.labels)
+        
+        return result
+    
+    def assemble_bytes(self, source: str) -> array:
+        """Assemble to words laid out little-endian, ready for a bulk write"""
+        machine_code = self.assemble_words(source)
+        if sys.byteorder == 'big':
+            machine_code.byteswap()
+        return machine_code
+    
+    def assemble_into(self, source: str, buffer: Union[bytearray, memoryview],
+                      offset: int = 0) -> int:
+        """Assemble straight into a writable buffer at a byte offset
+        
+        Accepts anything supporting the writable buffer protocol (bytearray,
+        mmap, shared memory). Returns the number of bytes written.
+        """
+        machine_code = self.assemble_bytes(source)
+        size = len(machine_code) * 2
+        
+        # Every view is released on the way out, error or not, so the
+        # caller's buffer can be resized again
+        with memoryview(buffer) as raw, raw.cast('B') as view, \
+                memoryview(machine_code) as words, words.cast('B') as data:
+            if offset < 0 or offset + size > len(view):
+                raise ValueError(f"Buffer too small: need {size} bytes at offset {offset}, "
+                                 f"have {len(view)}")
+            view[offset:offset + size] = data
+        
+        return size
+    
     def assemble_to_hex(self, source: str) -> str:
         """Assemble source code and return as hex string"""
-        machine_code = self.assemble(source)
+        machine_code = self.assemble_words(source)
         return '\n'.join(f'0x{code:04X}' for code in machine_code)
     
     def assemble_to_binary_file(self, source: str, filename: str) -> None:
         """Assemble and write to binary file"""
-        machine_code = self.assemble(source)
+        machine_code = self.assemble_bytes(source)
         with open(filename, 'wb') as f:
-            for code in machine_code:
-                f.write(code.to_bytes(2, byteorder='little'))
+            f.write(machine_code)
+    
+    def assemble_stream(self, lines: Iterable[str], sink: WordSink) -> int:
+        """Assemble in a single pass, sending (address, word) pairs to sink
+        
+        Words are emitted as soon as they are known. Words that reference a
+        label not yet defined are kept in a fixup table and emitted when the
+        label appears, so sink may receive addresses out of order. Memory use
+        grows with the number of unresolved references and labels, not with
+        the program size. Returns the number of words emitted.
+        """
+        self.labels.clear()
+        self.instructions.clear()
+        self.current_address = 0
+        self._incbin_sizes.clear()
+        
+        labels = self.labels
+        encoders = self.encoders
+        sizes = self.sizes
+        label_operands = self.label_operands
+        label_directives = self.LABEL_DIRECTIVES
+        fixups: Dict[str, List[Instruction]] = {}
+        
+        for line_num, (label, opcode, operands) in enumerate(lex(lines), 1):
+            
+            if label:
+                if label in labels:
+                    # A later definition would retarget words already emitted
+                    raise ValueError(f"Line {line_num}: Duplicate label: {label}")
+                labels[label] = self.current_address
+                
+                # Backpatch words that were waiting for this label
+                for pending in fixups.pop(label, ()):
+                    target = self._forward_reference(pending)
+                    if target is not None:
+                        fixups.setdefault(target, []).append(pending)  # Still waiting on another
+                        continue
+                    for offset, word in enumerate(encoders[pending.opcode](pending)):
+                        sink(pending.address + offset * 2, word)
+            
+            if not opcode:
+                continue
+            
+            opcode = opcode.upper()
+            encode = encoders.get(opcode)
+            if encode is None:
+                raise ValueError(f"Line {line_num}: Unknown opcode: {opcode}")
+            
+            instr = Instruction(
+                label=label,
+                opcode=opcode,
+                operands=split_operands(operands),
+                line_num=line_num,
+                address=self.current_address
+            )
+            size = sizes.get(opcode)
+            self.current_address += size if size is not None else self.size_of(instr)
+            if self.current_address > self.MEMORY_SIZE:
+                raise ValueError(f"Line {line_num}: Program does not fit in memory: "
+                                 f"the address space holds {self.MEMORY_SIZE} bytes")
+            
+            # Forward reference: record a fixup instead of emitting
+            if opcode in label_operands or opcode in label_directives:
+                target = self._forward_reference(instr)
+                if target is not None:
+                    fixups.setdefault(target, []).append(instr)
+                    continue
+            
+            try:
+                words = encode(instr)
+            except (ValueError, IndexError) as e:
+                raise ValueError(f"Line {line_num}: {e}") from e
+            for offset, word in enumerate(words):
+                sink(instr.address + offset * 2, word)
+        
+        if fixups:
+            label, pending = next(iter(fixups.items()))
+            raise ValueError(f"Line {pending[0].line_num}: Undefined label: {label}")
+        
+        return self.current_address // 2
+    
+    def assemble_stream_to_binary_file(self, lines: Iterable[str], filename: str) -> None:
+        """Stream-assemble to a binary file, seeking back to patch fixups"""
+        with open(filename, 'wb') as f:
+            writer = _BackpatchWriter(f)
+            self.assemble_stream(lines, writer.write_word)
+            writer.flush()
+    
+    def _forward_reference(self, instr: Instruction) -> Optional[str]:
+        """First operand of instr naming a label that is not defined yet"""
+        if instr.opcode in self.LABEL_DIRECTIVES:
+            candidates = instr.operands
+        else:
+            entry = self.label_operands.get(instr.opcode)
+            if entry is None or entry[0] >= len(instr.operands):
+                return None
+            candidates = instr.operands[entry[0]:entry[0] + 1]
+        
+        labels = self.labels
+        for operand in candidates:
+            if operand not in labels and not self._is_immediate(operand):
+                return operand
+        return None
+    
+    def _is_immediate(self, text: str) -> bool:
+        """Whether an operand parses as an immediate value"""
+        try:
+            self.parse_immediate(text)
+        except ValueError:
+            return False
+        return True
 
 
+class _BackpatchWriter:
+    """Buffers sequential words and seeks back for out-of-order ones"""
+    
+    CHUNK_SIZE = 64 * 1024
+    
+    def __init__(self, f: BinaryIO):
+        self.f = f
+        self.origin = f.tell()  # File offset of address 0
+        self.base = 0           # Address of the first buffered byte
+        self.buffer = bytearray()
+    
+    def write_word(self, address: int, word: int) -> None:
+        data = word.to_bytes(2, byteorder='little')
+        end = self.base + len(self.buffer)
+        if address >= end:
+            # Gaps are words still waiting for a fixup; zero them for now
+            if address > end:
+                self.buffer += bytes(address - end)
+            self.buffer += data
+            if len(self.buffer) >= self.CHUNK_SIZE:
+                self.flush()
+        elif address >= self.base:
+            self.buffer[address - self.base:address - self.base + 2] = data
+        else:
+            self.f.seek(self.origin + address)
+            self.f.write(data)
+            self.f.seek(self.origin + self.base)
+    
+    def flush(self) -> None:
+        self.f.write(self.buffer)
+        self.base += len(self.buffer)
+        self.buffer.clear()
+
 def main():
     """Example usage"""
     sample_program = """
@@ -286,6 +1582,11 @@ def main():
         SUB   R3, R2, R1    ; R3 = Limit - Counter
         BNE   R3, loop      ; If R3 != 0, continue
         HALT
+    
+    ; Data
+    table:  .word 0x1234, start, loop
+    text:   .byte 0x48, 0x69
+    buffer: .fill 4
     """
     
     assembler = CVEREAssembler()
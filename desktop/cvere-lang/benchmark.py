@@ -0,0 +1,489 @@
+"""
+CVERE Benchmarks - Throughput measurements for the assembler toolchain
+"""
+
+import argparse
+import io
+import json
+import os
+import platform
+import random
+import re
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from asm_stats import AssemblerProfiler, AssemblerStats
+from assembler import CVEREAssembler, Instruction, lex, split_operands
+
+
+SAMPLE_LINES = [
+    "; generated NPC behaviour",
+    "start:",
+    "    LOADI R1, 0x05      ; R1 = 5",
+    "    LOADI R2, 0x03      ; R2 = 3",
+    "    ADD   R3, R1, R2    ; R3 = R1 + R2",
+    "    STORE R3, R0, 0x0   ; Store result",
+    "loop:  ADDI  R1, 0x01",
+    "    SUB   R3, R2, R1",
+    "    BNE   R3, loop      ; If R3 != 0, continue",
+    "",
+    "    JMP   start",
+    "    HALT",
+]
+
+
+def legacy_tokenize_line(line: str) -> Tuple[Optional[str], Optional[str], List[str]]:
+    """Tokenizer used before the current lexer, kept as the benchmark baseline"""
+    line = re.sub(r';.*$', '', line).strip()
+
+    if not line:
+        return None, None, []
+
+    label = None
+    if ':' in line:
+        label, line = line.split(':', 1)
+        label = label.strip()
+        line = line.strip()
+
+    if not line:
+        return label, None, []
+
+    parts = line.split(None, 1)
+    opcode = parts[0].upper()
+
+    operands = []
+    if len(parts) > 1:
+        operands = [op.strip() for op in parts[1].split(',')]
+
+    return label, opcode, operands
+
+
+def generate_source(num_lines: int) -> str:
+    """Build a source buffer by repeating the sample program"""
+    lines = []
+    for i in range(num_lines):
+        line = SAMPLE_LINES[i % len(SAMPLE_LINES)]
+        # Keep labels unique so the symbol table grows like real scripts
+        if line.endswith(':') or line.startswith('loop:'):
+            line = line.replace(':', f'_{i}:', 1)
+        lines.append(line)
+    return '\n'.join(lines)
+
+
+def lex_legacy(source: str) -> int:
+    """Lex with the per-line legacy tokenizer"""
+    count = 0
+    for line in source.split('\n'):
+        legacy_tokenize_line(line)
+        count += 1
+    return count
+
+
+def lex_current(source: str) -> int:
+    """Lex with the assembler's lexer, splitting operands as first_pass does"""
+    count = 0
+    for label, opcode, operands in lex(io.StringIO(source)):
+        if opcode:
+            opcode.upper()
+            split_operands(operands)
+        count += 1
+    return count
+
+
+def legacy_first_pass(source: str) -> int:
+    """First pass as it was before the current lexer: the same work as first_pass_lines"""
+    labels: Dict[str, int] = {}
+    instructions: List[Instruction] = []
+    address = 0
+    lines = source.split('\n')
+    for line_num, line in enumerate(lines, 1):
+        label, opcode, operands = legacy_tokenize_line(line)
+        if label:
+            labels[label] = address
+        if opcode:
+            instructions.append(Instruction(label=label, opcode=opcode, operands=operands,
+                                            line_num=line_num, address=address))
+            address += 4 if opcode in CVEREAssembler.EXTENDED else 2
+    return len(lines)
+
+
+def first_pass_lines(source: str) -> int:
+    """Run a full first pass (lexing and label collection)"""
+    assembler = CVEREAssembler()
+    assembler.first_pass(source)
+    return source.count('\n') + 1
+
+
+def measure(funcs: List[Callable[[str], int]], source: str, repeat: int = 5) -> List[float]:
+    """Best lines-per-second figure of each function over several runs
+
+    Runs are interleaved and timed in process CPU time, so a burst of load
+    on the machine cannot favour one function over another.
+    """
+    best = [float('inf')] * len(funcs)
+    lines = [0] * len(funcs)
+    for _ in range(repeat):
+        for index, func in enumerate(funcs):
+            start = time.process_time()
+            lines[index] = func(source)
+            best[index] = min(best[index], time.process_time() - start)
+    return [count / seconds for count, seconds in zip(lines, best)]
+
+
+def benchmark_lexer(num_lines: int = 200_000, repeat: int = 7) -> dict:
+    """Compare the legacy and current lexers, and the first passes built on them, in lines per second"""
+    source = generate_source(num_lines)
+    legacy, current, legacy_pass, first_pass = measure(
+        [lex_legacy, lex_current, legacy_first_pass, first_pass_lines], source, repeat)
+
+    return {
+        "lines": num_lines,
+        "legacy_lines_per_sec": legacy,
+        "lexer_lines_per_sec": current,
+        "legacy_first_pass_lines_per_sec": legacy_pass,
+        "first_pass_lines_per_sec": first_pass,
+        "speedup": current / legacy,
+        "first_pass_speedup": first_pass / legacy_pass,
+    }
+
+
+# Synthetic program generators: relative weight of each kind of line
+PROGRAM_KINDS: Dict[str, Dict[str, float]] = {
+    'label_dense': {'label': 0.30, 'instr': 0.50, 'branch': 0.10, 'jump': 0.05, 'comment': 0.05},
+    'branch_heavy': {'label': 0.10, 'instr': 0.40, 'branch': 0.40, 'jump': 0.10},
+    'data_heavy': {'label': 0.05, 'instr': 0.20, 'data': 0.45, 'store': 0.25, 'branch': 0.05},
+    'comment_heavy': {'label': 0.05, 'instr': 0.25, 'branch': 0.05, 'comment': 0.50, 'blank': 0.15},
+}
+
+TARGETS = ['assemble', 'assemble_to_hex', 'assemble_to_binary_file']
+DEFAULT_SIZES = [1_000, 10_000, 100_000]
+DEFAULT_HISTORY = 'benchmark_history.json'
+
+# Bump whenever generate_program emits different programs for the same seed
+GENERATOR_VERSION = 3
+
+# Larger sizes are split into programs of this many lines, each of which fits
+# in the 64 KB address space (generated code averages under two bytes a line)
+PROGRAM_LINES = 20_000
+
+# Run settings that must match for two recorded runs to be comparable
+RUN_SETTINGS = ['generator', 'seed', 'compact', 'repeat', 'memory']
+
+REGISTERS = [f'R{n:X}' for n in range(1, 16)]
+CONDITIONS = [f'R{n:X}' for n in range(1, 10)] + ['RF']  # BNE on RA-RE would encode extended opcodes
+ALU = ['ADD', 'SUB', 'AND', 'OR', 'XOR', 'SHL', 'SHR']
+
+
+def generate_program(kind: str, num_lines: int, seed: int = 0, part: int = 0) -> str:
+    """Seeded synthetic program of about num_lines lines that assembles cleanly
+
+    Branches and jumps target labels a few definitions back or ahead;
+    labels still referenced at the end are defined just before the HALT.
+    part tells apart the programs of one generate_programs call.
+    """
+    weights = PROGRAM_KINDS.get(kind)
+    if weights is None:
+        raise ValueError(f"Unknown program kind: {kind} (choose from {', '.join(PROGRAM_KINDS)})")
+
+    rnd = random.Random(f"{kind}:{seed}:{part}")
+    kinds = list(weights)
+    picks = rnd.choices(kinds, weights=[weights[k] for k in kinds], k=num_lines)
+    commented = kind == 'comment_heavy'
+    reg = REGISTERS
+    lines = ['start:']
+    labels = 0
+    referenced = 0
+
+    def target() -> str:
+        nonlocal referenced
+        index = max(0, labels + rnd.randrange(-4, 3))
+        referenced = max(referenced, index + 1)
+        return f'L{index}'
+
+    for pick in picks:
+        if pick == 'label':
+            lines.append(f'L{labels}:')
+            labels += 1
+            continue
+        if pick == 'comment':
+            lines.append(f'; step {rnd.randrange(1 << 16)}: update state and continue')
+            continue
+        if pick == 'blank':
+            lines.append('')
+            continue
+
+        if pick == 'instr':
+            k = rnd.random()
+            if k < 0.5:
+                line = f'    {rnd.choice(ALU)} {rnd.choice(reg)}, {rnd.choice(reg)}, {rnd.choice(reg)}'
+            elif k < 0.7:
+                line = f'    ADDI {rnd.choice(reg)}, 0x{rnd.randrange(256):02X}'
+            elif k < 0.85:
+                line = f'    LOADI {rnd.choice(reg)}, 0x{rnd.randrange(128):02X}'
+            else:
+                line = f'    LOAD {rnd.choice(reg)}, {rnd.choice(reg)}, 0x{rnd.randrange(16):X}'
+        elif pick == 'store':
+            line = f'    STORE {rnd.choice(reg)}, {rnd.choice(reg)}, 0x{rnd.randrange(16):X}'
+        elif pick == 'data':
+            line = f'    .WORD 0x{rnd.randrange(1 << 16):04X}'
+        elif pick == 'branch':
+            line = f'    {rnd.choice(("BEQ", "BNE"))} {rnd.choice(CONDITIONS)}, {target()}'
+        else:
+            line = f'    JMP {target()}'
+
+        if commented and rnd.random() < 0.5:
+            line += '   ; keeps the loop invariant'
+        lines.append(line)
+
+    lines.extend(f'L{index}:' for index in range(labels, referenced))
+    lines.append('    HALT')
+    return '\n'.join(lines)
+
+
+def generate_programs(kind: str, num_lines: int, seed: int = 0) -> List[str]:
+    """Programs of at most PROGRAM_LINES lines adding up to about num_lines lines"""
+    return [generate_program(kind, min(PROGRAM_LINES, num_lines - start), seed, part)
+            for part, start in enumerate(range(0, num_lines, PROGRAM_LINES))]
+
+
+def run_target(assembler: CVEREAssembler, target: str, source: str, scratch: str) -> None:
+    """Assemble source through one of the TARGETS entry points"""
+    if target == 'assemble_to_binary_file':
+        assembler.assemble_to_binary_file(source, scratch)
+    else:
+        getattr(assembler, target)(source)
+
+
+def build(assembler: CVEREAssembler, profiler: AssemblerProfiler, target: str,
+          sources: List[str], scratch: str) -> AssemblerStats:
+    """Assemble every program through target; the stats of all builds added up"""
+    total = AssemblerStats(entry_point=target)
+    for source in sources:
+        run_target(assembler, target, source, scratch)
+        stats = profiler.last
+        for phase, seconds in stats.phases.items():
+            total.phases[phase] = total.phases.get(phase, 0.0) + seconds
+        total.peak_bytes = max(total.peak_bytes, stats.peak_bytes)
+    return total
+
+
+def benchmark_assembler(kinds: List[str], sizes: List[int], targets: List[str],
+                        repeat: int = 3, seed: int = 0, memory: bool = True,
+                        compact: bool = False) -> List[dict]:
+    """Throughput (best of repeat runs) and peak allocation per kind, size and target
+
+    Each result also carries the per-phase times of its fastest build.
+    Sizes above PROGRAM_LINES are assembled as several programs, since no
+    image may exceed 64 KB; the peak is then that of the largest program.
+    compact assembles through the columnar InstructionTable.
+    """
+    results = []
+    fd, scratch = tempfile.mkstemp(suffix='.bin')
+    os.close(fd)
+    try:
+        for kind in kinds:
+            for size in sizes:
+                sources = generate_programs(kind, size, seed)
+                lines = sum(source.count('\n') + 1 for source in sources)
+                for target in targets:
+                    # Timings come from the stats of the fastest build
+                    assembler = CVEREAssembler(compact=compact)
+                    profiler = assembler.enable_stats()
+                    best = None
+                    for _ in range(repeat):
+                        stats = build(assembler, profiler, target, sources, scratch)
+                        if best is None or stats.seconds < best.seconds:
+                            best = stats
+
+                    # tracemalloc slows allocation down, so memory gets a run of its own
+                    peak = 0
+                    if memory:
+                        profiler = assembler.enable_stats(trace_memory=True)
+                        peak = build(assembler, profiler, target, sources, scratch).peak_bytes
+
+                    results.append({
+                        "kind": kind,
+                        "lines": lines,
+                        "target": target,
+                        "seconds": best.seconds,
+                        "lines_per_sec": lines / best.seconds if best.seconds else 0.0,
+                        "peak_bytes": peak,
+                        "phases": best.phases,
+                    })
+    finally:
+        os.remove(scratch)
+    return results
+
+
+def load_history(filename: str) -> List[dict]:
+    """Benchmark runs recorded so far, oldest first"""
+    try:
+        with open(filename, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return []
+
+
+def append_history(filename: str, run: dict) -> None:
+    """Add a run to the history file, replacing it atomically"""
+    history = load_history(filename)
+    history.append(run)
+    directory = os.path.dirname(os.path.abspath(filename))
+    fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        json.dump(history, f, indent=2)
+    os.replace(temp_path, filename)
+
+
+def run_mismatches(baseline: dict, current: dict) -> List[str]:
+    """Settings in RUN_SETTINGS that differ between two runs, as 'name: old != new'"""
+    return [f"{name}: {baseline.get(name)!r} != {current.get(name)!r}"
+            for name in RUN_SETTINGS if baseline.get(name) != current.get(name)]
+
+
+def compare_runs(baseline: dict, current: dict, threshold: float = 0.10,
+                 force: bool = False) -> List[dict]:
+    """Per-benchmark changes between two runs; regressed marks drops beyond threshold
+
+    Throughput regresses when lines per second fall by more than
+    threshold, memory when the peak grows by more than threshold. Runs
+    whose settings differ (see run_mismatches) measured different work
+    and are refused unless force is set.
+    """
+    mismatches = run_mismatches(baseline, current)
+    if mismatches and not force:
+        raise ValueError(f"Runs are not comparable ({'; '.join(mismatches)})")
+
+    def key(result: dict) -> Tuple[str, int, str]:
+        return result["kind"], result["lines"], result["target"]
+
+    before = {key(result): result for result in baseline["results"]}
+    changes = []
+    for result in current["results"]:
+        old = before.get(key(result))
+        if old is None:
+            continue
+        speed = result["lines_per_sec"] / old["lines_per_sec"] - 1 if old["lines_per_sec"] else 0.0
+        memory = result["peak_bytes"] / old["peak_bytes"] - 1 if old["peak_bytes"] and result["peak_bytes"] else 0.0
+        changes.append({
+            "kind": result["kind"],
+            "lines": result["lines"],
+            "target": result["target"],
+            "speed_change": speed,
+            "memory_change": memory,
+            "regressed": speed < -threshold or memory > threshold,
+        })
+    return changes
+
+
+def print_results(results: List[dict]) -> None:
+    print(f"{'kind':<14} {'lines':>10} {'target':<24} {'lines/s':>12} {'peak KiB':>10}")
+    for result in results:
+        print(f"{result['kind']:<14} {result['lines']:>10} {result['target']:<24} "
+              f"{result['lines_per_sec']:>12,.0f} {result['peak_bytes'] / 1024:>10.1f}")
+
+
+def run_command(args: argparse.Namespace) -> int:
+    results = benchmark_assembler(args.kinds, args.sizes, args.targets, args.repeat, args.seed,
+                                  memory=not args.no_memory, compact=args.compact)
+    print_results(results)
+    run = {
+        "label": args.label,
+        "timestamp": time.strftime('%Y-%m-%dT%H:%M:%S'),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "generator": GENERATOR_VERSION,
+        "seed": args.seed,
+        "compact": args.compact,
+        "repeat": args.repeat,
+        "memory": not args.no_memory,
+        "results": results,
+    }
+    append_history(args.history, run)
+    print(f"\nRecorded run {len(load_history(args.history)) - 1} in {args.history}")
+    return 0
+
+
+def compare_command(args: argparse.Namespace) -> int:
+    history = load_history(args.history)
+    if len(history) < 2:
+        print(f"Need at least two runs in {args.history} to compare")
+        return 2
+    baseline, current = history[args.baseline], history[args.current]
+    try:
+        changes = compare_runs(baseline, current, args.threshold, force=args.force)
+    except ValueError as e:
+        print(f"{e}; use --force to compare anyway")
+        return 2
+
+    print(f"Baseline: {baseline.get('label') or baseline['timestamp']}   "
+          f"Current: {current.get('label') or current['timestamp']}   Threshold: {args.threshold:.0%}\n")
+    for mismatch in run_mismatches(baseline, current):
+        print(f"WARNING: settings differ, {mismatch}")
+    print(f"{'kind':<14} {'lines':>10} {'target':<24} {'speed':>8} {'memory':>8}")
+    for change in changes:
+        flag = "  REGRESSION" if change["regressed"] else ""
+        print(f"{change['kind']:<14} {change['lines']:>10} {change['target']:<24} "
+              f"{change['speed_change']:>+8.1%} {change['memory_change']:>+8.1%}{flag}")
+
+    regressions = sum(change["regressed"] for change in changes)
+    print(f"\n{regressions} regression(s) in {len(changes)} benchmarks")
+    return 1 if regressions else 0
+
+
+def lexer_command(args: argparse.Namespace) -> int:
+    print("=== CVERE Lexer Benchmark ===\n")
+    results = benchmark_lexer(args.lines, args.repeat)
+    print(f"Lines:              {results['lines']}")
+    print(f"Legacy tokenizer:   {results['legacy_lines_per_sec']:,.0f} lines/s")
+    print(f"Current lexer:      {results['lexer_lines_per_sec']:,.0f} lines/s")
+    print(f"Lexer speedup:      {results['speedup']:.2f}x")
+    print(f"Legacy first_pass:  {results['legacy_first_pass_lines_per_sec']:,.0f} lines/s")
+    print(f"first_pass:         {results['first_pass_lines_per_sec']:,.0f} lines/s")
+    print(f"first_pass speedup: {results['first_pass_speedup']:.2f}x")
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Run the lexer benchmark, the assembler suite, or compare recorded runs"""
+    def size_list(text: str) -> List[int]:
+        return [int(float(size)) for size in text.split(',')]
+
+    parser = argparse.ArgumentParser(description="CVERE toolchain benchmarks")
+    commands = parser.add_subparsers(dest='command')
+
+    lexer = commands.add_parser('lexer', help="compare the legacy and current lexers")
+    lexer.add_argument('--lines', type=int, default=200_000)
+    lexer.add_argument('--repeat', type=int, default=7)
+    lexer.set_defaults(func=lexer_command)
+
+    run = commands.add_parser('run', help="benchmark the assembler and record the results")
+    run.add_argument('--kinds', type=lambda text: text.split(','), default=list(PROGRAM_KINDS))
+    run.add_argument('--sizes', type=size_list, default=DEFAULT_SIZES,
+                     help="comma-separated line counts, e.g. 1000,1e6,1e7")
+    run.add_argument('--targets', type=lambda text: text.split(','), default=TARGETS)
+    run.add_argument('--repeat', type=int, default=3)
+    run.add_argument('--seed', type=int, default=0)
+    run.add_argument('--label', default="", help="name for this run in the history")
+    run.add_argument('--history', default=DEFAULT_HISTORY)
+    run.add_argument('--no-memory', action='store_true', help="skip tracemalloc peak measurement")
+    run.add_argument('--compact', action='store_true', help="assemble with columnar instruction storage")
+    run.set_defaults(func=run_command)
+
+    compare = commands.add_parser('compare', help="flag regressions between two recorded runs")
+    compare.add_argument('--history', default=DEFAULT_HISTORY)
+    compare.add_argument('--baseline', type=int, default=-2, help="run index (default: second to last)")
+    compare.add_argument('--current', type=int, default=-1, help="run index (default: last)")
+    compare.add_argument('--threshold', type=float, default=0.10, help="allowed fractional change")
+    compare.add_argument('--force', action='store_true', help="compare runs with different settings")
+    compare.set_defaults(func=compare_command)
+
+    argv = sys.argv[1:] if argv is None else argv
+    args = parser.parse_args(argv or ['lexer'])  # The lexer benchmark stays the default
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
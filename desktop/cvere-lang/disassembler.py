@@ -2,8 +2,17 @@
 CVERE Disassembler - Converts hexadecimal machine code to assembly language
 """
 
-from typing import List, Tuple, Optional
-from dataclasses import dataclass
+import mmap
+import sys
+from array import array
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, TextIO, Tuple, Union
+from dataclasses import dataclass, field
+
+try:
+    import numpy as np
+except ImportError:  # Bulk decoding then fills array columns word by word
+    np = None
 
 
 @dataclass
@@ -14,10 +23,73 @@ class DisassembledInstruction:
     mnemonic: str
     operands: str
     comment: str = ""
+    extension: Optional[int] = None  # Second word of a two-word instruction
+
+
+class DecodedWord(NamedTuple):
+    """Everything about one 16-bit word that does not depend on its address
+
+    format is 'R', 'I', 'M', 'J', 'B', 'X' for the first word of an extended
+    instruction, or '' for NOP, HALT and unknown opcodes. For B-type words
+    operands and comment hold only the "Rc, " and "Rc=c, " prefixes; the
+    target is added per address, and text is complete only for formats
+    outside ADDRESSED_FORMATS.
+    """
+    mnemonic: str
+    format: str
+    fields: Tuple[int, ...]  # (rd, rs, rt), (rd, imm), (rd, rs, offset), (addr,), (rc, offset) or (op,)
+    operands: str
+    comment: str
+    text: str  # Padded mnemonic and operands, as listed by disassemble_to_string
+
+
+@dataclass
+class DecodedColumns:
+    """Bit fields of every word of an image, one column each
+
+    Fields are extracted from every word whatever its format, so select
+    rows by format: codes index CVEREDisassembler.FORMAT_CLASSES. opcode is
+    the 8-bit extended opcode for 'X' words; offset is the sign-extended
+    branch offset in words. Columns are numpy arrays when numpy is
+    installed and array.array otherwise.
+    """
+    format: Union[array, 'np.ndarray']   # uint8 format class codes
+    opcode: Union[array, 'np.ndarray']   # uint8
+    rd: Union[array, 'np.ndarray']       # uint8, also Rc of B-type
+    rs: Union[array, 'np.ndarray']       # uint8
+    rt: Union[array, 'np.ndarray']       # uint8, also the M-type offset
+    imm8: Union[array, 'np.ndarray']     # uint8
+    addr12: Union[array, 'np.ndarray']   # uint16
+    offset: Union[array, 'np.ndarray']   # int8
+
+    def __len__(self) -> int:
+        return len(self.format)
+
+
+@dataclass
+class BasicBlock:
+    """Straight-line run of reached instructions"""
+    start: int
+    end: int  # Address after the last instruction
+    successors: List[int] = field(default_factory=list)  # Addresses control may go to next
+
+
+@dataclass
+class RecursiveDisassembly:
+    """Outcome of following control flow through an image"""
+    instructions: List[DisassembledInstruction]  # Code and .WORD data, in address order
+    blocks: List[BasicBlock]
+    labels: Dict[int, str]  # Label of every entry point and reached target
+    data: List[Tuple[int, int]]  # [start, end) address ranges never reached
 
 
 class CVEREDisassembler:
-    """Disassembler for CVERE ISA"""
+    """Disassembler for CVERE ISA
+    
+    Words are decoded through a table of all 65,536 of them, built on first
+    use and shared by every instance of the class; only branch targets and
+    labels are rendered per address.
+    """
     
     # Reverse opcode mappings
     OPCODES = {
@@ -44,14 +116,34 @@ class CVEREDisassembler:
         0xFB: 'RET',
         0xFC: 'PUSH',
         0xFD: 'POP',
+        0xFE: 'LJMP',
     }
     
+    # Extended instructions whose second word is a 16-bit address
+    ADDRESS_OPCODES = [0xFA, 0xFE]
+    
+    # Of those, the ones that continue after their target returns
+    CALL_OPCODES = [0xFA]
+    
+    # Extended instructions that end a path of execution
+    RETURN_OPCODES = [0xFB]
+    
     R_TYPE = [0x1, 0x3, 0x4, 0x5, 0x6, 0x7, 0x8, 0x9]
     I_TYPE = [0x2, 0xC]
     M_TYPE = [0xA, 0xB]
     J_TYPE = [0xD]
     B_TYPE = [0xE, 0xF]
     
+    # Formats whose text depends on the address, the labels or the next word
+    ADDRESSED_FORMATS = frozenset('JBX')
+    
+    # Format classes of decode_bulk by code: DecodedWord formats, then 'W'
+    # for the second word of an extended instruction
+    FORMAT_CLASSES = ('', 'R', 'I', 'M', 'J', 'B', 'X', 'W')
+    
+    _decode_table: Optional[List[DecodedWord]] = None
+    _format_codes: Optional[bytes] = None
+    
     def __init__(self):
         self.address_labels: dict[int, str] = {}
     
@@ -154,26 +246,29 @@ class CVEREDisassembler:
         
         return mnemonic, operands, comment
     
-    def disassemble_instruction(self, instruction: int, address: int) -> DisassembledInstruction:
-        """Disassemble a single instruction"""
+    def decode_extended(self, extended_op: int, extension: Optional[int]) -> Tuple[str, str, str]:
+        """Decode a two-word extended instruction"""
+        mnemonic = self.EXTENDED_OPCODES[extended_op]
+        if extended_op not in self.ADDRESS_OPCODES or extension is None:
+            return mnemonic, '', 'Extended instruction'
+        
+        # Check if we have a label for this address
+        if extension in self.address_labels:
+            operands = self.address_labels[extension]
+        else:
+            operands = f"0x{extension:04X}"
+        
+        return mnemonic, operands, f"Target=0x{extension:04X}"
+    
+    def decode_word(self, instruction: int, address: int,
+                    extension: Optional[int] = None) -> Tuple[str, str, str]:
+        """Mnemonic, operands and comment of one word, decoded without the table"""
         # Special cases
         if instruction == 0x0000:
-            return DisassembledInstruction(
-                address=address,
-                machine_code=instruction,
-                mnemonic='NOP',
-                operands='',
-                comment='No operation'
-            )
+            return 'NOP', '', 'No operation'
         
         if instruction == 0xFFFF:
-            return DisassembledInstruction(
-                address=address,
-                machine_code=instruction,
-                mnemonic='HALT',
-                operands='',
-                comment='Stop execution'
-            )
+            return 'HALT', '', 'Stop execution'
         
         # Extract opcode
         opcode = (instruction >> 12) & 0xF
@@ -182,91 +277,556 @@ class CVEREDisassembler:
         if opcode == 0xF:
             extended_op = (instruction >> 8) & 0xFF
             if extended_op in self.EXTENDED_OPCODES:
-                return DisassembledInstruction(
-                    address=address,
-                    machine_code=instruction,
-                    mnemonic=self.EXTENDED_OPCODES[extended_op],
-                    operands='',
-                    comment='Extended instruction'
-                )
+                return self.decode_extended(extended_op, extension)
         
         # Decode based on instruction type
         if opcode in self.R_TYPE:
-            mnemonic, operands, comment = self.decode_r_type(instruction, opcode)
+            return self.decode_r_type(instruction, opcode)
         elif opcode in self.I_TYPE:
-            mnemonic, operands, comment = self.decode_i_type(instruction, opcode)
+            return self.decode_i_type(instruction, opcode)
         elif opcode in self.M_TYPE:
-            mnemonic, operands, comment = self.decode_m_type(instruction, opcode)
+            return self.decode_m_type(instruction, opcode)
         elif opcode in self.J_TYPE:
-            mnemonic, operands, comment = self.decode_j_type(instruction, opcode, address)
+            return self.decode_j_type(instruction, opcode, address)
         elif opcode in self.B_TYPE:
-            mnemonic, operands, comment = self.decode_b_type(instruction, opcode, address)
+            return self.decode_b_type(instruction, opcode, address)
+        return f"UNKNOWN_{opcode:X}", '', f"Unknown opcode: 0x{opcode:X}"
+    
+    @classmethod
+    def decode_table(cls) -> List[DecodedWord]:
+        """The decode table of this class, indexed by word"""
+        table = cls.__dict__.get('_decode_table')
+        if table is None:
+            # Concurrent first calls may both build it; either result is the same
+            table = cls()._build_decode_table()
+            cls._decode_table = table
+        return table
+    
+    def _build_decode_table(self) -> List[DecodedWord]:
+        table: List[DecodedWord] = []
+        append = table.append
+        
+        for word in range(0x10000):
+            opcode = word >> 12
+            rd = (word >> 8) & 0xF
+            rs = (word >> 4) & 0xF
+            low = word & 0xF
+            
+            if word in (0x0000, 0xFFFF):
+                fmt, fields = '', ()
+            elif (word >> 8) in self.EXTENDED_OPCODES:
+                fmt, fields = 'X', (word >> 8,)
+            elif opcode in self.R_TYPE:
+                fmt, fields = 'R', (rd, rs, low)
+            elif opcode in self.I_TYPE:
+                fmt, fields = 'I', (rd, word & 0xFF)
+            elif opcode in self.M_TYPE:
+                fmt, fields = 'M', (rd, rs, low)
+            elif opcode in self.J_TYPE:
+                fmt, fields = 'J', (word & 0xFFF,)
+            elif opcode in self.B_TYPE:
+                offset = word & 0xFF
+                if offset & 0x80:
+                    offset -= 0x100
+                mnemonic = self.OPCODES.get(opcode, 'BNE')
+                append(DecodedWord(mnemonic, 'B', (rd, offset), f"{self.format_register(rd)}, ",
+                                   f"Rc={rd:X}, ", f"{mnemonic:6s}"))
+                continue
+            else:
+                fmt, fields = '', ()
+            
+            # Label-free and without a second word, so address-independent
+            mnemonic, operands, comment = self.decode_word(word, 0)
+            append(DecodedWord(mnemonic, fmt, fields, operands, comment,
+                               f"{mnemonic:6s} {operands}" if operands else f"{mnemonic:6s}"))
+        
+        return table
+    
+    @classmethod
+    def format_codes(cls) -> bytes:
+        """FORMAT_CLASSES code of every word as a first word, indexed by word"""
+        codes = cls.__dict__.get('_format_codes')
+        if codes is None:
+            index = {name: code for code, name in enumerate(cls.FORMAT_CLASSES)}
+            codes = bytes(index[entry.format] for entry in cls.decode_table())
+            cls._format_codes = codes
+        return codes
+    
+    def decode_bulk(self, words) -> DecodedColumns:
+        """Field columns of a whole image, decoded like disassemble()
+        
+        words is a sequence of 16-bit words, a uint16 array, or a buffer
+        of little-endian bytes such as a binary file's contents. As in a
+        linear disassembly, the word after an extended instruction is its
+        operand and gets format 'W'.
+        """
+        if np is not None:
+            return self._decode_bulk_numpy(words)
+        return self._decode_bulk_array(words)
+    
+    def _decode_bulk_numpy(self, words) -> DecodedColumns:
+        if isinstance(words, (bytes, bytearray)) or \
+                (isinstance(words, memoryview) and words.itemsize == 1):
+            if len(words) % 2:
+                raise ValueError(f"Odd buffer length {len(words)}: words are 2 bytes")
+            w = np.frombuffer(words, dtype='<u2').astype(np.uint16)
         else:
-            mnemonic, operands, comment = f"UNKNOWN_{opcode:X}", '', f"Unknown opcode: 0x{opcode:X}"
+            w = np.asarray(words)
+            if w.dtype != np.uint16:
+                if w.size and (w.min() < 0 or w.max() > 0xFFFF):
+                    raise ValueError("Words must be in the range 0..0xFFFF")
+                w = w.astype(np.uint16)
+            w = w.reshape(-1)
+        
+        op = (w >> 12).astype(np.uint8)
+        high = (w >> 8).astype(np.uint8)
+        classes = self.FORMAT_CLASSES
+        # Format by opcode, later rules winning as in decode_word's order
+        by_opcode = np.zeros(16, dtype=np.uint8)
+        for name, opcodes in (('B', self.B_TYPE), ('J', self.J_TYPE), ('M', self.M_TYPE),
+                              ('I', self.I_TYPE), ('R', self.R_TYPE)):
+            by_opcode[opcodes] = classes.index(name)
+        is_extended = np.zeros(256, dtype=bool)
+        is_extended[list(self.EXTENDED_OPCODES)] = True
+        fmt = by_opcode[op]
+        extended = is_extended[high]
+        fmt[extended] = classes.index('X')
+        fmt[(w == 0x0000) | (w == 0xFFFF)] = 0
+        
+        # In a run of extended-looking words, every other one is an operand
+        index = np.arange(len(w))
+        starts_run = extended.copy()
+        starts_run[1:] &= ~extended[:-1]
+        run_start = np.maximum.accumulate(np.where(starts_run, index, 0)) if len(w) else index
+        first_words = extended & ((index - run_start) & 1 == 0)
+        operand = np.zeros(len(w), dtype=bool)
+        operand[1:] = first_words[:-1]
+        fmt[operand] = classes.index('W')
+        op = np.where(fmt == classes.index('X'), high, op)
+        
+        return DecodedColumns(
+            format=fmt,
+            opcode=op,
+            rd=high & 0xF,
+            rs=((w >> 4) & 0xF).astype(np.uint8),
+            rt=(w & 0xF).astype(np.uint8),
+            imm8=(w & 0xFF).astype(np.uint8),
+            addr12=w & 0xFFF,
+            offset=(w & 0xFF).astype(np.uint8).view(np.int8),
+        )
+    
+    def _decode_bulk_array(self, words) -> DecodedColumns:
+        if isinstance(words, (bytes, bytearray)) or \
+                (isinstance(words, memoryview) and words.itemsize == 1):
+            if len(words) % 2:
+                raise ValueError(f"Odd buffer length {len(words)}: words are 2 bytes")
+            w = array('H', bytes(words))
+            if sys.byteorder == 'big':
+                w.byteswap()
+        else:
+            try:
+                w = array('H', words)
+            except OverflowError:
+                raise ValueError("Words must be in the range 0..0xFFFF") from None
+        
+        codes = self.format_codes()
+        fmt = array('B', bytes(codes[word] for word in w))
+        extension, operand = self.FORMAT_CLASSES.index('X'), self.FORMAT_CLASSES.index('W')
+        index = 0
+        while index < len(w) - 1:
+            if fmt[index] == extension:
+                fmt[index + 1] = operand
+                index += 2
+            else:
+                index += 1
+        
+        return DecodedColumns(
+            format=fmt,
+            opcode=array('B', [word >> 8 if code == extension else word >> 12 for word, code in zip(w, fmt)]),
+            rd=array('B', [(word >> 8) & 0xF for word in w]),
+            rs=array('B', [(word >> 4) & 0xF for word in w]),
+            rt=array('B', [word & 0xF for word in w]),
+            imm8=array('B', [word & 0xFF for word in w]),
+            addr12=array('H', [word & 0xFFF for word in w]),
+            offset=array('b', [((word & 0xFF) ^ 0x80) - 0x80 for word in w]),
+        )
+    
+    def _render(self, entry: DecodedWord, address: int, extension: Optional[int],
+                labels: Optional[Dict[int, str]] = None) -> Tuple[str, str]:
+        """Operands and comment of a J, B or X entry at address, naming targets from labels"""
+        fmt = entry.format
+        labels = self.address_labels if labels is None else labels
+        if fmt == 'B':
+            target = address + 2 + entry.fields[1] * 2
+            label = labels.get(target)
+            return (entry.operands + (label if label is not None else f"0x{target:04X}"),
+                    f"{entry.comment}Target=0x{target:04X}")
+        if fmt == 'J':
+            return labels.get(entry.fields[0], entry.operands), entry.comment
+        if extension is None or entry.fields[0] not in self.ADDRESS_OPCODES:
+            return entry.operands, entry.comment
+        return labels.get(extension, f"0x{extension:04X}"), f"Target=0x{extension:04X}"
+    
+    def is_extended(self, instruction: int) -> bool:
+        """True for the first word of a two-word instruction"""
+        return (instruction >> 8) in self.EXTENDED_OPCODES
+    
+    def disassemble_instruction(self, instruction: int, address: int,
+                                extension: Optional[int] = None) -> DisassembledInstruction:
+        """Disassemble a single instruction, given the next word for two-word ones"""
+        if 0 <= instruction <= 0xFFFF:
+            entry = self.decode_table()[instruction]
+            if entry.format in self.ADDRESSED_FORMATS:
+                operands, comment = self._render(entry, address, extension)
+            else:
+                operands, comment = entry.operands, entry.comment
+            mnemonic = entry.mnemonic
+            if entry.format != 'X':
+                extension = None
+        else:
+            mnemonic, operands, comment = self.decode_word(instruction, address, extension)
+            if (instruction >> 12) & 0xF != 0xF or (instruction >> 8) & 0xFF not in self.EXTENDED_OPCODES:
+                extension = None
         
         return DisassembledInstruction(
             address=address,
             machine_code=instruction,
             mnemonic=mnemonic,
             operands=operands,
-            comment=comment
+            comment=comment,
+            extension=extension
         )
     
     def disassemble(self, machine_code: List[int], start_address: int = 0) -> List[DisassembledInstruction]:
         """Disassemble a list of machine code instructions"""
-        result = []
+        return list(self.iter_disassemble(machine_code, start_address))
+    
+    def iter_disassemble(self, machine_code: Sequence[int], start_address: int = 0) -> Iterator[DisassembledInstruction]:
+        """Disassemble lazily, one instruction at a time"""
+        table = self.decode_table()
+        addressed = self.ADDRESSED_FORMATS
+        render = self._render
+        count = len(machine_code)
         address = start_address
+        index = 0
         
-        for instruction in machine_code:
-            disasm = self.disassemble_instruction(instruction, address)
-            result.append(disasm)
-            address += 2
-        
-        return result
+        while index < count:
+            word = machine_code[index]
+            if not 0 <= word <= 0xFFFF:
+                yield self.disassemble_instruction(word, address)
+                index += 1
+                address += 2
+                continue
+            
+            entry = table[word]
+            if entry.format not in addressed:
+                yield DisassembledInstruction(address, word, entry.mnemonic, entry.operands, entry.comment)
+                index += 1
+                address += 2
+            elif entry.format == 'X' and index + 1 < count:
+                # Two-word instruction: the next word is its operand
+                extension = machine_code[index + 1]
+                operands, comment = render(entry, address, extension)
+                yield DisassembledInstruction(address, word, entry.mnemonic, operands, comment, extension)
+                index += 2
+                address += 4
+            else:
+                operands, comment = render(entry, address, None)
+                yield DisassembledInstruction(address, word, entry.mnemonic, operands, comment)
+                index += 1
+                address += 2
     
     def disassemble_to_string(self, machine_code: List[int], start_address: int = 0, 
                              show_hex: bool = True, show_comments: bool = True) -> str:
         """Disassemble and format as string"""
-        instructions = self.disassemble(machine_code, start_address)
-        lines = []
+        return '\n'.join(self._format_lines(machine_code, start_address, show_hex, show_comments))
+    
+    def disassemble_to_stream(self, machine_code: Sequence[int], fileobj: TextIO, start_address: int = 0,
+                              show_hex: bool = True, show_comments: bool = True,
+                              chunk_lines: int = 4096) -> int:
+        """Write the listing to a text file, chunk_lines lines per write
         
-        for instr in instructions:
-            parts = []
-            
-            # Address
-            parts.append(f"{instr.address:04X}:")
+        Lines are formatted as in disassemble_to_string, each ending in a
+        newline, and only one chunk is held in memory at a time. Returns
+        the number of lines written.
+        """
+        written = 0
+        chunk: List[str] = []
+        for line in self._format_lines(machine_code, start_address, show_hex, show_comments):
+            chunk.append(line)
+            if len(chunk) == chunk_lines:
+                fileobj.write('\n'.join(chunk) + '\n')
+                written += len(chunk)
+                chunk.clear()
+        if chunk:
+            fileobj.write('\n'.join(chunk) + '\n')
+            written += len(chunk)
+        return written
+    
+    def _format_lines(self, machine_code: Sequence[int], start_address: int,
+                      show_hex: bool, show_comments: bool) -> Iterator[str]:
+        """Listing lines, pre-rendered from the decode table where possible"""
+        table = self.decode_table()
+        addressed = self.ADDRESSED_FORMATS
+        count = len(machine_code)
+        address = start_address
+        index = 0
+        
+        while index < count:
+            word = machine_code[index]
+            extension = None
+            entry = table[word] if 0 <= word <= 0xFFFF else None
+            if entry is not None and entry.format not in addressed:
+                asm, comment = entry.text, entry.comment  # Pre-rendered
+                index += 1
+            else:
+                if entry is not None and entry.format == 'X' and index + 1 < count:
+                    extension = machine_code[index + 1]
+                    operands, comment = self._render(entry, address, extension)
+                    mnemonic = entry.mnemonic
+                elif entry is not None:
+                    operands, comment = self._render(entry, address, None)
+                    mnemonic = entry.mnemonic
+                else:
+                    disasm = self.disassemble_instruction(word, address)
+                    mnemonic, operands, comment = disasm.mnemonic, disasm.operands, disasm.comment
+                asm = f"{mnemonic:6s} {operands}" if operands else f"{mnemonic:6s}"
+                index += 1 if extension is None else 2
             
-            # Machine code
+            # Address, machine code, mnemonic and operands, comment
             if show_hex:
-                parts.append(f"{instr.machine_code:04X}")
-            
-            # Mnemonic and operands
-            asm = f"{instr.mnemonic:6s}"
-            if instr.operands:
-                asm += f" {instr.operands}"
-            parts.append(asm)
+                hex_code = f"{word:04X} {extension:04X}" if extension is not None else f"{word:04X}     "
+                line = f"{address:04X}:  {hex_code}  {asm}"
+            else:
+                line = f"{address:04X}:  {asm}"
+            yield f"{line}  ; {comment}" if show_comments and comment else line
+            address += 2 if extension is None else 4
+    
+    def disassemble_from_file(self, filename: str, start_address: int = 0,
+                              address_range: Optional[Tuple[int, int]] = None) -> List[DisassembledInstruction]:
+        """Disassemble from binary file, optionally only the [start, end) address range"""
+        with self.mapped_words(filename, start_address, address_range) as (words, address):
+            return self.disassemble(words, address)
+    
+    @contextmanager
+    def mapped_words(self, filename: str, start_address: int = 0,
+                     address_range: Optional[Tuple[int, int]] = None) -> Iterator[Tuple[Sequence[int], int]]:
+        """The file's 16-bit little-endian words and the address of the first one
+        
+        The file is memory-mapped and, on little-endian hosts, its words are
+        read in place, so only the pages of the range ever get loaded. Word
+        N of the file is at start_address + 2 * N; a trailing odd byte is
+        ignored. The words are only valid inside the with block.
+        """
+        with open(filename, 'rb') as f:
+            size = (f.seek(0, 2) // 2) * 2
+            first, end = start_address, start_address + size
+            if address_range is not None:
+                first, end = max(address_range[0], first), min(address_range[1], end)
+                if (first - start_address) % 2:
+                    raise ValueError(f"Address 0x{first:04X} is not word aligned")
+            if end <= first:
+                yield [], first
+                return
             
-            # Comment
-            if show_comments and instr.comment:
-                parts.append(f"; {instr.comment}")
+            offset = first - start_address
+            length = (end - first) // 2 * 2
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped, \
+                    memoryview(mapped)[offset:offset + length] as data:
+                if sys.byteorder == 'little':
+                    with data.cast('H') as words:
+                        yield words, first
+                else:
+                    words = array('H')
+                    words.frombytes(data)
+                    words.byteswap()
+                    yield words, first
+    
+    def disassemble_recursive(self, machine_code: Sequence[int], start_address: int = 0,
+                              entry_points: Optional[Iterable[int]] = None) -> RecursiveDisassembly:
+        """Disassemble only what control flow reaches from the entry points
+        
+        Starting from entry_points (default: start_address), a worklist
+        follows fall-through, JMP, LJMP, BEQ, BNE and CALL targets until
+        HALT, RET or an unknown opcode ends each path. Every entry point and
+        reached target without a label gets one (sub_XXXX for call targets,
+        loc_XXXX otherwise); they are returned in labels and used for the
+        operands, but not added to address_labels. Words never reached are
+        listed as .WORD data, and so are reached words the assembler would
+        not encode back to the same bits: unknown opcodes, unused fields
+        that are set, and branches to targets the listing has no label for.
+        Each word is decoded at most once, so the cost is linear in the
+        image size.
+        """
+        table = self.decode_table()
+        count = len(machine_code)
+        end_address = start_address + 2 * count
+        
+        def index_of(address: int) -> Optional[int]:
+            if start_address <= address < end_address and (address - start_address) % 2 == 0:
+                return (address - start_address) // 2
+            return None
+        
+        if entry_points is None:
+            entries = [start_address] if count else []
+        else:
+            entries = list(entry_points)
+        worklist: List[int] = []
+        for address in entries:
+            index = index_of(address)
+            if index is None:
+                raise ValueError(f"Entry point 0x{address:04X} is not a word inside the image")
+            worklist.append(index)
+        
+        # Per word: 0 unreached, 1 one-word instruction, 2 two-word instruction, 3 its second word
+        kinds = bytearray(count)
+        successors: Dict[int, List[int]] = {}  # Index -> next addresses, for control transfers only
+        targets: Dict[int, str] = {}  # Reached target address -> label prefix
+        
+        while worklist:
+            index = worklist.pop()
+            while index < count and not kinds[index]:
+                word = machine_code[index]
+                address = start_address + 2 * index
+                entry = table[word] if 0 <= word <= 0xFFFF else None
+                fmt = entry.format if entry is not None else ''
+                size = 2 if fmt == 'X' and index + 1 < count else 1
+                kinds[index] = size
+                if size == 2:
+                    kinds[index + 1] = 3
+                after = address + 2 * size
+                
+                if fmt == 'J' or fmt == 'B' or (size == 2 and entry.fields[0] in self.ADDRESS_OPCODES):
+                    if fmt == 'J':
+                        target = entry.fields[0]
+                    elif fmt == 'B':
+                        target = address + 2 + entry.fields[1] * 2
+                    else:
+                        target = machine_code[index + 1]
+                    calls = fmt == 'X' and entry.fields[0] in self.CALL_OPCODES
+                    continues = fmt == 'B' or calls
+                    successors[index] = [target, after] if continues else [target]
+                    target_index = index_of(target)
+                    if target_index is not None:
+                        if calls or target not in targets:
+                            targets[target] = 'sub' if calls else 'loc'
+                        worklist.append(target_index)
+                    if not continues:
+                        break
+                elif entry is None or word == 0xFFFF or (fmt == '' and word != 0x0000) or \
+                        (fmt == 'X' and (size == 1 or entry.fields[0] in self.RETURN_OPCODES)):
+                    # HALT, RET, unknown opcodes and a truncated last instruction end the path
+                    successors[index] = []
+                    break
+                index += size
+        
+        labels: Dict[int, str] = {}
+        for address in entries:
+            labels[address] = self.address_labels.get(address) or f"entry_{address:04X}"
+        for address, prefix in targets.items():
+            if kinds[index_of(address)] in (1, 2):
+                labels.setdefault(address, self.address_labels.get(address) or f"{prefix}_{address:04X}")
+        
+        # Operands may only name labels the listing prints, i.e. not inside a two-word instruction
+        named = {address: label for address, label in self.address_labels.items()
+                 if index_of(address) is not None and kinds[index_of(address)] != 3}
+        named.update((address, label) for address, label in labels.items() if kinds[index_of(address)] != 3)
+        
+        instructions: List[DisassembledInstruction] = []
+        blocks: List[BasicBlock] = []
+        data: List[Tuple[int, int]] = []
+        block: Optional[BasicBlock] = None
+        index = 0
+        
+        while index < count:
+            address = start_address + 2 * index
+            kind = kinds[index]
+            if kind == 0:
+                word = machine_code[index]
+                instructions.append(DisassembledInstruction(address, word, '.WORD', f"0x{word & 0xFFFF:04X}", 'Data'))
+                if data and data[-1][1] == address:
+                    data[-1] = (data[-1][0], address + 2)
+                else:
+                    data.append((address, address + 2))
+                block = None
+                index += 1
+                continue
             
-            lines.append("  ".join(parts))
+            if block is None or address in labels:
+                if block is not None:
+                    block.successors.append(address)
+                block = BasicBlock(address, address)
+                blocks.append(block)
+            extension = machine_code[index + 1] if kind == 2 else None
+            instructions.append(self._reached(machine_code[index], address, extension, named))
+            block.end = address + 2 * kind
+            flow = successors.get(index)
+            if flow is not None:
+                block.successors.extend(flow)
+                block = None
+            index += kind
         
-        return '\n'.join(lines)
+        return RecursiveDisassembly(instructions, blocks, labels, data)
     
-    def disassemble_from_file(self, filename: str, start_address: int = 0) -> List[DisassembledInstruction]:
-        """Disassemble from binary file"""
-        with open(filename, 'rb') as f:
-            data = f.read()
+    def _reached(self, word: int, address: int, extension: Optional[int],
+                 labels: Dict[int, str]) -> DisassembledInstruction:
+        """A reached instruction, or .WORD when reassembling it would change its bits"""
+        if not 0 <= word <= 0xFFFF:
+            return self.disassemble_instruction(word, address, extension)
+        entry = self.decode_table()[word]
+        fmt = entry.format
+        reason = None
+        if fmt == '' and word not in (0x0000, 0xFFFF):
+            reason = entry.comment
+        elif fmt == 'R' and entry.mnemonic == 'NOT' and entry.fields[2]:
+            reason = "NOT with Rt set"
+        elif fmt == 'X' and (extension is None or word & 0xFF or
+                             (extension and entry.fields[0] not in self.ADDRESS_OPCODES)):
+            reason = f"{entry.mnemonic} with operand bits set" if extension is not None else \
+                f"{entry.mnemonic} without its second word"
+        elif fmt == 'B' and address + 2 + entry.fields[1] * 2 not in labels:
+            reason = f"{entry.mnemonic} to 0x{(address + 2 + entry.fields[1] * 2) & 0xFFFF:04X}, outside the listing"
         
-        # Convert bytes to 16-bit instructions (little-endian)
-        machine_code = []
-        for i in range(0, len(data), 2):
-            if i + 1 < len(data):
-                instruction = int.from_bytes(data[i:i+2], byteorder='little')
-                machine_code.append(instruction)
+        if reason is not None:
+            words = [word] if extension is None else [word, extension]
+            return DisassembledInstruction(address, word, '.WORD', ', '.join(f"0x{w:04X}" for w in words),
+                                           reason, extension)
+        if fmt in self.ADDRESSED_FORMATS:
+            operands, comment = self._render(entry, address, extension, labels)
+        else:
+            operands, comment = entry.operands, entry.comment
+        return DisassembledInstruction(address, word, entry.mnemonic, operands, comment,
+                                       extension if fmt == 'X' else None)
+    
+    def disassemble_recursive_to_string(self, machine_code: Sequence[int], start_address: int = 0,
+                                        entry_points: Optional[Iterable[int]] = None,
+                                        show_hex: bool = True, show_comments: bool = True) -> str:
+        """Recursive disassembly as a listing, each label on a line of its own
         
-        return self.disassemble(machine_code, start_address)
+        Without hex and comments, the listing of an image at address 0
+        assembles back to the same words.
+        """
+        result = self.disassemble_recursive(machine_code, start_address, entry_points)
+        lines = []
+        for instr in result.instructions:
+            label = result.labels.get(instr.address) or self.address_labels.get(instr.address)
+            if label is not None:
+                lines.append(f"{label}:")
+            lines.append(self.format_line(instr, show_hex, show_comments))
+        return '\n'.join(lines)
+    
+    def format_line(self, instr: DisassembledInstruction, show_hex: bool = True, show_comments: bool = True) -> str:
+        """One instruction formatted as in disassemble_to_string"""
+        line = f"{instr.address:04X}:  "
+        if show_hex:
+            if instr.extension is not None:
+                line += f"{instr.machine_code:04X} {instr.extension:04X}  "
+            else:
+                line += f"{instr.machine_code:04X}       "
+        line += f"{instr.mnemonic:6s} {instr.operands}" if instr.operands else f"{instr.mnemonic:6s}"
+        if show_comments and instr.comment:
+            line += f"  ; {instr.comment}"
+        return line
     
     def add_label(self, address: int, label: str) -> None:
         """Add a label for an address"""
@@ -309,6 +869,24 @@ def main():
     print("\n=== Assembly Only (no hex, no comments) ===")
     output_clean = disassembler.disassemble_to_string(machine_code, show_hex=False, show_comments=False)
     print(output_clean)
+    
+    print("\n=== Streamed (first five instructions) ===")
+    disassembler.disassemble_to_stream(machine_code[:5], sys.stdout, show_hex=False)
+    
+    print("\n=== Recursive Disassembly (labels synthesized, data marked) ===")
+    tracer = CVEREDisassembler()
+    print(tracer.disassemble_recursive_to_string(machine_code + [0x1234], entry_points=[0x0000, 0x000A],
+                                                 show_hex=False, show_comments=False))
+    
+    print("\n=== Bulk Decoding ===")
+    columns = disassembler.decode_bulk(machine_code)
+    classes = CVEREDisassembler.FORMAT_CLASSES
+    counts = {}
+    for code in columns.format:
+        name = classes[code] or 'other'
+        counts[name] = counts.get(name, 0) + 1
+    print("Formats:", ', '.join(f"{name} {count}" for name, count in counts.items()))
+    print("Destination registers:", ' '.join(f"R{rd:X}" for rd in columns.rd))
 
 
 if __name__ == "__main__":
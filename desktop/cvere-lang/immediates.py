@@ -0,0 +1,169 @@
+"""
+CVERE Immediate Synthesis - Cheapest instruction sequences for 16-bit constants
+"""
+
+from array import array
+from typing import Dict, List, Tuple
+
+from isa_designer import ISADesigner
+
+
+# One synthesized instruction: mnemonic and operands, with "{rd}" standing
+# for the destination register
+Step = Tuple[str, Tuple[str, ...]]
+
+UNREACHED = 0xFF
+
+# Cost tables are shared by every synthesizer with the same cycle model
+_TABLES: Dict[Tuple[int, ...], array] = {}
+
+
+class ImmediateSynthesizer:
+    """Finds the cheapest sequence that leaves a constant in one register
+
+    Only the destination register and R0 are used, so nothing else is
+    clobbered. The building blocks are LOADI (sign-extended imm8), ADDI
+    (unsigned imm8), ADD Rd, Rd, Rd (doubling), NOT Rd, Rd and
+    SUB Rd, R0, Rd (negation), each weighted by its ISA cycle count.
+
+    The first query builds a table of the cheapest cost of every 16-bit
+    value with Dial's shortest-path algorithm; each constant's sequence is
+    then walked back from that table and memoized.
+    """
+
+    def __init__(self, isa: ISADesigner):
+        def cycles(mnemonic: str) -> int:
+            spec = isa.get_instruction(mnemonic)
+            return spec.cycles if spec is not None else 0  # 0 marks it unavailable
+
+        self.loadi = cycles('LOADI')
+        self.addi = cycles('ADDI')
+        self.double = cycles('ADD')
+        self.invert = cycles('NOT')
+        self.negate = cycles('SUB')
+        if not self.loadi:
+            raise ValueError("Immediate synthesis needs a LOADI instruction")
+
+        self._memo: Dict[int, List[Step]] = {}
+        self._table = None
+
+    @property
+    def table(self) -> array:
+        """Cheapest cost in cycles of every 16-bit value"""
+        if self._table is None:
+            key = (self.loadi, self.addi, self.double, self.invert, self.negate)
+            if key not in _TABLES:
+                _TABLES[key] = self._build_table()
+            self._table = _TABLES[key]
+        return self._table
+
+    def cost(self, value: int) -> int:
+        """Cycles needed to load value"""
+        return self.table[value & 0xFFFF]
+
+    def sequence(self, value: int) -> List[Step]:
+        """Cheapest instruction sequence that loads value into {rd}"""
+        value &= 0xFFFF
+        steps = self._memo.get(value)
+        if steps is None:
+            steps = self._walk_back(value)
+            self._memo[value] = steps
+        return steps
+
+    def _build_table(self) -> array:
+        dist = array('B', [UNREACHED]) * 0x10000
+        buckets: Dict[int, set] = {self.loadi: set(range(0x80)) | set(range(0xFF80, 0x10000))}
+        settled = 0
+
+        while buckets and settled < 0x10000:
+            cost = min(buckets)
+            frontier = [value for value in buckets.pop(cost) if dist[value] == UNREACHED]
+            if not frontier:
+                continue
+            for value in frontier:
+                dist[value] = cost
+            settled += len(frontier)
+
+            if self.addi:
+                reached = buckets.setdefault(cost + self.addi, set())
+                # Adding 0..255 covers each run of consecutive values plus 255
+                frontier.sort()
+                start = end = frontier[0]
+                for value in frontier[1:] + [None]:
+                    if value is not None and value <= end + 256:
+                        end = value
+                        continue
+                    top = end + 256
+                    reached.update(range(start, min(top, 0x10000)))
+                    if top > 0x10000:
+                        reached.update(range(0, top - 0x10000))
+                    if value is not None:
+                        start = end = value
+            if self.double:
+                buckets.setdefault(cost + self.double, set()).update((v << 1) & 0xFFFF for v in frontier)
+            if self.invert:
+                buckets.setdefault(cost + self.invert, set()).update(~v & 0xFFFF for v in frontier)
+            if self.negate:
+                buckets.setdefault(cost + self.negate, set()).update(-v & 0xFFFF for v in frontier)
+
+        return dist
+
+    def _walk_back(self, value: int) -> List[Step]:
+        dist = self.table
+        if dist[value] == UNREACHED:
+            raise ValueError(f"Cannot synthesize constant 0x{value:04X} with this ISA")
+
+        steps: List[Step] = []
+        while True:
+            cost = dist[value]
+            if cost == self.loadi and (value < 0x80 or value >= 0xFF80):
+                steps.append(('LOADI', ('{rd}', f'0x{value & 0xFF:02X}')))
+                break
+
+            if self.double and not value & 1:
+                previous = next((half for half in (value >> 1, (value >> 1) | 0x8000)
+                                 if dist[half] + self.double == cost), None)
+                if previous is not None:
+                    steps.append(('ADD', ('{rd}', '{rd}', '{rd}')))
+                    value = previous
+                    continue
+            if self.invert and dist[~value & 0xFFFF] + self.invert == cost:
+                steps.append(('NOT', ('{rd}', '{rd}')))
+                value = ~value & 0xFFFF
+                continue
+            if self.negate and dist[-value & 0xFFFF] + self.negate == cost:
+                steps.append(('SUB', ('{rd}', 'R0', '{rd}')))
+                value = -value & 0xFFFF
+                continue
+            for addend in (range(255, 0, -1) if self.addi else ()):
+                previous = (value - addend) & 0xFFFF
+                if dist[previous] + self.addi == cost:
+                    steps.append(('ADDI', ('{rd}', f'0x{addend:02X}')))
+                    value = previous
+                    break
+            else:
+                raise AssertionError(f"Inconsistent cost table at 0x{value:04X}")
+
+        steps.reverse()
+        return steps
+
+
+def main():
+    """Example usage"""
+    import time
+
+    synthesizer = ImmediateSynthesizer(ISADesigner())
+    start = time.perf_counter()
+    synthesizer.cost(0)
+    print("=== CVERE Immediate Synthesis ===\n")
+    print(f"Cost table built in {time.perf_counter() - start:.2f}s")
+    print(f"Worst case: {max(synthesizer.table)} cycles\n")
+
+    for value in (0x0005, 0xFFF0, 0x0100, 0x1234, 0x8000, 0xBEEF):
+        steps = synthesizer.sequence(value)
+        body = '; '.join(f"{mnemonic} {', '.join(operands)}".format(rd='R1') for mnemonic, operands in steps)
+        print(f"0x{value:04X} ({synthesizer.cost(value)} cycles): {body}")
+
+
+if __name__ == "__main__":
+    main()
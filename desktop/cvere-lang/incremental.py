@@ -0,0 +1,312 @@
+"""
+CVERE Incremental Assembler - Re-encodes only the words an edit touches
+"""
+
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from assembler import CVEREAssembler, Instruction
+
+
+# (byte address, new machine word)
+Patch = Tuple[int, int]
+
+
+class AssemblySession:
+    """Keeps a parsed program in memory and applies source edits incrementally
+
+    Every source line keeps its parsed Instruction, and every label keeps the
+    instructions that reference it. An edit re-parses only the replaced lines
+    and re-encodes them together with the words whose label targets moved.
+    """
+
+    def __init__(self, assembler: Optional[CVEREAssembler] = None):
+        self.assembler = assembler if assembler is not None else CVEREAssembler()
+        # Shared with the assembler so its bound encoders resolve our labels
+        self.labels: Dict[str, int] = self.assembler.labels
+        self.lines: List[str] = []
+        self.entries: List[Optional[Instruction]] = []
+        self.line_labels: List[Optional[str]] = []
+        self.machine_code: List[int] = []
+        self.references: Dict[str, Dict[int, Instruction]] = {}
+        self.label_counts: Dict[str, int] = {}
+        self.pending: Dict[int, Instruction] = {}
+
+    @property
+    def source(self) -> str:
+        """Current source text"""
+        return '\n'.join(self.lines)
+
+    def load(self, source: str) -> List[int]:
+        """Assemble a whole source and reset the session state"""
+        lines = source.split('\n')
+        entries, line_labels, definitions, end = self._parse(lines, 0)
+        self.assembler.check_fits(end)
+
+        self.labels.clear()
+        self.references.clear()
+        self.label_counts.clear()
+        self.pending.clear()
+
+        self.lines, self.entries, self.line_labels = lines, entries, line_labels
+        self.machine_code = [0] * (end // 2)
+
+        for label, address in definitions:
+            self._define(label, address)
+        for instr in self.entries:
+            if instr is not None:
+                self._reference(instr)
+
+        self._encode([instr for instr in self.entries if instr is not None])
+        return self.machine_code
+
+    def update(self, source: str) -> List[Patch]:
+        """Diff a new full source against the current one and apply the change
+
+        Editors that know the edited line range should call replace_lines
+        directly; this helper has to compare lines to find it.
+        """
+        new_lines = source.split('\n')
+        old_lines = self.lines
+
+        start = 0
+        limit = min(len(old_lines), len(new_lines))
+        while start < limit and old_lines[start] == new_lines[start]:
+            start += 1
+
+        old_end = len(old_lines)
+        new_end = len(new_lines)
+        while old_end > start and new_end > start and old_lines[old_end - 1] == new_lines[new_end - 1]:
+            old_end -= 1
+            new_end -= 1
+
+        return self.replace_lines(start, old_end, new_lines[start:new_end])
+
+    def replace_lines(self, start: int, end: int, new_lines: List[str]) -> List[Patch]:
+        """Replace source lines [start, end) and return the changed words
+
+        Edits that keep the word count only touch the edited lines and their
+        label references. Edits that add or remove words shift the rest of
+        the image, so every word after the edit is part of the patch list.
+        Encoding errors raise ValueError after the edit has been applied; the
+        failing words stay zero and are retried on the next edit. An edit
+        that would grow the image past memory is refused before it applies.
+        """
+        old_labels = [label for label in self.line_labels[start:end] if label]
+        address = self._line_address(start)
+        old_end = self._line_address(end)
+
+        new_entries, new_line_labels, definitions, new_end = self._parse(new_lines, address)
+        self.assembler.check_fits(len(self.machine_code) * 2 + new_end - old_end)
+
+        # Duplicate definitions make "which one wins" depend on line order,
+        # which is cheaper to recompute than to track
+        new_label_names = [label for label, _ in definitions]
+        if any(self.label_counts.get(label, 0) > 1 for label in old_labels) or \
+                len(set(new_label_names)) != len(new_label_names) or \
+                any(label in self.label_counts and label not in old_labels for label in new_label_names):
+            lines = self.lines[:start] + new_lines + self.lines[end:]
+            self.load('\n'.join(lines))
+            return list(zip(range(0, len(self.machine_code) * 2, 2), self.machine_code))
+
+        # Forget the replaced lines
+        old_addresses = {label: self.labels[label] for label in old_labels}
+        for instr in self.entries[start:end]:
+            if instr is not None:
+                self._unreference(instr)
+                self.pending.pop(id(instr), None)
+        for label in old_labels:
+            self._undefine(label)
+
+        self.lines[start:end] = new_lines
+        self.entries[start:end] = new_entries
+        self.line_labels[start:end] = new_line_labels
+
+        # Shift everything after the edit when its size changed; otherwise
+        # keep the old words so unchanged ones produce no patch
+        delta = new_end - old_end
+        if delta:
+            self.machine_code[address // 2:old_end // 2] = [0] * ((new_end - address) // 2)
+        moved: Set[str] = set()
+        relative_tail: List[Instruction] = []
+        if delta:
+            tail = start + len(new_lines)
+            relative = self.assembler.label_operands
+            for instr, label in zip(self.entries[tail:], self.line_labels[tail:]):
+                if instr is not None:
+                    instr.address += delta
+                    if instr.opcode in relative and relative[instr.opcode][1]:
+                        relative_tail.append(instr)
+                if label:
+                    moved.add(label)
+            # The winning (last) definition of a tail label is in the tail too
+            for label in moved:
+                self.labels[label] += delta
+
+        # Register the new lines
+        for label, label_address in definitions:
+            self._define(label, label_address)
+        dirty: Dict[int, Instruction] = {}
+        for instr in new_entries:
+            if instr is not None:
+                self._reference(instr)
+                dirty[id(instr)] = instr
+
+        # Words whose label targets changed
+        changed = {label for label in old_labels if self.labels.get(label) != old_addresses[label]}
+        changed.update(label for label in new_label_names if old_addresses.get(label) != self.labels[label])
+        changed -= moved
+        for label in changed:
+            dirty.update(self.references.get(label, {}))
+
+        # A moved label only changes absolute references and branches that
+        # did not move with it
+        operands = self.assembler.label_operands
+        for label in moved:
+            for key, instr in self.references.get(label, {}).items():
+                entry = operands.get(instr.opcode)  # None for .WORD, which is absolute
+                if entry is None or not entry[1] or instr.address < new_end:
+                    dirty[key] = instr
+
+        # Branches that moved relative to a label that stayed put
+        for instr in relative_tail:
+            index = operands[instr.opcode][0]
+            if index < len(instr.operands) and instr.operands[index] not in moved:
+                dirty[id(instr)] = instr
+
+        # Retry words that failed to encode before (e.g. label not typed yet)
+        dirty.update(self.pending)
+        self.pending.clear()
+
+        patches = self._encode(dirty.values())
+        if delta:
+            # Everything from the edit onwards moved in the image
+            first = address // 2
+            head = [patch for patch in patches if patch[0] < address]
+            return head + list(zip(range(address, len(self.machine_code) * 2, 2), self.machine_code[first:]))
+        return patches
+
+    def _parse(self, lines: List[str], address: int) -> Tuple[List[Optional[Instruction]], List[Optional[str]],
+                                                              List[Tuple[str, int]], int]:
+        """Parse lines laid out from address; returns entries, labels, definitions and end address"""
+        tokenize = self.assembler.tokenize_line
+        size_of = self.assembler.size_of
+        entries: List[Optional[Instruction]] = []
+        line_labels: List[Optional[str]] = []
+        definitions: List[Tuple[str, int]] = []
+
+        for line_num, line in enumerate(lines, 1):
+            label, opcode, operands = tokenize(line)
+            if label:
+                definitions.append((label, address))
+            line_labels.append(label or None)
+
+            if opcode:
+                instr = Instruction(label=label, opcode=opcode, operands=operands,
+                                    line_num=line_num, address=address)
+                entries.append(instr)
+                address += size_of(instr)
+            else:
+                entries.append(None)
+
+        return entries, line_labels, definitions, address
+
+    def _line_address(self, line: int) -> int:
+        """Address of the first word at or after a line"""
+        for instr in self.entries[line:]:
+            if instr is not None:
+                return instr.address
+        return len(self.machine_code) * 2
+
+    def _define(self, label: str, address: int) -> None:
+        self.labels[label] = address
+        self.label_counts[label] = self.label_counts.get(label, 0) + 1
+
+    def _undefine(self, label: str) -> None:
+        self.label_counts[label] -= 1
+        if not self.label_counts[label]:
+            del self.label_counts[label]
+            del self.labels[label]
+
+    def _targets(self, instr: Instruction) -> List[str]:
+        """Operands of an instruction that may name a label"""
+        if instr.opcode in self.assembler.LABEL_DIRECTIVES:
+            return instr.operands
+        entry = self.assembler.label_operands.get(instr.opcode)
+        if entry is None or entry[0] >= len(instr.operands):
+            return []
+        return instr.operands[entry[0]:entry[0] + 1]
+
+    def _reference(self, instr: Instruction) -> None:
+        for target in self._targets(instr):
+            self.references.setdefault(target, {})[id(instr)] = instr
+
+    def _unreference(self, instr: Instruction) -> None:
+        for target in self._targets(instr):
+            refs = self.references.get(target)
+            if refs is not None:
+                refs.pop(id(instr), None)
+                if not refs:
+                    del self.references[target]
+
+    def _encode(self, instrs: Iterable[Instruction]) -> List[Patch]:
+        """Encode instructions in place and return the words that changed"""
+        code = self.machine_code
+        encode = self.assembler.encode_instruction
+        size_of = self.assembler.size_of
+        patches: List[Patch] = []
+        errors: List[Tuple[Instruction, Exception]] = []
+
+        for instr in instrs:
+            try:
+                words = encode(instr)
+            except (ValueError, IndexError) as e:
+                # Leave a zero word and retry on the next edit
+                self.pending[id(instr)] = instr
+                errors.append((instr, e))
+                words = (0,) * (size_of(instr) // 2)
+
+            index = instr.address // 2
+            for offset, word in enumerate(words):
+                if code[index + offset] != word:
+                    code[index + offset] = word
+                    patches.append((instr.address + offset * 2, word))
+
+        if errors:
+            instr, e = min(errors, key=lambda error: error[0].address)
+            line = next(i for i, entry in enumerate(self.entries, 1) if entry is instr)
+            raise ValueError(f"Line {line}: {e}")
+
+        patches.sort()
+        return patches
+
+
+def main():
+    """Example usage"""
+    source = """start:
+    LOADI R1, 0x00
+    LOADI R2, 0x0A
+loop:
+    ADDI  R1, 0x01
+    SUB   R3, R2, R1
+    BNE   R3, loop
+    JMP   done
+done:
+    HALT"""
+
+    session = AssemblySession()
+    print("=== CVERE Incremental Assembler ===\n")
+    print("Initial image:", ' '.join(f'{w:04X}' for w in session.load(source)))
+
+    print("\nEdit immediate on line 3:")
+    for address, word in session.replace_lines(2, 3, ["    LOADI R2, 0x14"]):
+        print(f"  {address:04X}: {word:04X}")
+
+    print("\nInsert an instruction before the loop:")
+    for address, word in session.replace_lines(3, 3, ["    NOP"]):
+        print(f"  {address:04X}: {word:04X}")
+
+    print("\nLabels:", {label: f'0x{addr:04X}' for label, addr in session.labels.items()})
+
+
+if __name__ == "__main__":
+    main()
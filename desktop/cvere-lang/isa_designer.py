@@ -3,10 +3,17 @@ CVERE ISA Designer - Interactive tool for designing and testing instruction enco
 """
 
 import json
-from typing import Dict, List, Optional, Tuple
+from array import array
+from itertools import repeat
+from typing import Dict, FrozenSet, List, Optional, Sequence, Tuple, Union
 from dataclasses import dataclass, asdict
 from enum import Enum
 
+try:
+    import numpy as np
+except ImportError:  # Bulk encoding then runs on array('H') without vectorization
+    np = None
+
 
 class InstructionFormat(Enum):
     """Instruction format types"""
@@ -19,6 +26,20 @@ class InstructionFormat(Enum):
     SPECIAL = "Special"    # Special cases
 
 
+# Operand fields of each single-word format below the 4-bit opcode:
+# (name, shift, bits, lowest, highest) with the accepted value range
+FIELD_LAYOUTS = {
+    InstructionFormat.R_TYPE: [("rd", 8, 4, 0, 15), ("rs", 4, 4, 0, 15), ("rt", 0, 4, 0, 15)],
+    InstructionFormat.I_TYPE: [("rd", 8, 4, 0, 15), ("imm", 0, 8, -0x80, 0xFF)],
+    InstructionFormat.M_TYPE: [("rd", 8, 4, 0, 15), ("rs", 4, 4, 0, 15), ("offset", 0, 4, 0, 15)],
+    InstructionFormat.J_TYPE: [("addr", 0, 12, 0, 0xFFF)],
+    InstructionFormat.B_TYPE: [("rc", 8, 4, 0, 15), ("offset", 0, 8, -0x80, 0x7F)],
+}
+
+# A field column: NumPy array, array.array, any integer sequence, or one int for every row
+Column = Union[int, Sequence[int]]
+
+
 @dataclass
 class InstructionSpec:
     """Specification for a single instruction"""
@@ -99,6 +120,21 @@ class ISADesigner:
             InstructionSpec("BNE", 0xF, InstructionFormat.B_TYPE,
                           "Branch if not equal to zero", ["Rc", "Offset"],
                           "BNE R1, loop", 1),
+            InstructionSpec("CALL", 0xFA, InstructionFormat.EXTENDED,
+                          "Call subroutine", ["Addr16"],
+                          "CALL routine", 2),
+            InstructionSpec("RET", 0xFB, InstructionFormat.EXTENDED,
+                          "Return from subroutine", [],
+                          "RET", 2),
+            InstructionSpec("PUSH", 0xFC, InstructionFormat.EXTENDED,
+                          "Push register to stack", ["Rs"],
+                          "PUSH R1", 2),
+            InstructionSpec("POP", 0xFD, InstructionFormat.EXTENDED,
+                          "Pop stack into register", ["Rd"],
+                          "POP R1", 2),
+            InstructionSpec("LJMP", 0xFE, InstructionFormat.EXTENDED,
+                          "Long jump to a 16-bit address", ["Addr16"],
+                          "LJMP far_label", 2),
             InstructionSpec("HALT", 0xFF, InstructionFormat.SPECIAL,
                           "Halt execution", [],
                           "HALT", 1),
@@ -126,8 +162,21 @@ class ISADesigner:
         """Get instruction specification"""
         return self.instructions.get(mnemonic)
     
+    def extended_opcodes(self) -> FrozenSet[int]:
+        """8-bit opcodes of the two-word instructions
+        
+        A single-word instruction whose top byte is one of these decodes as
+        the extended instruction instead (BNE on R10-R14 in the default ISA).
+        """
+        return frozenset(spec.opcode for spec in self.instructions.values()
+                         if spec.format == InstructionFormat.EXTENDED)
+    
     def encode_instruction(self, mnemonic: str, operands: List[int]) -> int:
-        """Encode an instruction with given operands"""
+        """Encode a single-word instruction with given operands
+        
+        Extended instructions take two words and are rejected; assemble
+        them with CVEREAssembler instead.
+        """
         spec = self.get_instruction(mnemonic)
         if not spec:
             raise ValueError(f"Unknown instruction: {mnemonic}")
@@ -147,8 +196,10 @@ class ISADesigner:
                 return 0x0000
             elif mnemonic == "HALT":
                 return 0xFFFF
+            return (spec.opcode << 12) & 0xFFFF
         
-        return 0
+        raise ValueError(f"{mnemonic} is a two-word {spec.format.value} instruction, "
+                         f"not a single word")
     
     def _encode_r_type(self, opcode: int, operands: List[int]) -> int:
         """Encode R-Type: [Op:4][Rd:4][Rs:4][Rt:4]"""
@@ -182,13 +233,126 @@ class ISADesigner:
         offset = operands[1] & 0xFF
         return (opcode << 12) | (rc << 8) | offset
     
-    def decode_instruction(self, machine_code: int) -> Tuple[str, List[int]]:
-        """Decode machine code to instruction and operands"""
+    def encode_bulk(self, fmt: InstructionFormat, opcodes: Union[str, Column], *fields: Column,
+                    validate: bool = True) -> Union[array, 'np.ndarray']:
+        """Encode many instructions of one format from field columns
+
+        opcodes is a mnemonic, an opcode, or a column of opcodes; fields
+        follow FIELD_LAYOUTS[fmt] (e.g. rd, rs, rt for R-Type). Negative
+        immediates and branch offsets are stored in two's complement.
+        With NumPy the whole batch is encoded (and validated) with array
+        operations and a uint16 ndarray is returned; without it the
+        result is an array('H'). Validation also rejects words that would
+        decode as an extended instruction, as the assembler does.
+        validate=False skips the checks and masks fields to their width.
+        """
+        layout = FIELD_LAYOUTS.get(fmt)
+        if layout is None:
+            raise ValueError(f"Bulk encoding supports {', '.join(f.value for f in FIELD_LAYOUTS)}, not {fmt.value}")
+        if len(fields) != len(layout):
+            raise ValueError(f"{fmt.value} takes the fields {', '.join(field[0] for field in layout)}, "
+                             f"got {len(fields)} columns")
+
+        if isinstance(opcodes, str):
+            spec = self.get_instruction(opcodes)
+            if spec is None or spec.format != fmt:
+                raise ValueError(f"{opcodes} is not a {fmt.value} instruction")
+            opcodes = spec.opcode
+        allowed = sorted(spec.opcode for spec in self.instructions.values() if spec.format == fmt)
+
+        # Checked up front so NumPy cannot broadcast a short column
+        lengths = {len(column) for column in (opcodes,) + tuple(fields)
+                   if not isinstance(column, int) and getattr(column, 'ndim', 1)}
+        if len(lengths) > 1:
+            raise ValueError(f"Field columns differ in length: {sorted(lengths)}")
+        count = lengths.pop() if lengths else 1
+
+        if np is not None:
+            words = self._encode_bulk_numpy(layout, allowed, opcodes, fields, validate)
+            if validate:
+                bad = np.isin(words >> 8, sorted(self.extended_opcodes()))
+                if bad.any():
+                    self._reject_extended(int(np.argmax(bad)), int(words[np.argmax(bad)]))
+            return words
+        words = self._encode_bulk_array(layout, allowed, opcodes, fields, validate, count)
+        if validate:
+            extended = self.extended_opcodes()
+            for index, word in enumerate(words):
+                if word >> 8 in extended:
+                    self._reject_extended(index, word)
+        return words
+
+    def _reject_extended(self, index: int, word: int) -> None:
+        raise ValueError(f"Word at row {index} would decode as extended instruction "
+                         f"{self.opcode_map[word >> 8]} (0x{word:04X})")
+
+    def _encode_bulk_numpy(self, layout, allowed: List[int], opcodes: Column,
+                           fields: Sequence[Column], validate: bool) -> 'np.ndarray':
+        ops = np.asarray(opcodes, dtype=np.int64)
+        columns = [np.asarray(column, dtype=np.int64) for column in fields]
+        if validate:
+            bad = ~np.isin(ops, allowed)
+            if bad.any():
+                index = int(np.argmax(bad)) if ops.ndim else 0
+                raise ValueError(f"Opcode at row {index} is not in this format: {int(ops.flat[index])}")
+            for (name, _, _, low, high), column in zip(layout, columns):
+                bad = (column < low) | (column > high)
+                if bad.any():
+                    index = int(np.argmax(bad)) if column.ndim else 0
+                    raise ValueError(f"Field {name} at row {index} out of range {low}..{high}: "
+                                     f"{int(column.flat[index])}")
+
+        words = (ops & 0xF) << 12
+        for (_, shift, bits, _, _), column in zip(layout, columns):
+            words = words | ((column & ((1 << bits) - 1)) << shift)
+        return np.ascontiguousarray(words, dtype=np.uint16).reshape(-1)
+
+    def _encode_bulk_array(self, layout, allowed: List[int], opcodes: Column,
+                           fields: Sequence[Column], validate: bool, count: int) -> array:
+        def rows(column: Column):
+            return repeat(column, count) if isinstance(column, int) else column
+
+        if validate:
+            checks = [("opcode", opcodes, allowed[0], allowed[-1])] + \
+                     [(name, column, low, high) for (name, _, _, low, high), column in zip(layout, fields)]
+            for name, column, low, high in checks:
+                values = [column] if isinstance(column, int) else column
+                if not count or (low <= min(values) and max(values) <= high and
+                                 (name != "opcode" or set(values) <= set(allowed))):
+                    continue
+                index, value = next((i, v) for i, v in enumerate(rows(column))
+                                    if not low <= v <= high or (name == "opcode" and v not in allowed))
+                if name == "opcode":
+                    raise ValueError(f"Opcode at row {index} is not in this format: {value}")
+                raise ValueError(f"Field {name} at row {index} out of range {low}..{high}: {value}")
+
+        words = [(op & 0xF) << 12 for op in rows(opcodes)]
+        for (_, shift, bits, _, _), column in zip(layout, fields):
+            mask = (1 << bits) - 1
+            words = [word | ((value & mask) << shift) for word, value in zip(words, rows(column))]
+        return array('H', words)
+
+    def decode_instruction(self, machine_code: int, extension: Optional[int] = None) -> Tuple[str, List[int]]:
+        """Decode machine code to instruction and operands
+        
+        The first word of an extended instruction decodes as that
+        instruction, not as the branch sharing its top four bits; an
+        address operand comes from the second word, passed as extension.
+        """
         if machine_code == 0x0000:
             return "NOP", []
         if machine_code == 0xFFFF:
             return "HALT", []
         
+        extended = self.instructions.get(self.opcode_map.get(machine_code >> 8, ''))
+        if extended is not None and extended.format == InstructionFormat.EXTENDED:
+            if extended.operands != ["Addr16"]:
+                return extended.mnemonic, []
+            if extension is None:
+                raise ValueError(f"{extended.mnemonic} takes its address from a second word: "
+                                 f"pass it as extension")
+            return extended.mnemonic, [extension & 0xFFFF]
+        
         opcode = (machine_code >> 12) & 0xF
         
         if opcode not in self.opcode_map:
@@ -271,7 +435,7 @@ class ISADesigner:
     def analyze_encoding_space(self) -> Dict[str, any]:
         """Analyze the encoding space usage"""
         total_opcodes = 16  # 4-bit opcode space
-        used_opcodes = len(set(self.opcode_map.keys()))
+        used_opcodes = len([op for op in self.opcode_map if op <= 0xF])
         
         format_counts = {}
         for spec in self.instructions.values():
@@ -327,6 +491,12 @@ class ISADesigner:
             visual.append("│ (4bit) │ (4bit) │     (8bit)      │")
             visual.append("└────────┴────────┴─────────────────┘")
             visual.append(" 15-12    11-8          7-0")
+        elif spec.format == InstructionFormat.EXTENDED and spec.operands == ["Addr16"]:
+            visual.append("┌─────────────────┬─────────────────┐┌───────────────────────────────────┐")
+            visual.append("│       Ext       │        0        ││              Addr16               │")
+            visual.append("│     (8bit)      │     (8bit)      ││              (16bit)              │")
+            visual.append("└─────────────────┴─────────────────┘└───────────────────────────────────┘")
+            visual.append("        15-8             7-0                   second word 15-0")
         
         return "\n".join(visual)
 
@@ -366,6 +536,11 @@ def main():
         decoded_mn, decoded_ops = designer.decode_instruction(encoded)
         print(f"{mnemonic} {operands} -> 0x{encoded:04X} -> {decoded_mn} {decoded_ops}")
     
+    # Bulk encoding: one column per field
+    print("\n=== Bulk Encoding ===")
+    words = designer.encode_bulk(InstructionFormat.R_TYPE, "ADD", [3, 4, 5], [1, 1, 1], [2, 3, 4])
+    print("ADD R3..R5, R1, R2..R4 ->", ' '.join(f"0x{int(word):04X}" for word in words))
+    
     # Generate documentation
     print("\n=== Generated Documentation ===")
     print(designer.generate_documentation())
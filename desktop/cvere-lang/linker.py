@@ -0,0 +1,154 @@
+"""
+CVERE Linker - Combines relocatable object modules into a final image
+"""
+
+from typing import Dict, List, Optional
+
+from assembler import CVEREAssembler, ObjectModule, RelocationType
+
+
+class CVERELinker:
+    """Lays object modules out back to back and resolves their relocations
+
+    A symbol referenced by a module resolves to that module's own definition
+    first, otherwise to the one module that defines it. Symbols defined by
+    several other modules are ambiguous and must be made local by the caller.
+    """
+
+    def __init__(self, base_address: int = 0):
+        if base_address % 2:
+            raise ValueError(f"Base address must be word aligned: 0x{base_address:04X}")
+        self.base_address = base_address
+        self.modules: List[ObjectModule] = []
+        self.module_bases: Dict[str, int] = {}
+        self.symbols: Dict[str, int] = {}
+        self.module_symbols: Dict[str, Dict[str, int]] = {}
+
+    def add_object(self, module: ObjectModule) -> None:
+        """Queue an object module for linking"""
+        self.modules.append(module)
+
+    def link(self) -> List[int]:
+        """Lay out all modules, resolve relocations and return the image"""
+        self.module_bases.clear()
+        self.symbols.clear()
+        self.module_symbols.clear()
+
+        # Layout and global symbol table
+        definitions: Dict[str, List[str]] = {}
+        address = self.base_address
+        for index, module in enumerate(self.modules):
+            name = module.name or f"module{index}"
+            if name in self.module_bases:
+                raise ValueError(f"Duplicate module name: {name}")
+            self.module_bases[name] = address
+            self.module_symbols[name] = {label: address + offset
+                                         for label, offset in module.symbols.items()}
+            for label in module.symbols:
+                definitions.setdefault(label, []).append(name)
+            address += len(module.code) * 2
+
+        if address > 0x10000:
+            raise ValueError(f"Linked image does not fit in memory: {address} bytes")
+
+        for label, owners in definitions.items():
+            if len(owners) == 1:
+                self.symbols[label] = self.module_symbols[owners[0]][label]
+
+        # Relocation
+        image: List[int] = []
+        for name, module in zip(self.module_bases, self.modules):
+            base = self.module_bases[name]
+            code = list(module.code)
+            local = self.module_symbols[name]
+
+            for reloc in module.relocations:
+                target = self._resolve(reloc.symbol, local, definitions, name)
+                index = reloc.address // 2
+                word = code[index]
+                address = base + reloc.address
+
+                if reloc.type == RelocationType.ABS12:
+                    if target > 0xFFF:
+                        raise ValueError(f"{name}: Jump target {reloc.symbol} out of range: 0x{target:04X}")
+                    code[index] = (word & 0xF000) | target
+                elif reloc.type == RelocationType.REL8:
+                    offset = (target - (address + 2)) // 2
+                    if offset < -128 or offset > 127:
+                        raise ValueError(f"{name}: Branch to {reloc.symbol} out of range: {offset}")
+                    code[index] = (word & 0xFF00) | (offset & 0xFF)
+                else:
+                    code[index] = target & 0xFFFF
+
+            image.extend(code)
+
+        return image
+
+    def _resolve(self, symbol: str, local: Dict[str, int],
+                 definitions: Dict[str, List[str]], module: str) -> int:
+        if symbol in local:
+            return local[symbol]
+        owners = definitions.get(symbol)
+        if not owners:
+            raise ValueError(f"{module}: Undefined symbol: {symbol}")
+        if len(owners) > 1:
+            raise ValueError(f"{module}: Ambiguous symbol {symbol} defined in {', '.join(owners)}")
+        return self.symbols[symbol]
+
+    def link_to_hex(self) -> str:
+        """Link and return the image as a hex string"""
+        return ' '.join(f'{word:04X}' for word in self.link())
+
+    def link_to_binary_file(self, filename: str) -> None:
+        """Link and write the image to a binary file"""
+        with open(filename, 'wb') as f:
+            f.write(b''.join(word.to_bytes(2, byteorder='little') for word in self.link()))
+
+
+def link_sources(sources: Dict[str, str], base_address: int = 0,
+                 assembler: Optional[CVEREAssembler] = None) -> List[int]:
+    """Assemble each named source to an object module and link them in order"""
+    assembler = assembler if assembler is not None else CVEREAssembler()
+    linker = CVERELinker(base_address)
+    for name, source in sources.items():
+        linker.add_object(assembler.assemble_object(source, name))
+    return linker.link()
+
+
+def main():
+    """Example usage"""
+    library = """; Shared routine library
+clamp:
+    LOADI R2, 0x10
+    SUB   R3, R2, R1
+    BNE   R3, done
+    LOADI R1, 0x0F
+done:
+    RET"""
+
+    program = """start:
+    LOADI R1, 0x20
+    CALL  clamp
+    JMP   finish
+finish:
+    HALT"""
+
+    assembler = CVEREAssembler()
+    main_obj = assembler.assemble_object(program, "main")
+    lib_obj = assembler.assemble_object(library, "lib")
+
+    print("=== CVERE Linker ===\n")
+    for obj in (main_obj, lib_obj):
+        print(f"{obj.name}: {len(obj.code)} words, symbols {obj.symbols}")
+        for reloc in obj.relocations:
+            print(f"  reloc 0x{reloc.address:04X} {reloc.type.value:5s} {reloc.symbol}")
+
+    linker = CVERELinker()
+    linker.add_object(main_obj)
+    linker.add_object(lib_obj)
+    print("\nImage:", linker.link_to_hex())
+    print("Symbols:", {label: f'0x{addr:04X}' for label, addr in linker.symbols.items()})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+"""
+CVERE Optimizer - Peephole passes run between the assembler's two passes
+"""
+
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+from assembler import CVEREAssembler, Instruction
+from isa_designer import InstructionFormat
+
+
+@dataclass
+class OptimizationReport:
+    """Words and cycles removed by one run of the peephole optimizer"""
+    words_before: int = 0
+    words_after: int = 0
+    # Pattern -> [instructions, words, cycles]
+    removed: Dict[str, List[int]] = field(default_factory=dict)
+    skipped: str = ""
+
+    @property
+    def words_saved(self) -> int:
+        return self.words_before - self.words_after
+
+    @property
+    def cycles_saved(self) -> int:
+        return sum(cycles for _, _, cycles in self.removed.values())
+
+    def format(self) -> str:
+        """Human readable summary"""
+        if self.skipped:
+            return f"Peephole optimizer skipped: {self.skipped}"
+
+        lines = [f"Peephole optimizer: {self.words_before} -> {self.words_after} words"]
+        for pattern, (count, words, cycles) in self.removed.items():
+            note = " (never executed)" if pattern == 'unreachable' else ""
+            lines.append(f"  {pattern:<12} {count:5d} removed {words:6d} words {cycles:6d} cycles{note}")
+        lines.append(f"  Saved {self.words_saved} words, ~{self.cycles_saved} cycles per pass through the code")
+        return '\n'.join(lines)
+
+
+class PeepholeOptimizer:
+    """Removes NOP padding, overwritten LOADIs and unreachable code
+
+    Use as an assembler pass: CVEREAssembler(passes=[PeepholeOptimizer()]).
+    Cycle estimates come from the ISA's cycles field. Unreachable code is
+    counted in words only, since it never executes. Each run's report is
+    returned and kept in report; verbose also prints it.
+    """
+
+    fingerprint = "PeepholeOptimizer-1"
+
+    PATTERNS = ['nop', 'dead_loadi', 'unreachable']
+
+    def __init__(self, verbose: bool = False):
+        self.verbose = verbose
+        self.report = OptimizationReport()
+
+    def __call__(self, assembler: CVEREAssembler) -> OptimizationReport:
+        self.report = self.optimize(assembler)
+        if self.verbose:
+            print(self.report.format())
+        return self.report
+
+    def optimize(self, assembler: CVEREAssembler) -> OptimizationReport:
+        """Optimize assembler.instructions in place and return the report"""
+        instructions = assembler.instructions
+        sizes = assembler.sizes
+        report = OptimizationReport(words_before=assembler.current_address // 2)
+        report.removed = {pattern: [0, 0, 0] for pattern in self.PATTERNS}
+
+        literal = assembler.literal_target()
+        if literal is not None:
+            report.words_after = report.words_before
+            report.skipped = f"Line {literal.line_num}: {literal.opcode} has a literal target"
+            return report
+
+        removed: Dict[int, str] = {}
+        label_addresses = set(assembler.labels.values())
+        reachable = True
+
+        for index, instr in enumerate(instructions):
+            if instr.address in label_addresses:
+                reachable = True
+
+            if not reachable:
+                if instr.opcode in sizes and instr.opcode not in assembler.DIRECTIVES:
+                    removed[index] = 'unreachable'
+                continue
+
+            if instr.opcode == 'NOP':
+                removed[index] = 'nop'
+            elif self._overwritten_loadi(assembler, index):
+                removed[index] = 'dead_loadi'
+            elif self._ends_block(assembler, instr):
+                reachable = False
+
+        for index, pattern in removed.items():
+            instr = instructions[index]
+            spec = assembler.isa.get_instruction(instr.opcode)
+            counts = report.removed[pattern]
+            counts[0] += 1
+            counts[1] += sizes[instr.opcode] // 2
+            if pattern != 'unreachable':
+                counts[2] += spec.cycles if spec is not None else 1
+
+        if removed:
+            assembler.rewrite_instructions({index: () for index in removed})
+        report.words_after = assembler.current_address // 2
+        return report
+
+    def _overwritten_loadi(self, assembler: CVEREAssembler, index: int) -> bool:
+        """LOADI whose register is loaded again before anything reads it"""
+        instructions = assembler.instructions
+        instr = instructions[index]
+        if instr.opcode != 'LOADI' or not instr.operands:
+            return False
+
+        # NOPs in between do not read the register
+        following = index + 1
+        while following < len(instructions) and instructions[following].opcode == 'NOP':
+            following += 1
+        if following == len(instructions):
+            return False
+
+        after = instructions[following]
+        if after.opcode != 'LOADI' or not after.operands:
+            return False
+        try:
+            return assembler.parse_register(instr.operands[0]) == assembler.parse_register(after.operands[0])
+        except ValueError:
+            return False
+
+    def _ends_block(self, assembler: CVEREAssembler, instr: Instruction) -> bool:
+        """Unconditional transfers: execution never falls through"""
+        return instr.opcode in ('HALT', 'RET') or instr.opcode in assembler.FAR_JUMPS.values() or \
+            assembler.formats.get(instr.opcode) == InstructionFormat.J_TYPE
+
+
+def main():
+    """Example usage"""
+    source = """start:
+    LOADI R1, 0x00
+    NOP
+    NOP
+    LOADI R1, 0x05      ; Overwrites the load above
+    LOADI R2, 0x0A
+loop:
+    ADDI  R1, 0x01
+    SUB   R3, R2, R1
+    BNE   R3, loop
+    JMP   done
+    ADD   R4, R4, R4    ; Never reached
+    NOP
+done:
+    HALT
+    LOADI R5, 0x01      ; Never reached"""
+
+    optimizer = PeepholeOptimizer()
+    plain = CVEREAssembler()
+    optimized = CVEREAssembler(passes=[optimizer])
+
+    print("=== CVERE Peephole Optimizer ===\n")
+    before = plain.assemble(source)
+    after = optimized.assemble(source)
+    print(optimizer.report.format())
+    print("\nBefore:", ' '.join(f'{w:04X}' for w in before))
+    print("After: ", ' '.join(f'{w:04X}' for w in after))
+    print("Labels:", {label: f'0x{addr:04X}' for label, addr in optimized.labels.items()})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,357 @@
+"""
+CVERE Register Allocator - Maps virtual registers (%t0, %t1, ...) onto R1-RF
+"""
+
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set, Tuple
+
+from assembler import CVEREAssembler, Instruction
+from isa_designer import InstructionFormat
+
+
+VIRTUAL_PREFIX = '%'
+SPILL_LABEL = '__spill_area'
+SPILL_SLOTS = 16  # M-Type offsets reach 16 words from the spill base
+
+
+@dataclass
+class Interval:
+    """Instruction range over which a virtual register holds a value"""
+    name: str
+    start: int
+    end: int
+    register: Optional[str] = None
+    slot: Optional[int] = None
+
+
+@dataclass
+class AllocationReport:
+    """Outcome of one register allocation"""
+    virtual: int = 0
+    registers: Dict[str, str] = field(default_factory=dict)  # virtual -> physical
+    spilled: Dict[str, int] = field(default_factory=dict)    # virtual -> slot
+    loads: int = 0
+    stores: int = 0
+
+    def format(self) -> str:
+        """Human readable summary"""
+        lines = [f"Register allocation: {self.virtual} virtual registers, "
+                 f"{len(self.spilled)} spilled, {self.loads} loads and {self.stores} stores inserted"]
+        for name, register in sorted(self.registers.items()):
+            lines.append(f"  {name:<8} -> {register}")
+        for name, slot in sorted(self.spilled.items()):
+            lines.append(f"  {name:<8} -> {SPILL_LABEL}[{slot}]")
+        return '\n'.join(lines)
+
+
+class RegisterAllocator:
+    """Linear-scan allocation of virtual registers as an assembler pass
+
+    Physical registers named anywhere in the program are left alone. The
+    remaining ones are handed out by linear scan over live intervals from
+    a liveness analysis of the control-flow graph. When registers run out,
+    the interval ending last is spilled to a slot of __spill_area, which
+    is appended after the code. Spilling reserves spill_base (set up with
+    LI at the program entry) and two scratch registers for the reloads.
+
+    A virtual register used as a branch condition never gets a register
+    the branch cannot encode (BNE on R10-R14 would read as an extended
+    instruction), which is also why the default scratch registers sit
+    below that range.
+
+    CALL is treated as falling through after visiting its target, and RET
+    as returning to every call site, so values live across a call are
+    kept out of the registers the callee's virtual registers use.
+    """
+
+    def __init__(self, registers: Optional[List[str]] = None, spill_base: str = 'R15',
+                 scratch: Tuple[str, str] = ('R8', 'R9'), verbose: bool = False):
+        self.registers = registers if registers is not None else [f'R{n}' for n in range(1, 16)]
+        self.spill_base = spill_base
+        self.scratch = scratch
+        self.verbose = verbose
+        self.report = AllocationReport()
+
+    @property
+    def fingerprint(self) -> str:
+        """Identifies the allocation this configuration produces, for assembly cache keys"""
+        return (f"RegisterAllocator-2:{','.join(self.registers)}:{self.spill_base}:"
+                f"{','.join(self.scratch)}")
+
+    def __call__(self, assembler: CVEREAssembler) -> None:
+        self.report = self.allocate(assembler)
+        if self.verbose:
+            print(self.report.format())
+
+    def allocate(self, assembler: CVEREAssembler) -> AllocationReport:
+        """Rewrite virtual registers in assembler.instructions in place"""
+        instructions = assembler.instructions
+        report = AllocationReport()
+        roles = [assembler.register_roles(instr) for instr in instructions]
+
+        virtual = {instr.operands[index] for instr, (uses, defs) in zip(instructions, roles)
+                   for index in uses + defs if instr.operands[index].startswith(VIRTUAL_PREFIX)}
+        report.virtual = len(virtual)
+        if not virtual:
+            return report
+
+        # Registers the program names itself are never handed out
+        fixed = {assembler.parse_register(instr.operands[index])
+                 for instr, (uses, defs) in zip(instructions, roles)
+                 for index in uses + defs if not instr.operands[index].startswith(VIRTUAL_PREFIX)}
+        available = [name for name in self.registers if assembler.parse_register(name) not in fixed]
+        excluded = self._excluded(assembler, instructions)
+
+        intervals = self._intervals(assembler, instructions, roles)
+        spilled = self._linear_scan(intervals, available, excluded)
+        if spilled:
+            reserved = {assembler.parse_register(name) for name in (self.spill_base,) + tuple(self.scratch)}
+            if reserved & fixed:
+                raise ValueError(f"Spill registers {self.spill_base}, {', '.join(self.scratch)} "
+                                 f"are used by the program")
+            available = [name for name in available if assembler.parse_register(name) not in reserved]
+            for interval in intervals:
+                interval.register = None
+            spilled = self._linear_scan(intervals, available, excluded)
+            
+            # A spilled branch condition is reloaded into the first scratch register
+            conditions = [interval.name for interval in spilled
+                          if self.scratch[0] in excluded.get(interval.name, ())]
+            if conditions:
+                raise ValueError(f"Scratch register {self.scratch[0]} cannot hold branch condition "
+                                 f"{conditions[0]}")
+            
+            # Spilled intervals that never overlap share a slot
+            slots = [str(slot) for slot in range(SPILL_SLOTS)]
+            spilled.sort(key=lambda interval: (interval.start, interval.name))
+            if self._linear_scan(spilled, slots):
+                raise ValueError(f"Too many spilled registers live at once (limit {SPILL_SLOTS})")
+            for interval in spilled:
+                interval.slot = int(interval.register)
+                interval.register = None
+
+        assigned = {interval.name: interval for interval in intervals}
+        for interval in intervals:
+            if interval.register is not None:
+                report.registers[interval.name] = interval.register
+            else:
+                report.spilled[interval.name] = interval.slot
+
+        replacements: Dict[int, List[Instruction]] = {}
+        for index, (instr, (uses, defs)) in enumerate(zip(instructions, roles)):
+            sequence = self._rewrite(instr, uses, defs, assigned, report)
+            if sequence is not None:
+                replacements[index] = sequence
+
+        if spilled:
+            literal = assembler.literal_target()
+            if literal is not None:
+                raise ValueError(f"Line {literal.line_num}: {literal.opcode} with a numeric target "
+                                 f"cannot be combined with spill code, which moves code")
+
+            # Point the spill base at the spill area on entry
+            first = instructions[0]
+            setup = Instruction(label=first.label, opcode='LI', operands=[self.spill_base, SPILL_LABEL],
+                                line_num=first.line_num)
+            replacements[0] = [setup] + replacements.get(0, [first])
+
+            assembler.labels[SPILL_LABEL] = assembler.current_address
+            for _ in range(max(interval.slot for interval in spilled) + 1):
+                instructions.append(Instruction(label=None, opcode='.WORD', operands=['0'], line_num=0,
+                                                address=assembler.current_address))
+                assembler.current_address += 2
+
+        if replacements:
+            assembler.rewrite_instructions(replacements)
+        return report
+
+    def _excluded(self, assembler: CVEREAssembler, instructions: List[Instruction]) -> Dict[str, Set[str]]:
+        """Registers each virtual register must avoid because a branch tests it"""
+        parse = assembler.parse_register
+        candidates = set(self.registers) | set(self.scratch)
+        excluded: Dict[str, Set[str]] = {}
+        for instr in instructions:
+            conflicts = assembler.branch_conflicts.get(instr.opcode)
+            if conflicts and instr.operands and instr.operands[0].startswith(VIRTUAL_PREFIX):
+                excluded.setdefault(instr.operands[0], set()).update(
+                    name for name in candidates if parse(name) in conflicts)
+        return excluded
+
+    def _successors(self, assembler: CVEREAssembler, instructions: List[Instruction]) -> List[List[int]]:
+        """Control-flow successors of every instruction"""
+        by_address = {instr.address: index for index, instr in enumerate(instructions)}
+        labels = assembler.labels
+
+        def target_index(operand: str) -> Optional[int]:
+            try:
+                address = labels[operand] if operand in labels else assembler.parse_immediate(operand)
+            except ValueError:
+                return None
+            return by_address.get(address)
+
+        returns = [index + 1 for index, instr in enumerate(instructions)
+                   if instr.opcode == 'CALL' and index + 1 < len(instructions)]
+        successors: List[List[int]] = []
+        for index, instr in enumerate(instructions):
+            fmt = assembler.formats.get(instr.opcode)
+            following = [index + 1] if index + 1 < len(instructions) else []
+            entry = assembler.label_operands.get(instr.opcode)
+            target = None
+            if entry is not None and entry[0] < len(instr.operands):
+                target = target_index(instr.operands[entry[0]])
+            targets = [target] if target is not None else []
+
+            if instr.opcode == 'HALT':
+                successors.append([])
+            elif instr.opcode == 'RET':
+                successors.append(returns)
+            elif fmt == InstructionFormat.J_TYPE or instr.opcode in assembler.FAR_JUMPS.values():
+                successors.append(targets)
+            else:
+                successors.append(following + targets)
+        return successors
+
+    def _intervals(self, assembler: CVEREAssembler, instructions: List[Instruction],
+                   roles: List[Tuple[List[int], List[int]]]) -> List[Interval]:
+        """Live intervals of the virtual registers from backward liveness"""
+        successors = self._successors(assembler, instructions)
+        uses = [{instr.operands[i] for i in used if instr.operands[i].startswith(VIRTUAL_PREFIX)}
+                for instr, (used, _) in zip(instructions, roles)]
+        defs = [{instr.operands[i] for i in defined if instr.operands[i].startswith(VIRTUAL_PREFIX)}
+                for instr, (_, defined) in zip(instructions, roles)]
+
+        live_in: List[Set[str]] = [set() for _ in instructions]
+        changed = True
+        while changed:
+            changed = False
+            for index in range(len(instructions) - 1, -1, -1):
+                live_out: Set[str] = set()
+                for successor in successors[index]:
+                    live_out |= live_in[successor]
+                new_in = uses[index] | (live_out - defs[index])
+                if new_in != live_in[index]:
+                    live_in[index] = new_in
+                    changed = True
+
+        spans: Dict[str, List[int]] = {}
+        for index in range(len(instructions)):
+            for name in live_in[index] | defs[index]:
+                span = spans.get(name)
+                if span is None:
+                    spans[name] = [index, index]
+                else:
+                    span[1] = index
+        return sorted((Interval(name, start, end) for name, (start, end) in spans.items()),
+                      key=lambda interval: (interval.start, interval.name))
+
+    def _linear_scan(self, intervals: List[Interval], available: List[str],
+                     excluded: Optional[Dict[str, Set[str]]] = None) -> List[Interval]:
+        """Assign registers in order of interval start; returns the spilled intervals
+
+        excluded maps interval names to registers they must not be given.
+        """
+        excluded = excluded or {}
+        free = list(reversed(available))
+        active: List[Interval] = []
+        spilled: List[Interval] = []
+
+        for interval in intervals:
+            for done in [other for other in active if other.end < interval.start]:
+                active.remove(done)
+                free.append(done.register)
+
+            barred = excluded.get(interval.name, ())
+            choice = next((index for index in range(len(free) - 1, -1, -1) if free[index] not in barred), None)
+            if choice is not None:
+                interval.register = free.pop(choice)
+                active.append(interval)
+                continue
+
+            # Spill whichever live interval ends last, among those holding a usable register
+            candidates = [other for other in active if other.register not in barred]
+            victim = max(candidates, key=lambda other: other.end) if candidates else None
+            if victim is not None and victim.end > interval.end:
+                interval.register = victim.register
+                victim.register = None
+                active.remove(victim)
+                active.append(interval)
+                spilled.append(victim)
+            else:
+                spilled.append(interval)
+        return spilled
+
+    def _rewrite(self, instr: Instruction, uses: List[int], defs: List[int],
+                 assigned: Dict[str, Interval], report: AllocationReport) -> Optional[List[Instruction]]:
+        """Rename an instruction's virtual registers, adding reloads and stores for spills"""
+        operands = instr.operands
+        if not any(operands[index].startswith(VIRTUAL_PREFIX) for index in uses + defs):
+            return None
+
+        before: List[Instruction] = []
+        after: List[Instruction] = []
+        loaded: Dict[str, str] = {}
+        renamed = list(operands)
+
+        # Sources first: each spilled one is reloaded into its own scratch
+        for index in uses:
+            name = operands[index]
+            if not name.startswith(VIRTUAL_PREFIX):
+                continue
+            interval = assigned[name]
+            if interval.register is not None:
+                renamed[index] = interval.register
+                continue
+            if name not in loaded:
+                loaded[name] = self.scratch[len(loaded)]
+                before.append(Instruction(label=None, opcode='LOAD',
+                                          operands=[loaded[name], self.spill_base, str(interval.slot)],
+                                          line_num=instr.line_num))
+                report.loads += 1
+            renamed[index] = loaded[name]
+
+        # Sources are read before the result is written, so a spilled
+        # destination can reuse the first scratch register
+        for index in defs:
+            name = operands[index]
+            if not name.startswith(VIRTUAL_PREFIX):
+                continue
+            interval = assigned[name]
+            if interval.register is not None:
+                renamed[index] = interval.register
+                continue
+            register = loaded.get(name, self.scratch[0])
+            renamed[index] = register
+            after.append(Instruction(label=None, opcode='STORE',
+                                     operands=[register, self.spill_base, str(interval.slot)],
+                                     line_num=instr.line_num))
+            report.stores += 1
+
+        instr.operands = renamed
+        return before + [instr] + after
+
+
+def main():
+    """Example usage"""
+    source = """; Sum of 2n for n = 5..1 with generator temporaries
+start:
+    LOADI %n, 0x05
+    LOADI %sum, 0x00
+    LOADI %one, 0x01
+loop:
+    ADD   %sq, %n, %n       ; %sq = 2n
+    ADD   %sum, %sum, %sq
+    SUB   %n, %n, %one
+    BNE   %n, loop
+    STORE %sum, R0, 0x0
+    HALT"""
+
+    print("=== CVERE Register Allocator ===\n")
+    for registers in (None, ['R1', 'R2', 'R3']):
+        allocator = RegisterAllocator(registers=registers, verbose=True)
+        assembler = CVEREAssembler(passes=[allocator])
+        code = assembler.assemble(source)
+        print("Code:", ' '.join(f'{w:04X}' for w in code), '\n')
+
+
+if __name__ == "__main__":
+    main()
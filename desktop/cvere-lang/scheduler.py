@@ -0,0 +1,298 @@
+"""
+CVERE Scheduler - Latency-aware list scheduling inside basic blocks
+"""
+
+from dataclasses import dataclass, field
+from typing import Dict, List, Set, Tuple, Union
+
+from assembler import CVEREAssembler, Instruction
+from isa_designer import InstructionFormat
+
+
+# Memory is ordered through this pseudo-register
+MEMORY = 'memory'
+
+# Instructions that touch memory beyond their register operands
+MEMORY_READS = ['LOAD', 'POP']
+MEMORY_WRITES = ['STORE', 'PUSH']
+STACK = ['PUSH', 'POP']  # Also read and write SP
+
+
+@dataclass
+class BlockReport:
+    """Estimated cycles of one basic block before and after scheduling"""
+    name: str
+    address: int
+    instructions: int
+    before: int
+    after: int
+
+
+@dataclass
+class ScheduleReport:
+    """Per-block outcome of one scheduling run"""
+    blocks: List[BlockReport] = field(default_factory=list)
+    skipped: str = ""
+
+    @property
+    def cycles_before(self) -> int:
+        return sum(block.before for block in self.blocks)
+
+    @property
+    def cycles_after(self) -> int:
+        return sum(block.after for block in self.blocks)
+
+    def format(self) -> str:
+        """Human readable summary"""
+        if self.skipped:
+            return f"Instruction scheduling skipped: {self.skipped}"
+
+        lines = ["Instruction scheduling (estimated cycles per block):"]
+        for block in self.blocks:
+            lines.append(f"  {block.name:<16} 0x{block.address:04X} {block.instructions:4d} instrs "
+                         f"{block.before:5d} -> {block.after:5d} cycles")
+        lines.append(f"  Total: {self.cycles_before} -> {self.cycles_after} cycles")
+        return '\n'.join(lines)
+
+
+class InstructionScheduler:
+    """Reorders independent instructions within each basic block
+
+    Cycle estimates assume an in-order pipeline that issues one instruction
+    per cycle and stalls until its operands are ready, where a result is
+    ready the number of ISA cycles after its instruction issues. A list
+    scheduler then fills those stalls with independent work, preferring
+    the instruction on the longest remaining latency path.
+
+    Register dependencies (read after write, write after read, write after
+    write) and the order of memory writes relative to all memory accesses
+    are kept. Control-flow instructions stay at the end of their block and
+    blocks start at every label, so no instruction crosses a jump target.
+    Programs with a numeric jump or branch target are left alone, since
+    reordering would move the instruction the number points at. Each
+    run's report is returned and kept in report; verbose also prints it.
+    """
+
+    fingerprint = "InstructionScheduler-2"
+
+    def __init__(self, verbose: bool = False):
+        self.verbose = verbose
+        self.report = ScheduleReport()
+
+    def __call__(self, assembler: CVEREAssembler) -> ScheduleReport:
+        self.report = self.schedule(assembler)
+        if self.verbose:
+            print(self.report.format())
+        return self.report
+
+    def schedule(self, assembler: CVEREAssembler) -> ScheduleReport:
+        """Schedule assembler.instructions in place and return the report"""
+        report = ScheduleReport()
+
+        literal = assembler.literal_target()
+        if literal is not None:
+            report.skipped = f"Line {literal.line_num}: {literal.opcode} has a literal target"
+            return report
+
+        names = {}
+        for label, address in assembler.labels.items():
+            names.setdefault(address, label)
+
+        replacements: Dict[int, List[Instruction]] = {}
+        registers: Dict[str, Union[int, str]] = {}
+        for start, end in self._blocks(assembler):
+            block = assembler.instructions[start:end]
+            predecessors = self._dependencies(assembler, block, registers)
+            order = self._list_schedule(assembler, block, predecessors)
+            before = self._estimate(assembler, block, predecessors, list(range(len(block))))
+            after = self._estimate(assembler, block, predecessors, order)
+            if after >= before:
+                order, after = list(range(len(block))), before
+            elif order != sorted(order):
+                replacements[start] = [block[index] for index in order]
+                for index in range(start + 1, end):
+                    replacements[index] = []
+
+            address = block[0].address
+            report.blocks.append(BlockReport(names.get(address, f'block_{address:04X}'), address,
+                                             len(block), before, after))
+
+        if replacements:
+            assembler.rewrite_instructions(replacements)
+        return report
+
+    def _blocks(self, assembler: CVEREAssembler) -> List[Tuple[int, int]]:
+        """[start, end) index ranges of the basic blocks worth scheduling"""
+        label_addresses = set(assembler.labels.values())
+        blocks: List[Tuple[int, int]] = []
+        start = 0
+
+        for index, instr in enumerate(assembler.instructions):
+            if instr.address in label_addresses and index > start:
+                blocks.append((start, index))
+                start = index
+            if self._is_barrier(assembler, instr):
+                # Data and unknown opcodes are never moved or moved across
+                if index > start:
+                    blocks.append((start, index))
+                start = index + 1
+            elif self._ends_block(assembler, instr):
+                blocks.append((start, index + 1))
+                start = index + 1
+        if start < len(assembler.instructions):
+            blocks.append((start, len(assembler.instructions)))
+        return [(start, end) for start, end in blocks if end - start > 1]
+
+    def _is_barrier(self, assembler: CVEREAssembler, instr: Instruction) -> bool:
+        return instr.opcode in assembler.DIRECTIVES or assembler.isa.get_instruction(instr.opcode) is None
+
+    def _ends_block(self, assembler: CVEREAssembler, instr: Instruction) -> bool:
+        return instr.opcode in ('HALT', 'RET', 'CALL') or instr.opcode in assembler.FAR_JUMPS.values() or \
+            assembler.formats.get(instr.opcode) in (InstructionFormat.J_TYPE, InstructionFormat.B_TYPE)
+
+    def _cycles(self, assembler: CVEREAssembler, instr: Instruction) -> int:
+        spec = assembler.isa.get_instruction(instr.opcode)
+        return spec.cycles if spec is not None else 1
+
+    def _dependencies(self, assembler: CVEREAssembler, block: List[Instruction],
+                      registers: Dict[str, Union[int, str]]) -> List[List[Tuple[int, int]]]:
+        """For each instruction, the (earlier index, latency) pairs it must wait for
+
+        registers memoizes operand text to register number (or virtual name).
+        """
+        def key(operand: str) -> Union[int, str]:
+            number = registers.get(operand)
+            if number is None:
+                number = registers[operand] = operand if operand.startswith('%') else \
+                    assembler.parse_register(operand)
+            return number
+
+        last_write: Dict[Union[int, str], int] = {}
+        reads_since: Dict[Union[int, str], List[int]] = {}
+        predecessors: List[List[Tuple[int, int]]] = []
+
+        for index, instr in enumerate(block):
+            uses, defs = assembler.register_roles(instr)
+            read = {key(instr.operands[i]) for i in uses}
+            written = {key(instr.operands[i]) for i in defs}
+            read.discard(0)  # R0 always reads zero and ignores writes
+            written.discard(0)
+            if instr.opcode in MEMORY_READS:
+                read.add(MEMORY)
+            if instr.opcode in MEMORY_WRITES:
+                written.add(MEMORY)
+            if instr.opcode in STACK:
+                read.add('SP')
+                written.add('SP')
+
+            edges: Dict[int, int] = {}
+            for resource in read:
+                writer = last_write.get(resource)
+                if writer is not None:
+                    edges[writer] = max(edges.get(writer, 0), self._cycles(assembler, block[writer]))
+            for resource in written:
+                writer = last_write.get(resource)
+                if writer is not None:
+                    edges[writer] = max(edges.get(writer, 0), 1)
+                for reader in reads_since.get(resource, []):
+                    edges[reader] = max(edges.get(reader, 0), 1)
+
+            # The block's last instruction may transfer control: keep it last
+            if index == len(block) - 1 and self._ends_block(assembler, instr):
+                for earlier in range(index):
+                    edges.setdefault(earlier, 1)
+
+            edges.pop(index, None)
+            predecessors.append(sorted(edges.items()))
+
+            for resource in read:
+                reads_since.setdefault(resource, []).append(index)
+            for resource in written:
+                last_write[resource] = index
+                reads_since[resource] = []
+
+        return predecessors
+
+    def _list_schedule(self, assembler: CVEREAssembler, block: List[Instruction],
+                       predecessors: List[List[Tuple[int, int]]]) -> List[int]:
+        """Issue order chosen cycle by cycle from the ready instructions"""
+        successors: List[List[Tuple[int, int]]] = [[] for _ in block]
+        for index, edges in enumerate(predecessors):
+            for earlier, latency in edges:
+                successors[earlier].append((index, latency))
+
+        # Longest latency path from each instruction to the end of the block
+        priority = [0] * len(block)
+        for index in range(len(block) - 1, -1, -1):
+            priority[index] = max([latency + priority[later] for later, latency in successors[index]],
+                                  default=self._cycles(assembler, block[index]))
+
+        waiting = [len(edges) for edges in predecessors]
+        earliest = [0] * len(block)
+        ready: Set[int] = {index for index, count in enumerate(waiting) if count == 0}
+        order: List[int] = []
+        cycle = 0
+
+        while ready:
+            # Prefer instructions that can issue now, then the critical path,
+            # then source order
+            choice = min(ready, key=lambda index: (max(earliest[index] - cycle, 0), -priority[index], index))
+            ready.remove(choice)
+            cycle = max(cycle, earliest[choice])
+            order.append(choice)
+            for later, latency in successors[choice]:
+                earliest[later] = max(earliest[later], cycle + latency)
+                waiting[later] -= 1
+                if not waiting[later]:
+                    ready.add(later)
+            cycle += 1
+
+        return order
+
+    def _estimate(self, assembler: CVEREAssembler, block: List[Instruction],
+                  predecessors: List[List[Tuple[int, int]]], order: List[int]) -> int:
+        """Cycles from the first issue until the last result is ready"""
+        issued: Dict[int, int] = {}
+        cycle = 0
+        finish = 0
+
+        for index in order:
+            for earlier, latency in predecessors[index]:
+                cycle = max(cycle, issued[earlier] + latency)
+            issued[index] = cycle
+            finish = max(finish, cycle + self._cycles(assembler, block[index]))
+            cycle += 1
+        return finish
+
+
+def main():
+    """Example usage"""
+    source = """; Sum two arrays element-wise
+start:
+    LOADI R1, 0x40      ; Array A
+    LOADI R2, 0x50      ; Array B
+    LOAD  R3, R1, 0x0
+    ADD   R3, R3, R3
+    LOAD  R4, R2, 0x0
+    ADD   R4, R4, R4
+    LOAD  R5, R1, 0x1
+    ADD   R6, R3, R4
+    LOAD  R7, R2, 0x1
+    ADD   R8, R5, R7
+    STORE R6, R1, 0x0
+    STORE R8, R1, 0x1
+    HALT"""
+
+    print("=== CVERE Instruction Scheduler ===\n")
+    scheduler = InstructionScheduler()
+    assembler = CVEREAssembler(passes=[scheduler])
+    code = assembler.assemble(source)
+    print(scheduler.report.format())
+    print()
+    for instr in assembler.instructions:
+        print(f"  0x{instr.address:04X}: {instr.opcode:<6} {', '.join(instr.operands)}")
+    print("\nCode:", ' '.join(f'{w:04X}' for w in code))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,6 @@
+"""Make the flat toolchain modules importable as they are in the scripts"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
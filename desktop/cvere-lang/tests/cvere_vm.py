@@ -0,0 +1,92 @@
+"""Minimal CVERE interpreter mirroring desktop/cvere-vm/src/vm.rs
+
+Only what the regression tests need to run assembled code: byte-addressed
+words, R0 hardwired to zero, LR set by CALL, no flags or privilege modes.
+"""
+
+from typing import List, Sequence
+
+
+class CVEREMachine:
+    """Executes a word image loaded at address 0 until HALT"""
+
+    def __init__(self, image: Sequence[int]):
+        self.memory = [0] * 0x8000
+        self.memory[:len(image)] = list(image)
+        self.regs: List[int] = [0] * 16
+        self.pc = 0
+        self.lr = 0
+        self.sp = 0xFFFE
+        self.halted = False
+
+    def fetch(self) -> int:
+        word = self.memory[self.pc // 2]
+        self.pc = (self.pc + 2) & 0xFFFF
+        return word
+
+    def write(self, reg: int, value: int) -> None:
+        if reg:
+            self.regs[reg] = value & 0xFFFF
+
+    def step(self) -> None:
+        word = self.fetch()
+        op, rd, rs, rt = word >> 12, (word >> 8) & 0xF, (word >> 4) & 0xF, word & 0xF
+        imm8 = word & 0xFF
+        regs = self.regs
+        if word == 0xFFFF:
+            self.halted = True
+        elif op == 0x0:
+            pass
+        elif op == 0xF and 0xA <= rd <= 0xE:
+            name = ('CALL', 'RET', 'PUSH', 'POP', 'LJMP')[rd - 0xA]
+            if name == 'CALL':
+                target = self.fetch()
+                self.lr, self.pc = self.pc, target
+            elif name == 'LJMP':
+                self.pc = self.fetch()
+            elif name == 'RET':
+                self.pc = self.lr
+            elif name == 'PUSH':
+                reg = (self.fetch() >> 8) & 0xF
+                self.sp = (self.sp - 2) & 0xFFFF
+                self.memory[self.sp // 2] = regs[reg]
+            else:
+                reg = (self.fetch() >> 8) & 0xF
+                self.write(reg, self.memory[self.sp // 2])
+                self.sp = (self.sp + 2) & 0xFFFF
+        elif op in (0xE, 0xF):
+            taken = (regs[rd] == 0) == (op == 0xE)
+            if taken:
+                offset = imm8 - 0x100 if imm8 & 0x80 else imm8
+                self.pc = (self.pc + offset * 2) & 0xFFFF
+        elif op == 0xD:
+            self.pc = word & 0xFFF
+        elif op == 0xC:
+            self.write(rd, imm8 | 0xFF00 if imm8 & 0x80 else imm8)
+        elif op == 0x2:
+            self.write(rd, regs[rd] + imm8)
+        elif op in (0xA, 0xB):
+            address = (regs[rs] + rt * 2) & 0xFFFF
+            if op == 0xA:
+                self.write(rd, self.memory[address // 2])
+            else:
+                self.memory[address // 2] = regs[rd]
+        else:
+            a, b = regs[rs], regs[rt]
+            result = {
+                0x1: lambda: a + b, 0x3: lambda: a - b, 0x4: lambda: a & b,
+                0x5: lambda: a | b, 0x6: lambda: a ^ b, 0x7: lambda: ~a,
+                0x8: lambda: a << (b & 0xF), 0x9: lambda: a >> (b & 0xF),
+            }[op]()
+            self.write(rd, result)
+
+    def run(self, max_steps: int = 100_000) -> 'CVEREMachine':
+        for _ in range(max_steps):
+            if self.halted:
+                return self
+            self.step()
+        raise RuntimeError(f"No HALT after {max_steps} steps (pc=0x{self.pc:04X})")
+
+
+def run(image: Sequence[int], max_steps: int = 100_000) -> CVEREMachine:
+    return CVEREMachine(image).run(max_steps)
@@ -0,0 +1,123 @@
+"""Content-addressed assembly cache"""
+
+import os
+
+import pytest
+
+from asm_cache import ENTRY_SUFFIX, AssemblyCache
+from assembler import CVEREAssembler
+from isa_designer import ISADesigner
+from optimizer import PeepholeOptimizer
+
+
+SOURCE = """start:  LOADI R1, 5
+loop:   ADDI  R1, -1
+        BNE   R1, loop
+        CALL  done
+done:   HALT
+"""
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return AssemblyCache(str(tmp_path / 'cache'))
+
+
+def entries(cache):
+    return sorted(name for name in os.listdir(cache.directory) if name.endswith(ENTRY_SUFFIX))
+
+
+def test_hit_restores_code_and_labels(cache):
+    plain = CVEREAssembler()
+    expected = plain.assemble(SOURCE)
+    first = CVEREAssembler(cache=cache)
+    assert list(first.assemble_words(SOURCE)) == expected
+    assert (cache.hits, cache.misses) == (0, 1)
+
+    second = CVEREAssembler(cache=cache)
+    assert list(second.assemble_words(SOURCE)) == expected
+    assert second.labels == plain.labels
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert second.assemble_to_hex(SOURCE) == plain.assemble_to_hex(SOURCE)
+    assert len(entries(cache)) == 1
+
+
+def changed_isa():
+    isa = ISADesigner()
+    isa.instructions['ADD'].description = "Add, revised"
+    return isa
+
+
+@pytest.mark.parametrize('configure', [
+    lambda cache: CVEREAssembler(cache=cache, passes=[PeepholeOptimizer()]),
+    lambda cache: CVEREAssembler(cache=cache, pool_register='R13'),
+    lambda cache: CVEREAssembler(cache=cache, isa=changed_isa()),
+])
+def test_configuration_changes_miss(cache, configure):
+    CVEREAssembler(cache=cache).assemble_words(SOURCE)
+    assembler = configure(cache)
+    assert list(assembler.assemble_words(SOURCE)) == CVEREAssembler().assemble(SOURCE)
+    assert (cache.hits, cache.misses) == (0, 2)
+    assert len(entries(cache)) == 2
+
+
+def test_relaxation_setting_misses(cache):
+    CVEREAssembler(cache=cache).assemble_words(SOURCE)
+    assembler = CVEREAssembler(cache=cache)
+    assembler.relax = False
+    assembler.assemble_words(SOURCE)
+    assert cache.misses == 2
+
+
+def test_source_edit_misses(cache):
+    assembler = CVEREAssembler(cache=cache)
+    assembler.assemble_words(SOURCE)
+    assembler.assemble_words(SOURCE.replace("LOADI R1, 5", "LOADI R1, 6"))
+    assert (cache.hits, cache.misses) == (0, 2)
+
+
+def test_least_recently_used_entries_are_evicted(cache):
+    sources = [f"LOADI R1, {n}\n.FILL 100\nHALT" for n in range(3)]
+    keys = [cache.key(source, 'isa') for source in sources]
+    cache.put(keys[0], CVEREAssembler().assemble(sources[0]), {})
+    size = os.path.getsize(cache._path(keys[0]))
+    cache.max_bytes = 2 * size
+
+    cache.put(keys[1], CVEREAssembler().assemble(sources[1]), {})
+    os.utime(cache._path(keys[0]), (0, 0))
+    os.utime(cache._path(keys[1]), (1, 1))
+    assert cache.get(keys[0]) is not None  # Refreshes key 0, so key 1 is now the oldest
+    cache.put(keys[2], CVEREAssembler().assemble(sources[2]), {})
+
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[0]) is not None and cache.get(keys[2]) is not None
+    assert len(entries(cache)) == 2
+
+
+def test_incompatible_entry_is_dropped(cache):
+    key = cache.key(SOURCE, 'isa')
+    with open(cache._path(key), 'wb') as f:
+        f.write(b'CVAC\x63\x00')
+    assert cache.get(key) is None
+    assert entries(cache) == []
+
+
+def test_clear_removes_every_entry(cache):
+    assembler = CVEREAssembler(cache=cache)
+    assembler.assemble_words(SOURCE)
+    assembler.assemble_words("HALT")
+    cache.clear()
+    assert entries(cache) == []
+    assembler.assemble_words(SOURCE)
+    assert cache.misses == 3
+
+
+def test_incbin_sources_bypass_the_cache(cache, tmp_path):
+    data = tmp_path / 'data.bin'
+    data.write_bytes(b'\x34\x12')
+    source = f'.INCBIN "{data}"\nHALT'
+    assembler = CVEREAssembler(cache=cache)
+    assert list(assembler.assemble_words(source)) == [0x1234, 0xFFFF]
+    data.write_bytes(b'\x78\x56')
+    assert list(assembler.assemble_words(source)) == [0x5678, 0xFFFF]
+    assert (cache.hits, cache.misses) == (0, 0) and entries(cache) == []
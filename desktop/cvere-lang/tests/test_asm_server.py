@@ -0,0 +1,168 @@
+"""Toolchain server protocol"""
+
+import io
+import os
+import shutil
+import socket
+import sys
+import tempfile
+import threading
+
+import pytest
+
+from asm_server import AssemblerClient, AssemblerServer, Toolchain, read_message, write_message
+from assembler import CVEREAssembler
+
+
+def frames(*messages):
+    stream = io.BytesIO()
+    for message in messages:
+        write_message(stream, message)
+    stream.seek(0)
+    return stream
+
+
+def replies(stream):
+    stream.seek(0)
+    found = {}
+    while True:
+        message = read_message(stream)
+        if message is None:
+            return found
+        found[message['id']] = message
+
+
+@pytest.fixture(scope='module')
+def toolchain():
+    return Toolchain()
+
+
+@pytest.mark.parametrize('op', [[], {'op': 'ping'}, None, 3, 'bogus'])
+def test_unknown_or_malformed_op_is_an_error_reply(toolchain, op):
+    reply = toolchain.handle({'id': 7, 'op': op})
+    assert reply['id'] == 7 and reply['ok'] is False
+    assert reply['error'].startswith("Unknown op")
+
+
+@pytest.mark.parametrize('request_fields, error', [
+    ({'op': 'assemble'}, "Missing or unknown 'source'"),
+    ({'op': 'assemble', 'source': 'FOO R1'}, "FOO"),
+    ({'op': 'assemble', 'source': 'HALT', 'encoding': 'hex'}, "Unknown encoding"),
+    ({'op': 'disassemble', 'words': [1], 'labels': ['start']}, ""),
+    ({'op': 'decode', 'word': 'x'}, ""),
+    ({'op': 'encode', 'mnemonic': 'CALL', 'operands': [0x1234]}, "two-word"),
+    ({'op': 'decode', 'word': 0xFA00}, "second word"),
+])
+def test_bad_requests_are_error_replies(toolchain, request_fields, error):
+    reply = toolchain.handle(dict(request_fields, id=1))
+    assert reply['ok'] is False and error in reply['error']
+
+
+@pytest.mark.parametrize('workers', [0, 1])
+def test_pipelined_requests_over_a_stream(workers):
+    writer = io.BytesIO()
+    with AssemblerServer(workers=workers) as server:
+        server.serve_stream(frames(
+            {'id': 1, 'op': 'assemble', 'source': 'start: LOADI R1, 5\nHALT'},
+            {'id': 2, 'op': 'assemble', 'source': 'HALT', 'encoding': 'base64'},
+            {'id': 3, 'op': 'disassemble', 'words': [0xC105, 0xFFFF], 'labels': {'start': 0}},
+            {'id': 4, 'op': 'encode', 'mnemonic': 'ADD', 'operands': [3, 1, 2]},
+            {'id': 5, 'op': 'decode', 'word': 0x1312},
+            {'id': 6, 'op': []},
+            {'id': 7, 'op': 'ping'},
+        ), writer)
+    got = replies(writer)
+    assert sorted(got) == [1, 2, 3, 4, 5, 6, 7]
+    assert got[1] == {'id': 1, 'ok': True, 'words': [0xC105, 0xFFFF], 'labels': {'start': 0}}
+    assert got[2]['data'] == '//8='
+    assert 'LOADI' in got[3]['text'] and 'HALT' in got[3]['text']
+    assert got[4]['word'] == 0x1312
+    assert got[5]['mnemonic'] == 'ADD'
+    assert got[6]['ok'] is False
+    assert got[7] == {'id': 7, 'ok': True}
+
+
+def test_decode_takes_the_second_word_of_extended_instructions(toolchain):
+    reply = toolchain.handle({'id': 1, 'op': 'decode', 'word': 0xFA00, 'extension': 0x1234})
+    assert (reply['mnemonic'], reply['operands']) == ('CALL', [0x1234])
+
+
+def test_broken_framing_ends_the_stream_with_an_error():
+    writer = io.BytesIO()
+    with AssemblerServer(workers=0) as server:
+        server.serve_stream(io.BytesIO(b'\x00\x00\x00\x03{x}'), writer)
+    (reply,) = replies(writer).values()
+    assert reply['ok'] is False
+
+
+@pytest.mark.skipif(not hasattr(socket, 'AF_UNIX'), reason="needs Unix domain sockets")
+def test_inline_server_keeps_concurrent_connections_apart():
+    # workers=0 shares one Toolchain between the connection threads
+    sources = [f"base{n}:\n" + '\n'.join(f"l{n}_{i}: ADDI R1, {n}\n BNE R1, l{n}_{i}" for i in range(300))
+               + "\nHALT" for n in range(4)]
+    expected = []
+    for source in sources:
+        assembler = CVEREAssembler()
+        expected.append((assembler.assemble(source), dict(assembler.labels)))
+
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, 'asm.sock')
+    server = AssemblerServer(workers=0)
+    ready = threading.Event()
+    threading.Thread(target=server.serve_unix, args=(path, ready), daemon=True).start()
+    assert ready.wait(10)
+    failures = []
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-5)  # Switch threads often enough to interleave requests
+
+    def client(n):
+        with AssemblerClient(path) as connection:
+            for _ in range(15):
+                reply = connection.request('assemble', source=sources[n])
+                if (reply['words'], reply['labels']) != expected[n]:
+                    failures.append(n)
+
+    try:
+        threads = [threading.Thread(target=client, args=(n,)) for n in range(len(sources))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        sys.setswitchinterval(interval)
+        shutil.rmtree(directory)
+    assert not failures
+
+
+@pytest.fixture
+def files(tmp_path):
+    inside = tmp_path / 'inc'
+    inside.mkdir()
+    (inside / 'data.bin').write_bytes(b'\x34\x12')
+    secret = tmp_path / 'secret.bin'
+    secret.write_bytes(b'\xEF\xBE')
+    (inside / 'link.bin').symlink_to(secret)
+    return str(inside), str(secret)
+
+
+def test_incbin_is_refused_without_an_include_directory(toolchain, files):
+    _, secret = files
+    reply = toolchain.handle({'id': 1, 'op': 'assemble', 'source': f'.INCBIN "{secret}"'})
+    assert reply['ok'] is False and ".INCBIN is disabled" in reply['error']
+
+
+@pytest.mark.parametrize('workers', [0, 1])
+def test_incbin_is_confined_to_the_include_directory(files, workers):
+    inside, secret = files
+    writer = io.BytesIO()
+    with AssemblerServer(workers=workers, include_dir=inside) as server:
+        server.serve_stream(frames(
+            {'id': 1, 'op': 'assemble', 'source': '.INCBIN data.bin'},
+            {'id': 2, 'op': 'assemble', 'source': f'.INCBIN "{secret}"'},
+            {'id': 3, 'op': 'assemble', 'source': '.INCBIN ../secret.bin'},
+            {'id': 4, 'op': 'assemble', 'source': '.INCBIN link.bin'},
+        ), writer)
+    got = replies(writer)
+    assert got[1]['words'] == [0x1234]
+    for refused in (2, 3, 4):
+        assert got[refused]['ok'] is False and "outside the include directory" in got[refused]['error']
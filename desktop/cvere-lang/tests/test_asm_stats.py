@@ -0,0 +1,53 @@
+"""Assembler statistics"""
+
+import tracemalloc
+
+from assembler import CVEREAssembler
+
+
+BLOCK = "loop{0}:\n    LOADI R1, 0x05\n    ADD   R3, R1, R2\n\n    BNE   R3, loop{0}"
+SOURCE = '\n'.join(BLOCK.format(i) for i in range(2000)) + '\n    HALT'
+
+
+def peak_bytes(assembler):
+    tracemalloc.start()
+    try:
+        assembler.assemble_words(SOURCE)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def test_counts_lines_and_instructions():
+    assembler = CVEREAssembler()
+    profiler = assembler.enable_stats()
+    assembler.assemble_words(SOURCE)
+    stats = profiler.last
+    assert (stats.programs, stats.lines, stats.instructions) == (1, 10001, 6001)
+    assert 'first_pass' in stats.phases
+
+
+def test_stats_do_not_raise_peak_memory():
+    # Lines stream through the first pass as they do without stats
+    plain = peak_bytes(CVEREAssembler(compact=True))
+    profiled = CVEREAssembler(compact=True)
+    profiled.enable_stats()
+    assert peak_bytes(profiled) < plain * 1.1
+
+
+def test_streaming_counts_match_two_pass_assembly(tmp_path):
+    source = SOURCE + "\n    CALL loop0\n    .BYTE 1, 2, 3\n    .WORD loop1, later\nlater: .FILL 3"
+    assembler = CVEREAssembler()
+    encoders = assembler.encoders
+    profiler = assembler.enable_stats()
+    assembler.assemble_words(source)
+    expected = profiler.last
+
+    assembler.assemble_stream(source.split('\n'), lambda address, word: None)
+    streamed = profiler.last
+    assembler.assemble_stream_to_binary_file(source.split('\n'), str(tmp_path / 'out.bin'))
+    written = profiler.last
+    for stats in (streamed, written):
+        assert (stats.lines, stats.instructions, stats.words, stats.formats) == \
+            (expected.lines, expected.instructions, expected.words, expected.formats)
+    assert assembler.encoders is encoders
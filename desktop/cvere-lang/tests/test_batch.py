@@ -0,0 +1,60 @@
+"""Batch assembly of named programs"""
+
+import pytest
+
+from asm_cache import AssemblyCache
+from assembler import CVEREAssembler
+
+
+PROGRAMS = {
+    'count': "start: LOADI R1, 3\nloop: ADDI R1, -1\n BNE R1, loop\n HALT",
+    'call': " CALL sub\n HALT\nsub: ADD R2, R1, R1\n RET",
+    'data': " JMP end\nvalues: .WORD 1, 2, values\nend: HALT",
+}
+
+
+def check_batch(result):
+    offset = 0
+    for name, source in PROGRAMS.items():
+        assembler = CVEREAssembler()
+        expected = assembler.assemble(source)
+        assert result.index[name] == (offset, len(expected))
+        assert list(result.program(name)) == expected
+        assert result.symbols[name] == assembler.labels
+        offset += len(expected)
+    assert len(result.code) == offset
+
+
+@pytest.mark.parametrize('as_pairs', [False, True])
+def test_programs_are_packed_back_to_back(as_pairs):
+    sources = list(PROGRAMS.items()) if as_pairs else PROGRAMS
+    result = CVEREAssembler().assemble_batch(sources)
+    check_batch(result)
+    assert result.to_bytes() == b''.join(
+        CVEREAssembler().assemble_bytes(source).tobytes() for source in PROGRAMS.values())
+
+
+def test_batch_through_the_cache(tmp_path):
+    cache = AssemblyCache(str(tmp_path))
+    assembler = CVEREAssembler(cache=cache)
+    check_batch(assembler.assemble_batch(PROGRAMS))
+    check_batch(assembler.assemble_batch(PROGRAMS))
+    assert (cache.hits, cache.misses) == (3, 3)
+
+
+def test_symbols_do_not_leak_between_programs():
+    assembler = CVEREAssembler()
+    result = assembler.assemble_batch([('a', "here: HALT"), ('b', "there: HALT")])
+    assert result.symbols == {'a': {'here': 0}, 'b': {'there': 0}}
+    with pytest.raises(ValueError, match="b: .*here"):
+        assembler.assemble_batch([('a', "here: HALT"), ('b', " JMP here")])
+
+
+def test_duplicate_names_are_rejected():
+    with pytest.raises(ValueError, match="Duplicate program name: count"):
+        CVEREAssembler().assemble_batch([('count', "HALT"), ('count', "NOP")])
+
+
+def test_errors_name_the_program():
+    with pytest.raises(ValueError, match="^broken: .*FROB"):
+        CVEREAssembler().assemble_batch([('fine', "HALT"), ('broken', "FROB R1")])
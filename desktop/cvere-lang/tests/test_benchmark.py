@@ -0,0 +1,54 @@
+"""Benchmark history comparison"""
+
+import pytest
+
+import benchmark
+from assembler import CVEREAssembler
+from benchmark import compare_runs
+
+
+def run(lines_per_sec, **settings):
+    recorded = {"generator": benchmark.GENERATOR_VERSION, "seed": 0, "compact": False,
+                "repeat": 3, "memory": True}
+    recorded.update(settings)
+    recorded["results"] = [{"kind": "label_dense", "lines": 1000, "target": "assemble",
+                            "lines_per_sec": lines_per_sec, "peak_bytes": 1000}]
+    return recorded
+
+
+def test_flags_throughput_regression():
+    changes = compare_runs(run(1000.0), run(800.0))
+    assert [change["regressed"] for change in changes] == [True]
+    assert not compare_runs(run(1000.0), run(950.0))[0]["regressed"]
+
+
+@pytest.mark.parametrize('setting', [{"compact": True}, {"seed": 1}, {"repeat": 5},
+                                     {"memory": False}, {"generator": 1}])
+def test_refuses_runs_configured_differently(setting):
+    with pytest.raises(ValueError, match=next(iter(setting))):
+        compare_runs(run(1000.0), run(500.0, **setting))
+    assert compare_runs(run(1000.0), run(500.0, **setting), force=True)[0]["regressed"]
+
+
+def test_compare_command_refuses_without_force(tmp_path, capsys):
+    history = str(tmp_path / "history.json")
+    common = ['run', '--kinds', 'label_dense', '--sizes', '200', '--targets', 'assemble',
+              '--repeat', '1', '--no-memory', '--history', history]
+    assert benchmark.main(common) == 0
+    assert benchmark.main(common + ['--compact']) == 0
+    capsys.readouterr()
+    assert benchmark.main(['compare', '--history', history]) == 2
+    assert "compact: False != True" in capsys.readouterr().out
+    assert benchmark.main(['compare', '--history', history, '--force', '--threshold', '100']) == 0
+    assert "WARNING: settings differ" in capsys.readouterr().out
+
+
+def test_large_sizes_are_split_into_programs_that_fit():
+    sources = benchmark.generate_programs('label_dense', 2 * benchmark.PROGRAM_LINES + 10)
+    assert len(sources) == 3 and len(set(sources)) == 3
+    assert sources[0] == benchmark.generate_program('label_dense', benchmark.PROGRAM_LINES)
+
+
+@pytest.mark.parametrize('kind', list(benchmark.PROGRAM_KINDS))
+def test_largest_generated_program_assembles(kind):
+    CVEREAssembler().assemble_words(benchmark.generate_program(kind, benchmark.PROGRAM_LINES, part=1))
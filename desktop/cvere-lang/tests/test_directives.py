@@ -0,0 +1,61 @@
+"""Data directives"""
+
+import pytest
+
+from assembler import CVEREAssembler
+
+
+def test_data_words_and_labels():
+    source = """        JMP   end
+table:  .word 0x1234, -1, table, end
+text:   .byte 0x48, 0x69, 0x21
+buffer: .fill 3, 0xBEEF
+zeros:  .FILL 2
+end:    HALT
+"""
+    assembler = CVEREAssembler()
+    code = assembler.assemble(source)
+    assert assembler.labels == {'table': 2, 'text': 10, 'buffer': 14, 'zeros': 20, 'end': 24}
+    assert code == [0xD018,
+                    0x1234, 0xFFFF, 0x0002, 0x0018,
+                    0x6948, 0x0021,
+                    0xBEEF, 0xBEEF, 0xBEEF,
+                    0x0000, 0x0000,
+                    0xFFFF]
+
+
+def test_byte_pairs_are_little_endian():
+    assert CVEREAssembler().assemble(".BYTE 1, 2, -1, 0x80") == [0x0201, 0x80FF]
+    assert CVEREAssembler().assemble_bytes(".BYTE 1, 2, 3").tobytes() == b'\x01\x02\x03\x00'
+
+
+@pytest.mark.parametrize('data, words', [
+    (b'', []),
+    (b'\x34\x12', [0x1234]),
+    (b'\x34\x12\x7F', [0x1234, 0x007F]),
+])
+def test_incbin_includes_file_bytes(tmp_path, data, words):
+    (tmp_path / 'blob.bin').write_bytes(data)
+    assembler = CVEREAssembler()
+    assembler.include_dir = str(tmp_path)
+    code = assembler.assemble('start: .INCBIN "blob.bin"\nafter: HALT')
+    assert code == words + [0xFFFF]
+    assert assembler.labels['after'] == len(words) * 2
+
+
+@pytest.mark.parametrize('source, error', [
+    (".WORD", ".WORD needs at least one value"),
+    (".WORD 0x10000", ".WORD value out of 16-bit range"),
+    (".BYTE", ".BYTE needs at least one value"),
+    (".BYTE 0x100", ".BYTE value out of 8-bit range"),
+    (".BYTE -129", ".BYTE value out of 8-bit range"),
+    (".FILL", ".FILL takes a count and an optional value"),
+    (".FILL 1, 2, 3", ".FILL takes a count and an optional value"),
+    (".FILL -1", ".FILL count out of range"),
+    (".FILL 2, 0x10000", ".FILL value out of 16-bit range"),
+    (".INCBIN", ".INCBIN takes one file path"),
+    (".INCBIN missing.bin", "missing.bin"),
+])
+def test_directive_errors(source, error):
+    with pytest.raises(ValueError, match=error):
+        CVEREAssembler().assemble(source)
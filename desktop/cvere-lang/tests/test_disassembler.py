@@ -0,0 +1,244 @@
+"""Disassembler"""
+
+import types
+from array import array
+
+import pytest
+
+import disassembler
+from assembler import CVEREAssembler
+from disassembler import CVEREDisassembler
+
+
+PROGRAM = """start:  LOADI R1, 0x05
+        LOADI R2, 0x03
+loop:   ADD   R3, R1, R2
+        SUB   R1, R1, R2
+        BNE   R1, loop
+        CALL  done
+        HALT
+done:   RET
+"""
+
+
+class BigEndianHostArray(array):
+    """array whose frombytes reads words the way a big-endian host would"""
+
+    def frombytes(self, data):
+        super().frombytes(data)
+        self.byteswap()
+
+
+@pytest.fixture
+def image(tmp_path):
+    words = CVEREAssembler().assemble_words(PROGRAM)
+    path = tmp_path / 'image.bin'
+    path.write_bytes(b''.join(word.to_bytes(2, 'little') for word in words) + b'\x99')
+    return str(path), list(words)
+
+
+def listing(instructions):
+    return [(i.address, i.machine_code, i.mnemonic, i.operands) for i in instructions]
+
+
+@pytest.mark.parametrize('byteorder', ['little', 'big'])
+def test_file_words_are_little_endian_on_any_host(image, byteorder, monkeypatch):
+    if byteorder == 'big':
+        monkeypatch.setattr(disassembler, 'sys', types.SimpleNamespace(byteorder='big'))
+        monkeypatch.setattr(disassembler, 'array', BigEndianHostArray)
+    path, words = image
+    dis = CVEREDisassembler()
+    with dis.mapped_words(path, 0x100) as (mapped, first):
+        assert (list(mapped), first) == (words, 0x100)
+    with dis.mapped_words(path, 0x100, (0x104, 0x10A)) as (mapped, first):
+        assert (list(mapped), first) == (words[2:5], 0x104)
+    assert listing(dis.disassemble_from_file(path)) == listing(CVEREDisassembler().disassemble(words))
+
+
+def reassemble(words, disassembler=None, entry_points=None):
+    disassembler = disassembler or CVEREDisassembler()
+    text = disassembler.disassemble_recursive_to_string(words, 0, entry_points, show_hex=False,
+                                                         show_comments=False)
+    return CVEREAssembler().assemble(text)
+
+
+@pytest.mark.parametrize('words', [
+    [0x0001, 0xFFFF],          # Reached unknown opcode
+    [0xFB00, 0x1234],          # RET with a nonzero second word
+    [0xFC00, 0x0300, 0xFFFF],  # PUSH with its register in the second word
+    [0xFB12, 0x0000],          # Extended opcode with low bits set
+    [0x7123, 0xFFFF],          # NOT with Rt set
+    [0xE1F0, 0xFFFF],          # Branch before the image
+    [0xF140, 0xFFFF],          # Branch past the end
+    [0xC105, 0xFA00],          # Truncated CALL
+])
+def test_recursive_listing_reassembles_words_it_cannot_name(words):
+    assert reassemble(words) == words
+
+
+def test_recursive_listing_reassembles_program():
+    words = CVEREAssembler().assemble_words(PROGRAM + "        .WORD 0x1234, 0x7123\n")
+    listing = CVEREDisassembler().disassemble_recursive_to_string(words, show_hex=False, show_comments=False)
+    assert 'BNE    R1, loc_0004' in listing and 'CALL   sub_0010' in listing
+    assert reassemble(list(words)) == list(words)
+
+
+def test_recursive_listing_reassembles_random_images():
+    import random
+    rnd = random.Random(25)
+    for _ in range(200):
+        words = [rnd.randrange(0x10000) for _ in range(rnd.randrange(1, 48))]
+        disassembler = CVEREDisassembler()
+        for n in range(4):
+            disassembler.add_label(rnd.randrange(0, 128, 2), f"user{n}")
+        entries = sorted({rnd.randrange(len(words)) * 2 for _ in range(3)})
+        assert reassemble(words, disassembler, entries) == words
+
+
+def test_synthesized_labels_are_not_kept():
+    disassembler = CVEREDisassembler()
+    disassembler.add_label(0x10, 'done')
+    words = list(CVEREAssembler().assemble_words(PROGRAM))
+    result = disassembler.disassemble_recursive(words)
+    assert result.labels == {0x00: 'entry_0000', 0x04: 'loc_0004', 0x10: 'done'}
+    assert disassembler.address_labels == {0x10: 'done'}
+    assert 'loc_0004' not in disassembler.disassemble_to_string(words)
+
+
+def test_decode_table_matches_decode_word():
+    disassembler = CVEREDisassembler()
+    disassembler.add_label(0x0040, 'callee')
+    disassembler.add_label(0x0102, 'next')
+    disassembler.add_label(0x0123, 'far')
+    table = CVEREDisassembler.decode_table()
+    assert len(table) == 0x10000
+    for word in range(0x10000):
+        extension = 0x0040 if disassembler.is_extended(word) else None
+        decoded = disassembler.disassemble_instruction(word, 0x0100, extension)
+        assert (decoded.mnemonic, decoded.operands, decoded.comment) == \
+            disassembler.decode_word(word, 0x0100, extension), f"0x{word:04X}"
+        entry = table[word]
+        if entry.format not in CVEREDisassembler.ADDRESSED_FORMATS:
+            assert entry.text.rstrip() == f"{entry.mnemonic:6s} {entry.operands}".rstrip()
+
+
+def test_decode_table_is_shared_per_class():
+    class Renamed(CVEREDisassembler):
+        OPCODES = {**CVEREDisassembler.OPCODES, 0x1: 'PLUS'}
+
+    assert CVEREDisassembler().decode_table() is CVEREDisassembler.decode_table()
+    assert Renamed.decode_table()[0x1312].mnemonic == 'PLUS'
+    assert CVEREDisassembler.decode_table()[0x1312].mnemonic == 'ADD'
+    assert Renamed().disassemble_to_string([0x1312], show_hex=False, show_comments=False) == "0000:  PLUS   R3, R1, R2"
+
+
+@pytest.fixture(params=['numpy', 'array'])
+def bulk_backend(request, monkeypatch):
+    if request.param == 'numpy':
+        pytest.importorskip('numpy')
+    else:
+        monkeypatch.setattr(disassembler, 'np', None)
+    return request.param
+
+
+def columns_as_lists(columns):
+    return {name: [int(value) for value in getattr(columns, name)]
+            for name in ('format', 'opcode', 'rd', 'rs', 'rt', 'imm8', 'addr12', 'offset')}
+
+
+def expected_columns(words):
+    """Columns built from a linear disassembly and the decode table"""
+    classes = CVEREDisassembler.FORMAT_CLASSES
+    table = CVEREDisassembler.decode_table()
+    formats = [classes.index(table[word].format) for word in words]
+    for instr in CVEREDisassembler().disassemble(words):
+        if instr.extension is not None:
+            formats[instr.address // 2 + 1] = classes.index('W')
+    return {
+        'format': formats,
+        'opcode': [word >> 8 if code == classes.index('X') else word >> 12 for word, code in zip(words, formats)],
+        'rd': [(word >> 8) & 0xF for word in words],
+        'rs': [(word >> 4) & 0xF for word in words],
+        'rt': [word & 0xF for word in words],
+        'imm8': [word & 0xFF for word in words],
+        'addr12': [word & 0xFFF for word in words],
+        'offset': [(word & 0xFF) - 0x100 if word & 0x80 else word & 0xFF for word in words],
+    }
+
+
+@pytest.mark.parametrize('words', [
+    [],
+    [0x0000, 0xFFFF, 0x1312, 0x2105, 0xA123, 0xD123, 0xE1FE, 0xF9FF],
+    [0xFA00, 0xFA00, 0xFA00, 0xFB00, 0x1234],  # CALL whose target looks like CALL
+    [0xFC00, 0xFE00, 0xFE00, 0xFE00],          # Run of extended words ending in a truncated one
+    list(range(0xF900, 0xFF01, 0x37)),
+])
+def test_decode_bulk_matches_linear_disassembly(bulk_backend, words):
+    assert columns_as_lists(CVEREDisassembler().decode_bulk(words)) == expected_columns(words)
+
+
+def test_decode_bulk_of_random_images(bulk_backend):
+    import random
+    rnd = random.Random(22)
+    for _ in range(50):
+        words = [rnd.choice([rnd.randrange(0x10000), rnd.randrange(0xFA00, 0xFF00)])
+                 for _ in range(rnd.randrange(1, 64))]
+        assert columns_as_lists(CVEREDisassembler().decode_bulk(words)) == expected_columns(words)
+
+
+def test_decode_bulk_reads_little_endian_bytes(bulk_backend, image):
+    path, words = image
+    with open(path, 'rb') as f:
+        data = f.read()
+    dis = CVEREDisassembler()
+    assert columns_as_lists(dis.decode_bulk(data[:-1])) == expected_columns(words)
+    assert columns_as_lists(dis.decode_bulk(memoryview(bytearray(data[:-1])))) == expected_columns(words)
+    with pytest.raises(ValueError, match="Odd buffer length"):
+        dis.decode_bulk(data)
+
+
+@pytest.mark.parametrize('words', [[0x10000], [-1]])
+def test_decode_bulk_rejects_values_outside_16_bits(bulk_backend, words):
+    with pytest.raises(ValueError, match="0..0xFFFF"):
+        CVEREDisassembler().decode_bulk(words)
+
+
+def test_iter_disassemble_is_lazy_and_matches_disassemble():
+    words = list(CVEREAssembler().assemble_words(PROGRAM)) + [0xFE00]  # Truncated LJMP at the end
+    dis = CVEREDisassembler()
+    dis.add_label(0x0204, 'loop')
+    instructions = dis.iter_disassemble(words, 0x200)
+    first = next(instructions)
+    assert (first.address, first.mnemonic) == (0x200, 'LOADI')
+    rest = list(instructions)
+    assert listing([first] + rest) == listing(dis.disassemble(words, 0x200))
+    assert rest[3].operands == 'R1, loop'
+    assert [i.extension for i in dis.iter_disassemble(words) if i.mnemonic in ('CALL', 'LJMP')] == [0x0010, None]
+
+
+class CountingWriter:
+    def __init__(self):
+        self.writes = []
+
+    def write(self, text):
+        self.writes.append(text)
+
+
+@pytest.mark.parametrize('show_hex, show_comments', [(True, True), (False, True), (True, False), (False, False)])
+@pytest.mark.parametrize('chunk_lines', [1, 3, 4096])
+def test_stream_listing_matches_string_listing(show_hex, show_comments, chunk_lines):
+    words = list(CVEREAssembler().assemble_words(PROGRAM)) + [0x0001, 0xFA00]
+    dis = CVEREDisassembler()
+    dis.add_label(0x0010, 'done')
+    expected = dis.disassemble_to_string(words, 0x40, show_hex, show_comments)
+    writer = CountingWriter()
+    lines = dis.disassemble_to_stream(words, writer, 0x40, show_hex, show_comments, chunk_lines=chunk_lines)
+    assert ''.join(writer.writes) == expected + '\n'
+    assert lines == len(expected.splitlines())
+    assert len(writer.writes) == -(-lines // chunk_lines)
+
+
+def test_stream_listing_of_nothing_writes_nothing():
+    writer = CountingWriter()
+    assert CVEREDisassembler().disassemble_to_stream([], writer) == 0
+    assert writer.writes == []
@@ -0,0 +1,53 @@
+"""Instruction encoding"""
+
+import pytest
+
+from assembler import CVEREAssembler
+
+
+@pytest.mark.parametrize('register', ['R10', 'R11', 'R12', 'R13', 'R14', 'RA', 'RE', 'R0xC'])
+def test_bne_rejects_registers_aliasing_extended_opcodes(register):
+    with pytest.raises(ValueError, match="BNE cannot test"):
+        CVEREAssembler().assemble(f"loop: BNE {register}, loop\nHALT")
+
+
+@pytest.mark.parametrize('register, word', [('R9', 0xF9FE), ('R15', 0xFFFE)])
+def test_bne_on_other_registers(register, word):
+    assert CVEREAssembler().assemble(f"BNE {register}, -2\nBNE {register}, -3") == [word, word - 1]
+
+
+def test_beq_may_test_any_register():
+    assert CVEREAssembler().assemble("BEQ R12, 1\nBEQ R14, -1") == [0xEC01, 0xEEFF]
+
+
+@pytest.mark.parametrize('source', ["CALL 0x10000", "LJMP -1", "LJMP end\n.FILL 0x7FFE\nend:"])
+def test_far_targets_outside_the_address_space_are_rejected(source):
+    with pytest.raises(ValueError, match="outside the 16-bit address space"):
+        CVEREAssembler().assemble(source)
+
+
+def test_far_target_at_the_top_of_memory():
+    assert CVEREAssembler().assemble("CALL 0xFFFF\nLJMP 0") == [0xFA00, 0xFFFF, 0xFE00, 0x0000]
+
+
+def test_image_larger_than_memory_is_rejected():
+    assembler = CVEREAssembler()
+    assert len(assembler.assemble(".FILL 0x7FFF\nHALT")) == 0x8000
+    with pytest.raises(ValueError, match="does not fit in memory: 65538 bytes"):
+        assembler.assemble(".FILL 0x7FFF\nHALT\nHALT")
+
+
+def test_streamed_image_larger_than_memory_is_rejected():
+    with pytest.raises(ValueError, match="Line 3: Program does not fit in memory"):
+        CVEREAssembler().assemble_stream([".FILL 0x7FFF", "HALT", "HALT"], lambda address, word: None)
+
+
+def test_session_edit_past_memory_is_refused():
+    from incremental import AssemblySession
+    session = AssemblySession()
+    session.load(".FILL 0x7FFF\nHALT")
+    with pytest.raises(ValueError, match="does not fit in memory"):
+        session.replace_lines(1, 2, ["CALL 0"])
+    assert session.source == ".FILL 0x7FFF\nHALT"
+    with pytest.raises(ValueError, match="does not fit in memory"):
+        session.load(".FILL 0x8000\nHALT")
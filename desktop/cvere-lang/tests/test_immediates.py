@@ -0,0 +1,92 @@
+"""LI synthesis and the constant pool"""
+
+import pytest
+
+from assembler import CVEREAssembler
+from immediates import ImmediateSynthesizer
+from isa_designer import ISADesigner
+
+from cvere_vm import run
+
+
+VALUES = sorted(set(range(0, 0x10000, 97)) | {
+    0x0000, 0x007F, 0x0080, 0x00FF, 0x0100, 0x1234, 0x7FFF, 0x8000, 0xBEEF, 0xFF7F, 0xFF80, 0xFFFF})
+
+
+@pytest.fixture(scope='module')
+def synthesizer():
+    return ImmediateSynthesizer(ISADesigner())
+
+
+def test_every_value_loads_in_the_vm(synthesizer):
+    isa = ISADesigner()
+    for value in VALUES:
+        code = CVEREAssembler().assemble(f"LI R7, 0x{value:04X}\nHALT")
+        regs = run(code).regs
+        assert regs[7] == value, f"0x{value:04X}"
+        assert regs[:7] + regs[8:] == [0] * 15  # Nothing else is clobbered
+        steps = synthesizer.sequence(value)
+        assert len(code) == len(steps) + 1
+        assert synthesizer.cost(value) == sum(isa.get_instruction(mnemonic).cycles for mnemonic, _ in steps)
+
+
+def test_small_constants_are_one_loadi():
+    assert CVEREAssembler().assemble("LI R1, 5\nLI R2, -1\nHALT") == \
+        CVEREAssembler().assemble("LOADI R1, 5\nLOADI R2, 0xFF\nHALT")
+
+
+def test_label_addresses_load_after_layout():
+    # The label sits past 0x1000, so its sequence is longer than the first guess
+    source = """        LI    R1, far
+        LI    R2, near
+near:   LOAD  R3, R1, 0
+        HALT
+        .FILL 0x900
+far:    .WORD 0x4242
+"""
+    assembler = CVEREAssembler()
+    machine = run(assembler.assemble(source))
+    assert machine.regs[1] == assembler.labels['far'] > 0x1000
+    assert machine.regs[2] == assembler.labels['near']
+    assert machine.regs[3] == 0x4242
+
+
+def test_expensive_constants_go_to_the_pool():
+    source = """        LI    R13, __const_pool
+        LI    R1, 0x1234
+        LI    R2, 0xBEEF
+        LI    R3, 0x1234
+        LI    R4, 5
+        HALT
+"""
+    assembler = CVEREAssembler(pool_register='R13')
+    code = assembler.assemble(source)
+    pool = assembler.labels['__const_pool']
+    assert sorted(code[pool // 2:]) == [0x1234, 0xBEEF]
+    assert [instr.opcode for instr in assembler.instructions].count('LOAD') == 3
+    regs = run(code).regs
+    assert regs[1:5] == [0x1234, 0xBEEF, 0x1234, 5]
+
+
+def test_pool_keeps_its_size_limit():
+    values = [(0x1234 + 0x1111 * n) & 0xFFFF for n in range(CVEREAssembler.CONST_POOL_SIZE + 4)]
+    source = "LI R13, __const_pool\n" + '\n'.join(
+        f"LI R{1 + n % 12}, 0x{value:04X}" for n, value in enumerate(values)) + "\nHALT"
+    assembler = CVEREAssembler(pool_register='R13')
+    code = assembler.assemble(source)
+    assert len(code) - assembler.labels['__const_pool'] // 2 == CVEREAssembler.CONST_POOL_SIZE
+    expected = [0] * 12
+    for n, value in enumerate(values):
+        expected[n % 12] = value
+    assert run(code).regs[1:13] == expected
+
+
+@pytest.mark.parametrize('source, error', [
+    ("LI R1, 0x10000", "out of 16-bit range"),
+    ("LI R1, missing", "Undefined label: missing"),
+    ("LI R1", "LI takes a register and a constant"),
+    ("LI R1, 0x1234\nBNE R1, -2", "BNE with a numeric target"),
+])
+def test_errors(source, error):
+    with pytest.raises(ValueError, match=error):
+        CVEREAssembler().assemble(source)
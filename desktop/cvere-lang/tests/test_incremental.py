@@ -0,0 +1,83 @@
+"""Incremental assembly sessions"""
+
+import pytest
+
+from assembler import CVEREAssembler
+from incremental import AssemblySession
+
+
+SOURCE = """start:
+    LOADI R1, 0x00
+    LOADI R2, 0x0A
+loop:
+    ADDI  R1, 0x01
+    SUB   R3, R2, R1
+    BNE   R3, loop
+    JMP   done
+table:
+    .WORD loop, done
+done:
+    CALL  start
+    HALT"""
+
+
+def check_patches(session, image, patches):
+    """The patches turn the old image into a full reassembly of the new source"""
+    assembler = CVEREAssembler()
+    expected = assembler.assemble(session.source)
+    image = (list(image) + [0] * len(expected))[:len(expected)]
+    for address, word in patches:
+        image[address // 2] = word
+    assert image == expected == session.machine_code
+    assert session.labels == assembler.labels
+    return image
+
+
+@pytest.mark.parametrize('start, end, new_lines', [
+    (2, 3, ["    LOADI R2, 0x14"]),          # Same size, no labels involved
+    (3, 3, ["    NOP"]),                     # Insert before a label
+    (4, 5, []),                              # Delete inside a loop
+    (6, 7, ["    BEQ   R3, done"]),          # Retarget a branch
+    (7, 8, ["    LJMP  done"]),              # Grow an instruction
+    (8, 9, ["data:"]),                       # Rename a label
+    (9, 10, ["    .WORD done, loop, start"]),  # Grow a data directive
+    (1, 1, ["done:"]),                       # Duplicate definition
+    (11, 12, ["    CALL  0x0002"]),          # Label reference becomes a literal
+])
+def test_patches_match_full_reassembly(start, end, new_lines):
+    session = AssemblySession()
+    image = list(session.load(SOURCE))
+    assert image == CVEREAssembler().assemble(SOURCE)
+    check_patches(session, image, session.replace_lines(start, end, new_lines))
+
+
+def test_same_size_edit_patches_only_its_word():
+    session = AssemblySession()
+    session.load(SOURCE)
+    assert session.replace_lines(2, 3, ["    LOADI R2, 0x14"]) == [(0x0002, 0xC214)]
+    assert session.replace_lines(2, 3, ["    LOADI R2, 0x14"]) == []
+
+
+def test_update_applies_a_sequence_of_edits():
+    session = AssemblySession()
+    image = list(session.load(SOURCE))
+    lines = SOURCE.split('\n')
+    edits = [
+        lines[:4] + ["    NOP", "    NOP"] + lines[4:],
+        lines[:3] + lines[4:5] + ["loop:"] + lines[5:],  # Move the loop label
+        lines,                                           # And back
+        lines[:11] + ["    PUSH  R1", "    POP   R2"] + lines[11:],
+        lines[:8] + lines[10:],                          # Drop the table
+    ]
+    for source in edits:
+        image = check_patches(session, image, session.update('\n'.join(source)))
+
+
+def test_undefined_label_is_retried_on_the_next_edit():
+    session = AssemblySession()
+    session.load("    JMP   later\n    NOP\nlater:\n    HALT")
+    with pytest.raises(ValueError, match="Line 1: .*later"):
+        session.replace_lines(2, 3, ["latter:"])
+    assert session.machine_code[0] == 0
+    image = session.machine_code[:]
+    check_patches(session, image, session.replace_lines(0, 1, ["    JMP   latter"]))
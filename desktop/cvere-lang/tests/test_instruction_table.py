@@ -0,0 +1,86 @@
+"""Compact instruction storage"""
+
+import pytest
+
+from assembler import CVEREAssembler, Instruction, InstructionTable
+from optimizer import PeepholeOptimizer
+
+
+RECORDS = [
+    Instruction(label='start', opcode='LOADI', operands=['R1', '5'], line_num=1, address=0),
+    Instruction(label=None, opcode='HALT', operands=[], line_num=2, address=2),
+    Instruction(label='table', opcode='.WORD', operands=['start', 'table', '5'], line_num=4, address=4),
+    Instruction(label=None, opcode='CALL', operands=['start'], line_num=5, address=10),
+]
+
+
+def test_rows_read_back_as_records():
+    table = InstructionTable(RECORDS)
+    assert len(table) == len(RECORDS)
+    assert list(table) == RECORDS
+    assert [table[index] for index in range(len(table))] == RECORDS
+    assert table[-1] == RECORDS[-1] and table[1:3] == RECORDS[1:3]
+    with pytest.raises(IndexError):
+        table[len(RECORDS)]
+    # Records are copies: editing one leaves the table alone
+    table[0].operands.append('R9')
+    assert table[0] == RECORDS[0]
+
+
+def test_select_builds_only_matching_rows():
+    table = InstructionTable(RECORDS)
+    assert [(index, instr.opcode) for index, instr in table.select(['CALL', 'LOADI', 'NOP'])] == \
+        [(0, 'LOADI'), (3, 'CALL')]
+    assert table.contains_opcode('.WORD') and not table.contains_opcode('NOP')
+
+
+def test_replace_lays_rows_out_again():
+    table = InstructionTable(RECORDS)
+    size_of = CVEREAssembler().size_of
+    nop = Instruction(label=None, opcode='NOP', operands=[], line_num=2)
+    halt = Instruction(label=None, opcode='HALT', operands=[], line_num=2)
+    new, starts = table.replace({1: [nop, halt], 3: []}, 14, size_of)
+    assert list(starts) == [0, 2, 6, 12, 12]
+    assert [(instr.opcode, instr.address) for instr in new] == \
+        [('LOADI', 0), ('NOP', 2), ('HALT', 4), ('.WORD', 6)]
+    assert new[3].operands == RECORDS[2].operands
+    assert list(table) == RECORDS  # The original is not changed
+
+
+SOURCES = [
+    """start:  LOADI R1, 5
+loop:   ADDI  R1, -1
+        BNE   R1, loop
+        CALL  sub
+        JMP   done
+sub:    PUSH  R1
+        POP   R2
+        RET
+table:  .WORD start, done
+        .BYTE 1, 2, 3
+        .FILL 2, 0x1234
+done:   HALT
+""",
+    # Branches and jumps relaxed into their long forms
+    "start: BEQ R1, far\nJMP far\n.FILL 0x900\nfar: BNE R2, start\nHALT",
+    # LI expansion, which converts the table to a list
+    "LI R1, 0x1234\nLI R2, later\n.FILL 4\nlater: HALT",
+]
+
+
+@pytest.mark.parametrize('source', SOURCES)
+def test_compact_output_matches_list_mode(source):
+    plain = CVEREAssembler()
+    compact = CVEREAssembler(compact=True)
+    assert list(compact.assemble_words(source)) == plain.assemble(source)
+    assert compact.labels == plain.labels
+    assert list(compact.instructions) == plain.instructions
+    assert compact.assemble_object(source).to_dict() == plain.assemble_object(source).to_dict()
+
+
+def test_compact_table_is_kept_without_passes():
+    assembler = CVEREAssembler(compact=True)
+    assembler.assemble(SOURCES[1])
+    assert isinstance(assembler.instructions, InstructionTable)
+    optimized = CVEREAssembler(compact=True, passes=[PeepholeOptimizer()])
+    assert optimized.assemble(SOURCES[0]) == CVEREAssembler(passes=[PeepholeOptimizer()]).assemble(SOURCES[0])
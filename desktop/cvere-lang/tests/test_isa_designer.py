@@ -0,0 +1,64 @@
+"""Bulk instruction encoding"""
+
+import pytest
+
+import isa_designer
+from isa_designer import ISADesigner, InstructionFormat
+
+
+@pytest.fixture(params=['numpy', 'array'])
+def designer(request, monkeypatch):
+    if request.param == 'numpy':
+        pytest.importorskip('numpy')
+    else:
+        monkeypatch.setattr(isa_designer, 'np', None)
+    return ISADesigner()
+
+
+def test_matches_single_encoding(designer):
+    words = designer.encode_bulk(InstructionFormat.R_TYPE, 'ADD', [3, 4], [1, 5], 2)
+    assert list(words) == [designer.encode_instruction('ADD', [3, 1, 2]),
+                           designer.encode_instruction('ADD', [4, 5, 2])]
+
+
+@pytest.mark.parametrize('columns', [([1, 2], [3], [4, 5]), ([1], [2, 3], 4), ([1, 2, 3], [1, 2], [1, 2])])
+def test_columns_of_different_lengths_are_rejected(designer, columns):
+    # NumPy would broadcast the length-1 column
+    with pytest.raises(ValueError, match="differ in length"):
+        designer.encode_bulk(InstructionFormat.R_TYPE, 'ADD', *columns)
+
+
+def test_opcode_column_length_is_checked(designer):
+    add = designer.get_instruction('ADD').opcode
+    with pytest.raises(ValueError, match="differ in length"):
+        designer.encode_bulk(InstructionFormat.R_TYPE, [add], [1, 2], [1, 2], [1, 2])
+
+
+def test_extended_instructions_are_not_single_words():
+    designer = ISADesigner()
+    for mnemonic in ('CALL', 'RET', 'PUSH', 'POP', 'LJMP'):
+        with pytest.raises(ValueError, match="two-word"):
+            designer.encode_instruction(mnemonic, [0x1234])
+
+
+def test_extended_first_word_decodes_as_extended():
+    designer = ISADesigner()
+    assert designer.decode_instruction(0xFA00, 0x1234) == ('CALL', [0x1234])
+    assert designer.decode_instruction(0xFE00, 0x0100) == ('LJMP', [0x0100])
+    assert designer.decode_instruction(0xFB00) == ('RET', [])
+    assert designer.decode_instruction(0xF905) == ('BNE', [9, 5])
+    with pytest.raises(ValueError, match="second word"):
+        designer.decode_instruction(0xFA00)
+
+
+def test_branch_words_that_decode_as_extended_are_rejected(designer):
+    # BNE R10-R14 share their top byte with CALL, RET, PUSH, POP and LJMP
+    with pytest.raises(ValueError, match="row 0 would decode as extended instruction CALL"):
+        designer.encode_bulk(InstructionFormat.B_TYPE, 'BNE', [10], [0])
+    with pytest.raises(ValueError, match="row 2 would decode as extended instruction LJMP"):
+        designer.encode_bulk(InstructionFormat.B_TYPE, 'BNE', [1, 9, 14], 0)
+    bne = designer.get_instruction('BNE').opcode
+    with pytest.raises(ValueError, match="row 1 would decode as extended instruction POP"):
+        designer.encode_bulk(InstructionFormat.B_TYPE, [bne, bne], [15, 13], [-1, 4])
+    assert list(designer.encode_bulk(InstructionFormat.B_TYPE, 'BEQ', [10, 14], 0)) == [0xEA00, 0xEE00]
+    assert list(designer.encode_bulk(InstructionFormat.B_TYPE, 'BNE', [10], [0], validate=False)) == [0xFA00]
@@ -0,0 +1,36 @@
+"""Lexer and first pass"""
+
+from assembler import CVEREAssembler, lex, split_operands
+
+
+def tokenize(line):
+    return CVEREAssembler().tokenize_line(line)
+
+
+def test_label_mnemonic_and_operands():
+    assert tokenize("loop:  ADD R3, R1 ,R2   ; sum") == ('loop', 'ADD', ['R3', 'R1', 'R2'])
+
+
+def test_comment_and_blank_lines():
+    assert tokenize("; only a comment") == (None, None, [])
+    assert tokenize("   \t") == (None, None, [])
+    assert tokenize("start:   ; label only") == ('start', None, [])
+
+
+def test_label_is_a_single_token():
+    # Text before the colon with inner whitespace is not a label
+    assert tokenize("LOADI R1, a:b") == (None, 'LOADI', ['R1', 'a:b'])
+    assert tokenize("a: b:c") == ('a', 'B', [':c'])
+
+
+def test_mnemonic_case_is_normalised_by_tokenize_only():
+    assert list(lex(["  addi R1, 0x01\r\n"])) == [(None, 'addi', 'R1, 0x01')]
+    assert split_operands('') == []
+
+
+def test_first_pass_addresses_and_line_numbers():
+    assembler = CVEREAssembler()
+    assembler.first_pass("start:\n  LOADI R1, 5\n\n  CALL start\nend: HALT\n")
+    assert assembler.labels == {'start': 0, 'end': 6}
+    assert [(i.opcode, i.line_num, i.address) for i in assembler.instructions] == \
+        [('LOADI', 2, 0), ('CALL', 4, 2), ('HALT', 5, 6)]
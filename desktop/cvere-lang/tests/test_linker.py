@@ -0,0 +1,51 @@
+"""Object modules and linking"""
+
+import pytest
+
+from assembler import CVEREAssembler, RelocationType
+from linker import link_sources
+
+from cvere_vm import run
+
+
+CLAMP = """
+clamp:  LOADI R3, 0x7F
+        AND   R1, R1, R3
+        RET
+"""
+
+
+def test_external_call_beside_li():
+    module = CVEREAssembler().assemble_object("start: LI R1, 0x1234\n CALL clamp\n HALT", "main")
+    assert [(r.type, r.symbol) for r in module.relocations] == [(RelocationType.ABS16, 'clamp')]
+    assert 'clamp' not in module.symbols
+
+
+def test_external_call_with_li_and_relaxed_branch():
+    main = ("start:  LI   R1, 0x1234\n"
+            "        CALL clamp\n"
+            "        BEQ  R0, far\n"
+            + "        NOP\n" * 300 +
+            "far:    ADDI R1, 0x01\n"
+            "        HALT\n")
+    module = CVEREAssembler().assemble_object(main, "main")
+    assert {r.symbol for r in module.relocations} >= {'clamp'}
+
+    machine = run(link_sources({"main": main, "lib": CLAMP}))
+    assert machine.regs[1] == (0x1234 & 0x7F) + 1
+
+
+def test_external_branch_deep_inside_module():
+    # The branch is far from address 0, where an external symbol used to be placed
+    main = ("start:  LOADI R1, 0\n"
+            + "        NOP\n" * 300 +
+            "        BEQ   R0, ext\n"
+            "        HALT\n")
+    module = CVEREAssembler().assemble_object(main, "main")
+    assert [(r.type, r.symbol) for r in module.relocations] == [(RelocationType.REL8, 'ext')]
+    assert module.code[301] & 0xFF == 0
+
+    lib = "ext:    LOADI R1, 7\n        HALT\n"
+    assert run(link_sources({"main": main, "lib": lib})).regs[1] == 7
+    with pytest.raises(ValueError, match="Branch to ext out of range"):
+        link_sources({"lib": lib, "main": main})
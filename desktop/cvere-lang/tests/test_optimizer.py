@@ -0,0 +1,92 @@
+"""Peephole optimizer"""
+
+import pytest
+
+from assembler import CVEREAssembler
+from optimizer import PeepholeOptimizer
+
+from cvere_vm import run
+
+
+SOURCE = """start:  LOADI R1, 0x00
+        NOP
+        LOADI R1, 0x05
+        JMP   done
+        ADD   R4, R4, R4
+done:   STORE R1, R0, 0
+        HALT
+"""
+
+
+def test_quiet_by_default_and_returns_the_report(capsys):
+    optimizer = PeepholeOptimizer()
+    assembler = CVEREAssembler()
+    assembler.first_pass(SOURCE)
+    report = optimizer(assembler)
+    assert report is optimizer.report and report.words_saved == 3
+    CVEREAssembler(passes=[PeepholeOptimizer()]).assemble(SOURCE)
+    assert capsys.readouterr().out == ""
+
+
+LOOP = """start:  LOADI R1, 0x00
+        NOP
+        NOP
+        LOADI R1, 0x05
+        LOADI R2, 0x0A
+loop:   ADDI  R1, 0x01
+        NOP
+        SUB   R3, R2, R1
+        BNE   R3, loop
+        CALL  store
+        JMP   done
+        ADD   R4, R4, R4
+        NOP
+store:  STORE R1, R0, 0x40
+        RET
+        LOADI R6, 0x01
+done:   LOAD  R5, R0, 0x40
+        HALT
+        LOADI R5, 0x01
+table:  .WORD start, done
+"""
+
+
+def optimize(source):
+    optimizer = PeepholeOptimizer()
+    assembler = CVEREAssembler(passes=[optimizer])
+    return assembler.assemble(source), optimizer.report, assembler
+
+
+def test_optimized_program_computes_the_same_result():
+    code, report, assembler = optimize(LOOP)
+    plain = CVEREAssembler().assemble(LOOP)
+    assert len(code) == len(plain) - report.words_saved
+    before, after = run(plain), run(code)
+    assert after.regs == before.regs and after.regs[5] == 0x0A
+    assert code[assembler.labels['table'] // 2:] == [assembler.labels['start'], assembler.labels['done']]
+
+
+def test_report_counts_each_pattern():
+    _, report, _ = optimize(LOOP)
+    assert report.removed == {'nop': [3, 3, 3], 'dead_loadi': [1, 1, 1], 'unreachable': [4, 4, 0]}
+    assert (report.words_before, report.words_after) == (23, 15)
+    assert report.cycles_saved == 4
+
+
+@pytest.mark.parametrize('source', [
+    "LOADI R1, 1\nLOADI R2, 2\nHALT",        # Different registers
+    "LOADI R1, 1\nADDI R1, 1\nLOADI R1, 2\nHALT",  # Read in between
+    "LOADI R1, 1\nSTORE R1, R0, 0\nLOADI R1, 2\nHALT",
+    "JMP end\n.WORD 7\nend: HALT",            # Data after a jump is not code
+])
+def test_live_code_is_kept(source):
+    code, report, _ = optimize(source)
+    assert code == CVEREAssembler().assemble(source)
+    assert report.words_saved == 0
+
+
+def test_literal_target_leaves_program_unoptimized():
+    source = "NOP\nLOADI R1, 1\nBNE R1, -2\nHALT"
+    code, report, _ = optimize(source)
+    assert code == CVEREAssembler().assemble(source)
+    assert report.skipped == "Line 3: BNE has a literal target"
@@ -0,0 +1,63 @@
+"""Machine code output"""
+
+import mmap
+import struct
+
+import pytest
+
+from assembler import CVEREAssembler
+
+
+SOURCE = "start: LOADI R1, 5\n        ADDI R1, 1\n        BNE R1, start\n        HALT\n"
+
+
+def little_endian(words):
+    return struct.pack(f'<{len(words)}H', *words)
+
+
+def test_words_and_bytes_match_assemble():
+    expected = CVEREAssembler().assemble(SOURCE)
+    assembler = CVEREAssembler()
+    assert list(assembler.assemble_words(SOURCE)) == expected
+    assert assembler.assemble_bytes(SOURCE).tobytes() == little_endian(expected)
+
+
+@pytest.mark.parametrize('offset', [0, 1, 6])
+def test_assemble_into_writes_at_an_offset(offset):
+    buffer = bytearray(b'\xAA' * 16)
+    assert CVEREAssembler().assemble_into(SOURCE, buffer, offset) == 8
+    code = little_endian(CVEREAssembler().assemble(SOURCE))
+    assert buffer == b'\xAA' * offset + code + b'\xAA' * (8 - offset)
+
+
+def test_assemble_into_accepts_other_buffers():
+    code = little_endian(CVEREAssembler().assemble(SOURCE))
+    words = memoryview(bytearray(16)).cast('H')  # Multi-byte view; offsets stay in bytes
+    CVEREAssembler().assemble_into(SOURCE, words, 2)
+    assert words.tobytes()[2:10] == code
+    with mmap.mmap(-1, 16) as mapped:
+        CVEREAssembler().assemble_into(SOURCE, mapped, 8)
+        assert mapped[8:16] == code
+
+
+@pytest.mark.parametrize('offset', [-1, 9, 100])
+def test_assemble_into_rejects_writes_outside_the_buffer(offset):
+    buffer = bytearray(16)
+    with pytest.raises(ValueError, match="Buffer too small"):
+        CVEREAssembler().assemble_into(SOURCE, buffer, offset)
+    assert buffer == bytearray(16)
+
+
+def test_binary_file_is_little_endian_words(tmp_path):
+    path = tmp_path / 'out.bin'
+    CVEREAssembler().assemble_to_binary_file(SOURCE, str(path))
+    assert path.read_bytes() == little_endian(CVEREAssembler().assemble(SOURCE))
+
+
+def test_buffer_is_released_when_it_is_too_small():
+    buffer = bytearray(4)
+    with pytest.raises(ValueError, match="Buffer too small") as failure:
+        CVEREAssembler().assemble_into(SOURCE, buffer)
+    buffer.extend(bytes(4))  # BufferError while a view from the failed call is open
+    assert failure.value is not None
+    assert CVEREAssembler().assemble_into(SOURCE, buffer) == 8
@@ -0,0 +1,77 @@
+"""Register allocation"""
+
+import pytest
+
+from assembler import CVEREAssembler
+from regalloc import RegisterAllocator
+
+from cvere_vm import run
+
+
+def program(values, tail=''):
+    """Adds every value to an accumulator three times, counting with BNE %n"""
+    names = [f'%v{index}' for index in range(values)]
+    lines = [f"        LOADI {name}, {index + 1}" for index, name in enumerate(names)]
+    lines += ["        LOADI %one, 1", "        LOADI %acc, 0", "        LOADI %n, 3", "loop:"]
+    lines += [f"        ADD   %acc, %acc, {name}" for name in names]
+    lines += ["        SUB   %n, %n, %one", "        BNE   %n, loop",
+              tail, "        STORE %acc, R0, 0", "        HALT"]
+    return '\n'.join(lines), 3 * sum(range(1, values + 1))
+
+
+def allocate(source, **options):
+    allocator = RegisterAllocator(**options)
+    assembler = CVEREAssembler(passes=[allocator])
+    code = assembler.assemble(source)
+    conflicts = assembler.branch_conflicts['BNE']
+    for instr in assembler.instructions:
+        if instr.opcode == 'BNE':
+            assert assembler.parse_register(instr.operands[0]) not in conflicts
+    return allocator.report, run(code)
+
+
+def test_branch_condition_avoids_extended_aliases():
+    # Without the restriction %n, live last, would be given R14
+    source, total = program(11)
+    report, machine = allocate(source)
+    assert report.registers['%n'] == 'R15'
+    assert not report.spilled
+    assert machine.memory[0] == total
+
+
+def test_condition_with_no_legal_register_is_spilled_to_safe_scratch():
+    source, total = program(2)
+    report, machine = allocate(source, registers=[f'R{n}' for n in range(10, 15)])
+    assert '%n' in report.spilled
+    assert machine.memory[0] == total
+
+
+def test_condition_takes_a_legal_register_from_a_longer_interval():
+    # %v0 outlives %n and holds the only register %n may use
+    source, total = program(4, tail="        ADD   %acc, %acc, %v0")
+    report, machine = allocate(source, registers=['R1', 'R10', 'R11', 'R12', 'R13'])
+    assert report.registers['%n'] == 'R1'
+    assert '%v0' in report.spilled
+    assert machine.memory[0] == total + 1
+
+
+def test_spill_registers_outside_alias_range_by_default():
+    allocator = RegisterAllocator()
+    assert not {'R10', 'R11', 'R12', 'R13', 'R14'} & {allocator.spill_base, *allocator.scratch}
+
+
+def test_scratch_that_cannot_hold_a_condition_is_rejected():
+    source, _ = program(2)
+    with pytest.raises(ValueError, match="Scratch register R13"):
+        allocate(source, registers=['R10', 'R11', 'R12'], scratch=('R13', 'R14'))
+
+
+def test_fingerprint_covers_the_configuration():
+    fingerprints = {RegisterAllocator().fingerprint,
+                    RegisterAllocator(registers=['R1', 'R2']).fingerprint,
+                    RegisterAllocator(spill_base='R7').fingerprint,
+                    RegisterAllocator(scratch=('R5', 'R6')).fingerprint}
+    assert len(fingerprints) == 4
+    assert RegisterAllocator(verbose=True).fingerprint == RegisterAllocator().fingerprint
+    assert CVEREAssembler(passes=[RegisterAllocator(registers=['R1'])]).pass_fingerprint() != \
+        CVEREAssembler(passes=[RegisterAllocator()]).pass_fingerprint()
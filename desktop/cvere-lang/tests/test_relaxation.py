@@ -0,0 +1,44 @@
+"""Branch relaxation"""
+
+import pytest
+
+from assembler import CVEREAssembler
+
+from cvere_vm import run
+
+
+def program(condition, value, distance, branch='BEQ'):
+    return (f"        LOADI {condition}, {value}\n"
+            f"        {branch}   {condition}, far\n"
+            f"        LOADI R1, 1\n"
+            f"        HALT\n"
+            f"        .FILL {distance}\n"
+            f"far:    LOADI R1, 2\n"
+            f"        HALT\n")
+
+
+@pytest.mark.parametrize('compact', [False, True])
+@pytest.mark.parametrize('distance', [300, 3000])  # JMP and LJMP reach
+@pytest.mark.parametrize('value', [0, 5])
+@pytest.mark.parametrize('register', range(10, 15))
+def test_beq_on_registers_aliasing_extended_opcodes(register, value, distance, compact):
+    # BNE R10-R14 would encode as CALL/RET/PUSH/POP/LJMP
+    assembler = CVEREAssembler(compact=compact)
+    code = assembler.assemble(program(f'R{register}', value, distance))
+    assert not any(op == 'BNE' for op in (i.opcode for i in assembler.instructions))
+    assert run(code).regs[1] == (2 if value == 0 else 1)
+
+
+@pytest.mark.parametrize('distance', [300, 3000])
+@pytest.mark.parametrize('value', [0, 5])
+@pytest.mark.parametrize('branch', ['BEQ', 'BNE'])
+def test_relaxed_branch_keeps_its_sense(branch, value, distance):
+    taken = (value == 0) == (branch == 'BEQ')
+    code = CVEREAssembler().assemble(program('R2', value, distance, branch))
+    assert run(code).regs[1] == (2 if taken else 1)
+
+
+def test_in_range_branch_is_left_alone():
+    assembler = CVEREAssembler()
+    assembler.assemble(program('R12', 0, 100))
+    assert [i.opcode for i in assembler.instructions][:3] == ['LOADI', 'BEQ', 'LOADI']
@@ -0,0 +1,135 @@
+"""Instruction scheduling"""
+
+import random
+
+import pytest
+
+from assembler import CVEREAssembler
+from scheduler import InstructionScheduler
+
+from cvere_vm import run
+
+
+def test_numeric_branch_target_leaves_program_unscheduled():
+    # BNE R4, -6 loops back to LOADI R5; scheduling hoists the LOAD into that slot
+    source = """        LOADI R1, 0x40
+        LOADI R4, 2
+        LOADI R5, 1
+        LOAD  R3, R1, 0
+        ADD   R3, R3, R3
+        LOADI R2, 0x10
+        SUB   R4, R4, R5
+        BNE   R4, -6
+        STORE R3, R1, 1
+        HALT
+"""
+    scheduler = InstructionScheduler()
+    code = CVEREAssembler(passes=[scheduler]).assemble(source)
+    assert code == CVEREAssembler().assemble(source)
+    assert scheduler.report.skipped == "Line 8: BNE has a literal target"
+    assert run(code).regs[4] == 0
+
+
+def test_quiet_by_default_and_returns_the_report(capsys):
+    scheduler = InstructionScheduler()
+    assembler = CVEREAssembler()
+    assembler.first_pass("LOAD R1, R2, 0\nADD R1, R1, R1\nLOADI R3, 1\nHALT")
+    report = scheduler(assembler)
+    assert report is scheduler.report and report.cycles_after < report.cycles_before
+    assert capsys.readouterr().out == ""
+
+
+ARRAYS = """start:  LOADI R1, 0x40
+        LOADI R2, 0x50
+        LOAD  R3, R1, 0x0
+        ADD   R3, R3, R3
+        LOAD  R4, R2, 0x0
+        ADD   R4, R4, R4
+        LOAD  R5, R1, 0x1
+        ADD   R6, R3, R4
+        LOAD  R7, R2, 0x1
+        ADD   R8, R5, R7
+        STORE R6, R1, 0x0
+        STORE R8, R1, 0x1
+        HALT
+        .FILL 19
+        .WORD 3, 5
+        .FILL 6
+        .WORD 4, 7
+"""
+
+
+def same_results(source, data=None):
+    """Schedule source and check it leaves registers and memory from data on as the plain build does"""
+    scheduler = InstructionScheduler()
+    scheduled = CVEREAssembler(passes=[scheduler]).assemble(source)
+    plain = CVEREAssembler().assemble(source)
+    assert len(scheduled) == len(plain)
+    start = (data if data is not None else len(plain) * 2) // 2
+    before, after = run(plain), run(scheduled)
+    assert after.regs == before.regs and after.memory[start:] == before.memory[start:]
+    assert after.sp == before.sp
+    return scheduled, plain, scheduler.report
+
+
+def test_reordered_block_computes_the_same_result():
+    scheduled, plain, report = same_results(ARRAYS, data=0x40)
+    assert scheduled != plain
+    assert report.cycles_after < report.cycles_before
+    assert run(scheduled).memory[0x20:0x22] == [3 * 2 + 4 * 2, 5 + 7]
+
+
+def test_instructions_stay_inside_their_blocks():
+    source = """        LOADI R1, 0x30
+        LOADI R2, 5
+        STORE R2, R1, 0
+        LOADI R9, 3
+loop:   LOAD  R2, R1, 0
+        ADD   R2, R2, R2
+        LOADI R3, 1
+        SUB   R9, R9, R3
+        STORE R2, R1, 0
+        BNE   R9, loop
+        CALL  sub
+        HALT
+sub:    LOAD  R4, R1, 0
+        ADDI  R4, 1
+        LOADI R5, 2
+        RET
+"""
+    scheduled, plain, _ = same_results(source)
+    assert scheduled != plain and run(scheduled).regs[4] == 41
+    assembler = CVEREAssembler(passes=[InstructionScheduler()])
+    assembler.assemble(source)
+    reference = CVEREAssembler()
+    reference.assemble(source)
+    assert assembler.labels == reference.labels
+    opcodes = [instr.opcode for instr in assembler.instructions]
+    assert opcodes.index('BNE') == 9 and opcodes[10:12] == ['CALL', 'HALT'] and opcodes[-1] == 'RET'
+
+
+@pytest.mark.parametrize('source', [
+    "LOADI R1, 7\nSTORE R1, R0, 0x20\nLOAD R2, R0, 0x20\nADD R3, R2, R2\nLOADI R1, 9\nHALT",
+    "LOADI R1, 7\nLOADI R2, 9\nPUSH R1\nPUSH R2\nPOP R3\nADD R4, R3, R3\nPOP R5\nHALT",
+    "LOAD R1, R0, 0x20\nADD R1, R1, R1\nLOADI R1, 4\nADD R2, R1, R1\nHALT",
+])
+def test_memory_and_register_order_is_kept(source):
+    same_results(source)
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_random_blocks_compute_the_same_result(seed):
+    rng = random.Random(seed)
+    lines = ["LOADI R1, 0x60"] + [f"LOADI R{reg}, {rng.randrange(-128, 128)}" for reg in range(2, 10)]
+    for _ in range(30):
+        rd, rs, rt = (f"R{rng.randrange(2, 10)}" for _ in range(3))
+        kind = rng.randrange(5)
+        if kind == 0:
+            lines.append(f"LOAD  {rd}, R1, {rng.randrange(8)}")
+        elif kind == 1:
+            lines.append(f"STORE {rd}, R1, {rng.randrange(8)}")
+        elif kind == 2:
+            lines.append(f"ADDI  {rd}, {rng.randrange(256)}")
+        else:
+            lines.append(f"{rng.choice(['ADD', 'SUB', 'AND', 'OR', 'XOR'])} {rd}, {rs}, {rt}")
+    same_results('\n'.join(lines) + "\nHALT")
@@ -0,0 +1,63 @@
+"""Single-pass streaming assembly"""
+
+import pytest
+
+from assembler import CVEREAssembler
+
+
+SOURCE = """start:  LOADI R1, 3
+        CALL  body
+        JMP   done
+body:   ADDI  R2, 1
+        ADDI  R1, -1
+        BNE   R1, body
+        BEQ   R2, start
+        LJMP  after
+table:  .WORD done, after, table, 7
+        .BYTE 1, 2, 3
+after:  PUSH  R2
+        POP   R3
+        RET
+done:   HALT
+"""
+
+
+def stream(source):
+    words = {}
+
+    def sink(address, word):
+        assert address not in words
+        words[address] = word
+
+    count = CVEREAssembler().assemble_stream(source.splitlines(), sink)
+    assert sorted(words) == list(range(0, count * 2, 2))
+    return [words[address] for address in sorted(words)]
+
+
+def test_stream_matches_two_pass_assembly():
+    assert stream(SOURCE) == list(CVEREAssembler().assemble(SOURCE))
+
+
+def test_forward_references_are_backpatched_out_of_order():
+    order = []
+    CVEREAssembler().assemble_stream(SOURCE.splitlines(), lambda address, word: order.append(address))
+    assert order != sorted(order)
+    # JMP done at 0x0006 waits for the last label, after everything in between
+    assert order.index(0x0006) > order.index(0x0008)
+
+
+def test_binary_file_matches_two_pass_output(tmp_path):
+    streamed, plain = tmp_path / 'streamed.bin', tmp_path / 'plain.bin'
+    CVEREAssembler().assemble_stream_to_binary_file(SOURCE.splitlines(), str(streamed))
+    CVEREAssembler().assemble_to_binary_file(SOURCE, str(plain))
+    assert streamed.read_bytes() == plain.read_bytes()
+
+
+@pytest.mark.parametrize('source, error', [
+    ("loop: NOP\nloop: HALT", "Line 2: Duplicate label: loop"),
+    ("NOP\nJMP nowhere\nHALT", "Line 2: Undefined label: nowhere"),
+    ("NOP\nFROB R1", "Line 2: Unknown opcode: FROB"),
+])
+def test_stream_errors_name_the_line(source, error):
+    with pytest.raises(ValueError, match=error):
+        CVEREAssembler().assemble_stream(source.splitlines(), lambda address, word: None)
@@ -75,6 +75,7 @@ impl InstructionDecoder {
                 0xFB => return (InstructionFormat::Extended, "RET"),
                 0xFC => return (InstructionFormat::Extended, "PUSH"),
                 0xFD => return (InstructionFormat::Extended, "POP"),
+                0xFE => return (InstructionFormat::Extended, "LJMP"),
                 _ => return (InstructionFormat::BType, "BNE"),
             }
         }
@@ -173,6 +174,14 @@ mod tests {
         assert_eq!(decoded.imm8, 0x05);
     }
 
+    #[test]
+    fn test_decode_ljmp() {
+        let instr = 0xFE00; // LJMP, target in the next word
+        let decoded = InstructionDecoder::decode(instr);
+        assert_eq!(decoded.format, InstructionFormat::Extended);
+        assert_eq!(decoded.mnemonic, "LJMP");
+    }
+
     #[test]
     fn test_decode_halt() {
         let instr = 0xFFFF; // HALT
@@ -368,10 +368,15 @@ impl CVEREVM {
     fn execute_extended(&mut self, decoded: &crate::decoder::DecodedInstruction) -> Result<(), String> {
         match decoded.mnemonic {
             "CALL" => {
-                // Save return address in LR
-                self.registers.lr = self.registers.pc;
                 // Read second word for address
                 let target = self.fetch()?;
+                // Save return address (past the target word) in LR
+                self.registers.lr = self.registers.pc;
+                self.registers.pc = target;
+            }
+            "LJMP" => {
+                // Second word holds the full 16-bit target
+                let target = self.fetch()?;
                 self.registers.pc = target;
             }
             "RET" => {
@@ -521,6 +526,29 @@ mod tests {
         assert!(vm.halted);
     }
 
+    #[test]
+    fn test_call_and_far_jump() {
+        let mut vm = CVEREVM::new();
+        let program = vec![
+            0xFA00, 0x0008, // CALL 0x0008
+            0xFE00, 0x2000, // LJMP 0x2000
+            0xC107,         // LOADI R1, 0x07
+            0xFB00, 0x0000, // RET
+        ];
+        let far = vec![
+            0xC203, // LOADI R2, 0x03
+            0xFFFF, // HALT
+        ];
+        
+        vm.load_program(&program, 0).unwrap();
+        vm.load_program(&far, 0x2000).unwrap();
+        vm.run(100).unwrap();
+        
+        assert_eq!(vm.registers.read_gp(1), 7);
+        assert_eq!(vm.registers.read_gp(2), 3);
+        assert!(vm.halted);
+    }
+
     #[test]
     fn test_r0_hardwired() {
         let mut vm = CVEREVM::new();